@@ -76,6 +76,55 @@ def verify_batch():
                    mimetype='application/json',
                    headers={'X-Accel-Buffering': 'no'})
 
+@app.route('/api/verify/batch/explain', methods=['POST'])
+def explain_batch():
+    """
+    Dry-run a batch: report what verifying it would cost without
+    contacting any mail server, website or DNS server.
+    """
+    data = request.get_json()
+    
+    if not data or 'emails' not in data:
+        return jsonify({'error': 'Emails list is required'}), 400
+    
+    return jsonify(verification_service.explain_batch(data['emails']))
+
+@app.route('/api/smtp/transcripts', methods=['GET'])
+def get_smtp_transcripts():
+    """
+    Get recent sampled SMTP transcripts, optionally for one MX host
+    (?host=) and limited in number (?limit=).
+    """
+    host = request.args.get('host')
+    limit = request.args.get('limit', type=int)
+    
+    return jsonify(verification_service.get_smtp_transcripts(host, limit))
+
+@app.route('/api/smtp/capabilities', methods=['GET'])
+def get_mx_capabilities():
+    """
+    Get cached EHLO capabilities and TLS outcomes, optionally for one MX
+    host (?host=).
+    """
+    host = request.args.get('host')
+    
+    return jsonify(verification_service.get_mx_capabilities(host))
+
+@app.route('/api/smtp/health', methods=['GET'])
+def get_mx_health():
+    """
+    Get the MX health scoreboard (error rates, latencies, open circuits),
+    optionally for one MX host (?host=).
+    """
+    host = request.args.get('host')
+    
+    return jsonify(verification_service.get_mx_health(host))
+
+@app.route('/api/smtp/egress', methods=['GET'])
+def get_smtp_egress_status():
+    """Get whether outbound SMTP (port 25) was found reachable."""
+    return jsonify(verification_service.get_smtp_egress_status())
+
 @app.route('/api/verify/status/<job_id>', methods=['GET'])
 def verify_status(job_id):
     """Get verification job status."""
@@ -231,6 +280,11 @@ def get_category_statistics():
     statistics = statistics_service.get_category_count()
     return jsonify(statistics)
 
+@app.route('/api/statistics/dns', methods=['GET'])
+def get_dns_cache_statistics():
+    """Get DNS cache hit rates, entry counts and resolution latencies."""
+    return jsonify(statistics_service.get_dns_cache_statistics())
+
 @app.route('/api/statistics/history/email', methods=['GET'])
 def get_email_history():
     """Get verification history for a specific email."""
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import models
 from models.statistics_model import StatisticsModel
 from models.settings_model import SettingsModel
+from models.dns_cache_model import DNSCacheModel
 from models.common import VALID, INVALID, RISKY, CUSTOM
 
 # Define TOTAL constant if not already defined in models.common
@@ -24,6 +25,7 @@ class StatisticsService:
         """Initialize the statistics service."""
         self.settings_model = SettingsModel()
         self.statistics_model = StatisticsModel(self.settings_model)
+        self.dns_cache = DNSCacheModel(self.settings_model)
         self.statistics_dir = "./statistics"
         self.history_dir = os.path.join(self.statistics_dir, "history")
         
@@ -75,6 +77,18 @@ class StatisticsService:
                 'reasons': {}
             }
             
+    def get_dns_cache_statistics(self) -> Dict[str, Any]:
+        """
+        Get DNS cache statistics.
+        
+        The cache is shared by every process, so entry counts and
+        latencies cover all of them; hit/miss counters are this service's.
+        
+        Returns:
+            Dict[str, Any]: Counters, entry counts and resolution latencies
+        """
+        return self.dns_cache.get_statistics()
+    
     def get_category_count(self) -> Dict[str, Any]:
         statistics = self.statistics_model.get_statistics()
         return{
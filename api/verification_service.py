@@ -65,6 +65,64 @@ class VerificationService:
                 'error': str(e)
             }
     
+    def explain_batch(self, emails: List[str]) -> Dict[str, Any]:
+        """
+        Plan a batch without verifying it (dry run).
+        
+        Args:
+            emails: The email addresses to plan
+            
+        Returns:
+            Dict[str, Any]: The workload report
+        """
+        return self.controller.explain_batch(emails)
+    
+    def get_smtp_transcripts(self, host: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the sampled SMTP transcripts of checks run by this service.
+        
+        Args:
+            host: Only this MX host's transcripts, if given
+            limit: Maximum number of transcripts
+            
+        Returns:
+            Dict[str, Any]: Sampling settings, per-host summary and transcripts
+        """
+        return self.controller.get_smtp_transcripts(host, limit)
+    
+    def get_mx_capabilities(self, host: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the MX host capabilities cached from checks run by this service.
+        
+        Args:
+            host: Only this MX host, if given
+            
+        Returns:
+            Dict[str, Any]: TLS policy and capabilities per host
+        """
+        return self.controller.get_mx_capabilities(host)
+    
+    def get_mx_health(self, host: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the health of the MX hosts checked by this service.
+        
+        Args:
+            host: Only this MX host, if given
+            
+        Returns:
+            List[Dict[str, Any]]: Error rate, latency and circuit state per host
+        """
+        return self.controller.get_mx_health(host)
+    
+    def get_smtp_egress_status(self) -> Dict[str, Any]:
+        """
+        Get whether this service can reach remote servers on port 25.
+        
+        Returns:
+            Dict[str, Any]: Probe outcome, time, last error and targets
+        """
+        return self.controller.get_smtp_egress_status()
+    
     def _detect_provider(self, email: str) -> str:
         """
         Detect the email provider based on domain.
@@ -127,17 +185,27 @@ class VerificationService:
         job_dir = os.path.join(self.results_dir, job_id)
         os.makedirs(job_dir, exist_ok=True)
         
+        # Malformed entries are rejected here instead of going to the terminals
+        accepted = []
+        rejected: Dict[str, str] = {}
+        for value, reason in self.controller.initial_validation_model.prefilter_emails(emails):
+            if reason is None:
+                accepted.append(value)
+            elif value:
+                rejected[value] = reason
+        total_emails = len(accepted) + len(rejected)
+        
         # Create emails.csv file for terminalController
         emails_file = os.path.join(job_dir, "emails.csv")
         with open(emails_file, 'w', encoding='utf-8', newline='') as f:
-            for email in emails:
+            for email in accepted:
                 f.write(f"{email}\n")
         
         # Initialize job status
         self.active_jobs[job_id] = {
             'job_id': job_id,
             'status': 'started',
-            'total_emails': len(emails),
+            'total_emails': total_emails,
             'verified_emails': 0,
             'start_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'end_time': None,
@@ -157,27 +225,50 @@ class VerificationService:
         yield {
             'job_id': job_id,
             'status': 'started',
-            'total_emails': len(emails),
+            'total_emails': total_emails,
             'message': 'Batch verification started',
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
+        # Create a set to track which emails have been verified
+        verified_emails = set()
+        
+        # Rejected entries are invalid without any verification
+        for email, reason in rejected.items():
+            if job_id in self.active_jobs and email not in self.active_jobs[job_id]['email_results']:
+                self.active_jobs[job_id]['verified_emails'] += 1
+                self.active_jobs[job_id]['results'][INVALID] += 1
+                self.active_jobs[job_id]['email_results'][email] = {
+                    "email": email,
+                    "category": INVALID,
+                    "provider": "unknown"
+                }
+            verified_emails.add(email)
+            yield {
+                'email': email,
+                'status': INVALID,
+                'provider': "unknown",
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'reason': reason
+            }
+        if rejected:
+            self._save_job_status(job_id)
+        emails = accepted
+        
         # Determine terminal count based on email count
         num_terminals = self._determine_terminal_count(len(emails))
         
         # Create output queue for terminal monitoring
         output_queue = []
         
-        # Create a set to track which emails have been verified
-        verified_emails = set()
-        
         # Start terminal controller in a separate thread
         terminal_thread = threading.Thread(
             target=self._run_terminal_controller,
             args=(emails_file, job_id, num_terminals, output_queue)
         )
         terminal_thread.daemon = True
-        terminal_thread.start()
+        if emails:
+            terminal_thread.start()
         
         # Monitor for results and yield them as they become available
         try:
@@ -188,7 +279,7 @@ class VerificationService:
             last_verified_count = 0
             
             # Keep monitoring until all emails are verified or timeout occurs
-            while len(verified_emails) < len(emails):
+            while len(verified_emails) < total_emails:
                 # Check if we've exceeded the maximum wait time
                 current_time = time.time()
                 if current_time - start_time > max_wait_time:
@@ -263,7 +354,7 @@ class VerificationService:
             yield {
                 'job_id': job_id,
                 'status': 'completed',
-                'total_emails': len(emails),
+                'total_emails': total_emails,
                 'verified_emails': len(verified_emails),
                 'results': self.active_jobs[job_id]['results'] if job_id in self.active_jobs else {},
                 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
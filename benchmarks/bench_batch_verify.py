@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+End-to-end check of batched SMTP verification through batch_verify.
+
+Runs VerificationController.batch_verify over several domains whose MX
+records point at a local stand-in SMTP server (seeded into the DNS cache),
+then reports throughput, connections and recipients per SMTP transaction.
+The run fails (exit status 1) if any address gets the wrong category or if
+the addresses were not sent as multi-recipient transactions, so it doubles
+as a regression check for the pipelined batch path.
+
+Usage:
+    python benchmarks/bench_batch_verify.py --addresses 200 --domains 4
+    python benchmarks/bench_batch_verify.py --engine async --rtt 0.05
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import Counter
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.settings_model import SettingsModel
+from models.dns_cache_model import MX
+from models.common import VALID, INVALID
+from benchmarks.smtp_standin import StandInServer, StandInScript
+
+def main():
+    """Run the batch_verify check."""
+    parser = argparse.ArgumentParser(description="Check batched SMTP verification through batch_verify")
+    parser.add_argument("--addresses", type=int, default=200, help="Addresses in the batch")
+    parser.add_argument("--domains", type=int, default=4, help="Domains the addresses are spread over")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync", help="SMTP engine setting")
+    parser.add_argument("--rtt", type=float, default=0.01, help="Simulated round-trip time in seconds")
+    parser.add_argument("--pipelining", choices=["on", "off"], default="on",
+                        help="Whether the stand-in advertises PIPELINING")
+    args = parser.parse_args()
+    
+    # Settings, caches and results stay out of the working tree
+    work_dir = tempfile.mkdtemp(prefix="bench_batch_")
+    os.chdir(work_dir)
+    settings = SettingsModel()
+    settings.set("smtp_engine", args.engine, True)
+    # The stand-in is local; a blocked port 25 must not short-circuit the run
+    settings.set("smtp_egress_probe_enabled", "False", False)
+    # Keep the rate limiter on, with a budget the batch cannot exhaust
+    settings.set("rate_limit_max_requests", str(args.addresses * 10), True)
+    settings.set("rate_limit_time_window", "1", True)
+    
+    # Imported after the settings are written, since it reads them on construction
+    from models.controller import VerificationController
+    
+    server = StandInServer(StandInScript(
+        rules=[("good*@*", 250, "2.1.5 OK")], latency=args.rtt, pipelining=args.pipelining == "on"
+    ))
+    host = server.start()
+    controller = VerificationController()
+    
+    domains = [f"bench{i}.example" for i in range(max(1, args.domains))]
+    for domain in domains:
+        controller.initial_validation_model.dns_cache.put(domain, MX, [[10, host]], 3600, 0.0)
+    
+    emails = [f"{'good' if i % 2 else 'nobody'}{i}@{domains[i % len(domains)]}" for i in range(args.addresses)]
+    start_time = time.perf_counter()
+    results = controller.batch_verify(emails)
+    elapsed = time.perf_counter() - start_time
+    server.stop()
+    
+    wrong = [email for email in emails
+             if results[email].category != (VALID if email.startswith("good") else INVALID)]
+    stats = server.stats
+    per_transaction = stats["rcpts"] / max(1, stats["transactions"])
+    
+    print(f"{args.addresses} addresses on {len(domains)} domains, {args.engine} engine, "
+          f"RTT {args.rtt * 1000:.0f} ms, pipelining {args.pipelining}")
+    print(f"elapsed {elapsed:.2f}s ({args.addresses / elapsed:.1f} addresses/s)")
+    print(f"connections {stats['connections']} ({stats['connections'] / args.addresses:.3f} per address), "
+          f"transactions {stats['transactions']}, {per_transaction:.1f} recipients per transaction")
+    print("outcomes: " + ", ".join(f"{category} {count}"
+                                   for category, count in sorted(Counter(r.category for r in results.values()).items())))
+    
+    failures = []
+    if wrong:
+        failures.append(f"{len(wrong)} addresses got the wrong category, e.g. {wrong[0]}: {results[wrong[0]]}")
+    if args.addresses > len(domains) and per_transaction <= 1.0:
+        failures.append("addresses were not batched into multi-recipient transactions")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
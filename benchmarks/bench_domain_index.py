@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the memory-mapped domain index.
+
+Generates a domain list, builds an index from it and measures build time,
+index size, the Python heap used by opening the index, and lookups per
+second for listed and unlisted domains.
+
+Usage:
+    python benchmarks/bench_domain_index.py --entries 20000000
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.domain_index_model import DomainIndex, build_domain_index
+
+def generate_list(path: str, entry_count: int) -> None:
+    """
+    Write a domain list file.
+    
+    Args:
+        path: Path of the file to write
+        entry_count: Number of domains to write
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("domain\n")
+        for i in range(entry_count):
+            f.write(f"listed-{i}.example\n")
+
+def measure_lookups(index: DomainIndex, domains: list) -> float:
+    """
+    Measure lookups per second.
+    
+    Args:
+        index: The index to query
+        domains: Domains to look up
+    
+    Returns:
+        float: Lookups per second
+    """
+    start_time = time.perf_counter()
+    for domain in domains:
+        domain in index
+    return len(domains) / (time.perf_counter() - start_time)
+
+def main():
+    """Run the domain index benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped domain index")
+    parser.add_argument("--entries", type=int, default=5_000_000, help="Number of listed domains")
+    parser.add_argument("--lookups", type=int, default=500_000, help="Number of lookups per measurement")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Hashes sorted in memory at a time")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated files")
+    args = parser.parse_args()
+    
+    work_dir = tempfile.mkdtemp(prefix="bench_domain_index_")
+    list_path = os.path.join(work_dir, "domains.txt")
+    index_path = os.path.join(work_dir, "domains.idx")
+    
+    try:
+        print(f"Generating {args.entries:,} domains in {work_dir}")
+        generate_list(list_path, args.entries)
+        
+        start_time = time.perf_counter()
+        count = build_domain_index([list_path], index_path, args.chunk_size)
+        build_seconds = time.perf_counter() - start_time
+        print(f"Built index: {count:,} entries, {os.path.getsize(index_path) / 1e6:.1f} MB "
+              f"in {build_seconds:.1f}s ({count / build_seconds:,.0f} entries/sec)")
+        
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        index = DomainIndex(index_path)
+        open_ms = (time.perf_counter() - start_time) * 1000
+        heap_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"Opened index in {open_ms:.2f} ms using {heap_bytes / 1024:.1f} KB of Python heap")
+        
+        rng = random.Random(42)
+        hits = [f"listed-{rng.randrange(args.entries)}.example" for _ in range(args.lookups)]
+        misses = [f"unlisted-{i}.example" for i in range(args.lookups)]
+        
+        hit_rate = measure_lookups(index, hits)
+        miss_rate = measure_lookups(index, misses)
+        found = sum(1 for domain in hits[:1000] if domain in index)
+        print(f"Listed lookups:   {hit_rate:,.0f}/sec ({1e9 / hit_rate:,.0f} ns each), {found}/1000 found")
+        print(f"Unlisted lookups: {miss_rate:,.0f}/sec ({1e9 / miss_rate:,.0f} ns each)")
+        
+        index.close()
+    finally:
+        if args.keep:
+            print(f"Files kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the batch syntax prefilter.
+
+Generates a file of raw input lines (mostly valid addresses with a share of
+typical garbage) and measures how many lines per second
+InitialValidationModel.prefilter_file can partition.
+
+Usage:
+    python benchmarks/bench_prefilter.py --lines 10000000
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.settings_model import SettingsModel
+from models.initial_validation_model import InitialValidationModel
+
+def generate_input(path: str, line_count: int, invalid_ratio: float) -> None:
+    """
+    Write a file of raw input lines.
+    
+    Args:
+        path: Path of the file to write
+        line_count: Number of lines to write
+        invalid_ratio: Share of lines that should be rejected
+    """
+    rng = random.Random(42)
+    domains = ["gmail.com", "outlook.com", "yahoo.com", "example.org", "company.co.uk"]
+    invalid_values = ["", "no-at-sign.com", "a@@b.com", "user@nodot", "@example.com", "x" * 70 + "@example.com"]
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("email\n")
+        for i in range(line_count):
+            if rng.random() < invalid_ratio:
+                f.write(f"{rng.choice(invalid_values)}\n")
+            else:
+                f.write(f"  user.{i}+tag@{rng.choice(domains)} ,Name {i}\n")
+
+def main():
+    """Run the prefilter benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the batch syntax prefilter")
+    parser.add_argument("--lines", type=int, default=10_000_000, help="Number of input lines")
+    parser.add_argument("--invalid-ratio", type=float, default=0.1, help="Share of invalid lines")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated files")
+    args = parser.parse_args()
+    
+    work_dir = tempfile.mkdtemp(prefix="bench_prefilter_")
+    os.chdir(work_dir)
+    
+    input_path = os.path.join(work_dir, "input.csv")
+    accepted_path = os.path.join(work_dir, "accepted.csv")
+    rejected_path = os.path.join(work_dir, "rejected.csv")
+    
+    print(f"Generating {args.lines:,} lines in {input_path}...")
+    start_time = time.perf_counter()
+    generate_input(input_path, args.lines, args.invalid_ratio)
+    print(f"Generated in {time.perf_counter() - start_time:.1f}s "
+          f"({os.path.getsize(input_path) / 1024 / 1024:.0f} MB)")
+    
+    model = InitialValidationModel(SettingsModel(os.path.join(work_dir, "settings", "settings.csv")))
+    
+    start_time = time.perf_counter()
+    counts = model.prefilter_file(input_path, accepted_path, rejected_path)
+    elapsed = time.perf_counter() - start_time
+    
+    print(f"Accepted: {counts['accepted']:,}")
+    print(f"Rejected: {counts['rejected']:,}")
+    print(f"Elapsed:  {elapsed:.2f}s")
+    print(f"Rate:     {args.lines / elapsed:,.0f} lines/sec")
+    
+    if args.keep:
+        print(f"Files kept in {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark for SMTP PIPELINING in multi-recipient probes.
+
+Starts a local stand-in SMTP server that delays every reply by a simulated
+round-trip time, then checks batches of recipients over one session with and
+without PIPELINING advertised, and reports the time per address.
+
+Usage:
+    python benchmarks/bench_smtp_pipelining.py --rtt 0.08 --addresses 200
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.smtp_session_model import SMTPSession
+from benchmarks.smtp_standin import StandInServer, StandInScript
+
+def start_server(rtt: float, pipelining: bool) -> str:
+    """
+    Start a stand-in server in a background thread.
+    
+    Args:
+        rtt: Simulated round-trip time in seconds
+        pipelining: Whether to advertise PIPELINING
+    
+    Returns:
+        str: The server address as "host:port"
+    """
+    return StandInServer(StandInScript(latency=rtt, pipelining=pipelining)).start()
+
+def measure(host: str, addresses: int, batch_size: int) -> float:
+    """
+    Check addresses in batches over one session.
+    
+    Args:
+        host: The server address
+        addresses: Number of addresses to check
+        batch_size: Recipients per transaction
+    
+    Returns:
+        float: Seconds per address
+    """
+    emails = [f"{'good' if i % 2 else 'nobody'}{i}@bench.example" for i in range(addresses)]
+    session = SMTPSession(host, "verify@example.com", timeout=30)
+    session.connect()
+    try:
+        start_time = time.perf_counter()
+        for start in range(0, len(emails), batch_size):
+            replies = session.probe(emails[start:start + batch_size])
+            assert len(replies) == len(emails[start:start + batch_size])
+        return (time.perf_counter() - start_time) / addresses
+    finally:
+        session.close()
+
+def main():
+    """Run the pipelining benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark SMTP PIPELINING for RCPT TO probes")
+    parser.add_argument("--rtt", type=float, default=0.05, help="Simulated round-trip time in seconds")
+    parser.add_argument("--addresses", type=int, default=100, help="Addresses checked per measurement")
+    parser.add_argument("--batch-sizes", type=str, default="1,5,20,50", help="Comma-separated recipients per transaction")
+    args = parser.parse_args()
+    
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    hosts = {
+        "sequential": start_server(args.rtt, pipelining=False),
+        "pipelined": start_server(args.rtt, pipelining=True)
+    }
+    
+    print(f"RTT {args.rtt * 1000:.0f} ms, {args.addresses} addresses per run")
+    print(f"{'batch':>6} {'sequential ms/addr':>20} {'pipelined ms/addr':>20} {'speedup':>8}")
+    for batch_size in batch_sizes:
+        timings = {mode: measure(host, args.addresses, batch_size) for mode, host in hosts.items()}
+        speedup = timings["sequential"] / timings["pipelined"]
+        print(f"{batch_size:>6} {timings['sequential'] * 1000:>20.1f} "
+              f"{timings['pipelined'] * 1000:>20.1f} {speedup:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
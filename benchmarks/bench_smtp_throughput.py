@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for SMTP verification.
+
+Runs SMTPModel.verify_smtp or verify_email_smtp against local stand-in SMTP
+servers scripted for several scenarios (plain, round-trip latency,
+greylisting, a tarpit, dropped connections) and reports probes per second,
+p50/p99 latency per address and connections opened per address, so SMTP
+changes can be compared without touching real MX servers.
+
+Usage:
+    python benchmarks/bench_smtp_throughput.py --addresses 500 --workers 8
+    python benchmarks/bench_smtp_throughput.py --scenarios rtt50,tarpit --method email_smtp
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.settings_model import SettingsModel
+from models.smtp_model import SMTPModel
+from benchmarks.smtp_standin import StandInServer, StandInScript
+
+SCENARIOS = {
+    "plain": StandInScript(),
+    "rtt50": StandInScript(latency=0.05),
+    "greylist": StandInScript(latency=0.01, greylist=1),
+    "tarpit": StandInScript(tarpit=0.5),
+    "drops": StandInScript(latency=0.01, drop_after=8),
+    "no-pipelining": StandInScript(latency=0.05, pipelining=False),
+}
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Get a percentile of a list of values (nearest rank).
+    
+    Args:
+        values: The values
+        fraction: The percentile as a fraction, e.g. 0.99
+    
+    Returns:
+        float: The value at that percentile, or 0.0 for no values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_scenario(settings: SettingsModel, script: StandInScript, method: str,
+                 addresses: int, workers: int) -> Dict[str, Any]:
+    """
+    Verify addresses against a fresh stand-in server and SMTP model.
+    
+    Args:
+        settings: Settings for the SMTP model
+        script: How the stand-in server behaves
+        method: "smtp" for verify_smtp, "email_smtp" for verify_email_smtp
+        addresses: Number of addresses to verify
+        workers: Number of threads verifying at once
+    
+    Returns:
+        Dict[str, Any]: Elapsed time, latencies, server counters and outcomes
+    """
+    server = StandInServer(script)
+    host = server.start()
+    model = SMTPModel(settings)
+    emails = [f"{'good' if i % 2 else 'nobody'}{i}@bench.example" for i in range(addresses)]
+    
+    def verify(email: str):
+        start_time = time.perf_counter()
+        if method == "smtp":
+            result = model.verify_smtp(email, [host])
+            if result["is_deliverable"]:
+                outcome = "deliverable"
+            else:
+                outcome = "temporary" if result.get("temporary") else "rejected"
+        else:
+            outcome = model.verify_email_smtp(email, [host]).category
+        return time.perf_counter() - start_time, outcome
+    
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(verify, emails))
+    elapsed = time.perf_counter() - start_time
+    
+    model.close_sessions()
+    if model.async_engine:
+        model.async_engine.close()
+    server.stop()
+    
+    return {
+        "elapsed": elapsed,
+        "latencies": [latency for latency, _ in outcomes],
+        "outcomes": Counter(outcome for _, outcome in outcomes),
+        "stats": dict(server.stats)
+    }
+
+def main():
+    """Run the SMTP throughput benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark SMTP verification against local stand-in servers")
+    parser.add_argument("--addresses", type=int, default=200, help="Addresses verified per scenario")
+    parser.add_argument("--workers", type=int, default=4, help="Threads verifying at once")
+    parser.add_argument("--method", choices=["smtp", "email_smtp"], default="smtp",
+                        help="smtp runs verify_smtp, email_smtp runs verify_email_smtp")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync", help="SMTP engine setting")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS),
+                        help="Comma-separated scenarios: " + ", ".join(SCENARIOS))
+    parser.add_argument("--deadline", type=float, default=30.0, help="smtp_probe_deadline in seconds")
+    args = parser.parse_args()
+    
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    
+    # Caches and results stay out of the working tree
+    work_dir = tempfile.mkdtemp(prefix="bench_smtp_")
+    os.chdir(work_dir)
+    settings = SettingsModel(os.path.join(work_dir, "settings", "settings.csv"))
+    settings.set("smtp_engine", args.engine, True)
+    settings.set("smtp_probe_deadline", str(args.deadline), True)
+    # The stand-in is local; a blocked port 25 must not short-circuit the run
+    settings.set("smtp_egress_probe_enabled", "False", False)
+    
+    print(f"{args.addresses} addresses per scenario, {args.workers} workers, "
+          f"{args.method} on the {args.engine} engine")
+    print(f"{'scenario':<14} {'probes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'conn/addr':>10}  outcomes")
+    for name in names:
+        run = run_scenario(settings, SCENARIOS[name], args.method, args.addresses, args.workers)
+        outcomes = ", ".join(f"{outcome} {count}" for outcome, count in sorted(run["outcomes"].items()))
+        print(f"{name:<14} {args.addresses / run['elapsed']:>9.1f} "
+              f"{percentile(run['latencies'], 0.5) * 1000:>8.1f} "
+              f"{percentile(run['latencies'], 0.99) * 1000:>8.1f} "
+              f"{run['stats']['connections'] / args.addresses:>10.3f}  {outcomes}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Local stand-in SMTP server for benchmarks.
+
+Answers the commands an SMTP probe sends (EHLO, MAIL, RCPT, RSET, QUIT)
+according to a StandInScript: replies per recipient pattern, greylisting,
+tarpits, injected latency and dropped connections. Nothing is delivered.
+
+Usage:
+    python benchmarks/smtp_standin.py --latency 0.05 --greylist 1
+"""
+import time
+import asyncio
+import fnmatch
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+class StandInScript:
+    """How the stand-in server behaves."""
+    
+    def __init__(self, rules: Optional[List[Tuple[str, int, str]]] = None,
+                 latency: float = 0.0, tarpit: float = 0.0, pipelining: bool = True,
+                 greylist: int = 0, drop_after: int = 0, banner_delay: float = 0.0):
+        """
+        Initialize the script.
+        
+        Args:
+            rules: (pattern, code, text) per recipient; the first pattern
+                (fnmatch, case-insensitive) matching the address gives the
+                RCPT TO reply. Defaults to accepting local parts that start
+                with "good" and rejecting everything else.
+            latency: Seconds every reply is delayed, like a round trip
+            tarpit: Extra seconds every reply after the banner is delayed
+            pipelining: Whether to advertise PIPELINING
+            greylist: RCPT TO attempts per recipient answered with 451
+                before the rules apply
+            drop_after: Close the connection without a reply after this many
+                commands (0 never drops)
+            banner_delay: Extra seconds before the greeting
+        """
+        self.rules = rules if rules is not None else [
+            ("good*@*", 250, "2.1.5 OK"),
+            ("*", 550, "5.1.1 User unknown"),
+        ]
+        self.latency = latency
+        self.tarpit = tarpit
+        self.pipelining = pipelining
+        self.greylist = greylist
+        self.drop_after = drop_after
+        self.banner_delay = banner_delay
+    
+    def rcpt_reply(self, address: str) -> Tuple[int, str]:
+        """
+        Get the scripted reply for a recipient.
+        
+        Args:
+            address: The recipient address
+        
+        Returns:
+            Tuple[int, str]: Reply code and text
+        """
+        for pattern, code, text in self.rules:
+            if fnmatch.fnmatch(address.lower(), pattern.lower()):
+                return code, text
+        return 550, "5.1.1 User unknown"
+
+class StandInProtocol(asyncio.Protocol):
+    """One client connection to the stand-in server."""
+    
+    def __init__(self, server: "StandInServer"):
+        self.server = server
+        self.script = server.script
+        self.buffer = b""
+        self.reply_at = 0.0
+        self.commands = 0
+        self.transport = None
+    
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.stats["connections"] += 1
+        self._reply(b"220 standin ESMTP", self.script.banner_delay)
+    
+    def _reply(self, line: bytes, delay: float) -> None:
+        """Send a reply after a delay, keeping replies in command order."""
+        loop = asyncio.get_running_loop()
+        self.reply_at = max(loop.time() + self.script.latency + delay, self.reply_at)
+        loop.call_at(self.reply_at, self._write, line + b"\r\n")
+    
+    def _write(self, data: bytes) -> None:
+        if not self.transport.is_closing():
+            self.transport.write(data)
+    
+    def data_received(self, data: bytes) -> None:
+        self.buffer += data
+        while b"\n" in self.buffer and not self.transport.is_closing():
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            self._handle(line.strip())
+    
+    def _handle(self, line: bytes) -> None:
+        """Answer one command."""
+        self.commands += 1
+        self.server.stats["commands"] += 1
+        if self.script.drop_after and self.commands > self.script.drop_after:
+            self.server.stats["drops"] += 1
+            self.transport.close()
+            return
+        
+        command = line.upper()
+        tarpit = self.script.tarpit
+        if command.startswith(b"EHLO"):
+            extensions = b"250-PIPELINING\r\n" if self.script.pipelining else b""
+            self._reply(b"250-standin\r\n" + extensions + b"250 8BITMIME", tarpit)
+        elif command.startswith(b"RCPT"):
+            self.server.stats["rcpts"] += 1
+            address = line.split(b":", 1)[-1].strip().strip(b"<>").decode("utf-8", errors="ignore")
+            code, text = self.server.rcpt_reply(address)
+            self._reply(f"{code} {text}".encode("utf-8"), tarpit)
+        elif command.startswith(b"QUIT"):
+            self._reply(b"221 2.0.0 Bye", 0.0)
+            asyncio.get_running_loop().call_at(self.reply_at, self.transport.close)
+        elif command.startswith(b"MAIL"):
+            self.server.stats["transactions"] += 1
+            self._reply(b"250 2.0.0 OK", tarpit)
+        elif command.startswith((b"RSET", b"NOOP", b"HELO")):
+            self._reply(b"250 2.0.0 OK", tarpit)
+        else:
+            self._reply(b"502 5.5.2 Command not implemented", tarpit)
+
+class StandInServer:
+    """Stand-in SMTP server running on its own event loop thread."""
+    
+    def __init__(self, script: Optional[StandInScript] = None):
+        """
+        Initialize the server. It listens once start() is called.
+        
+        Args:
+            script: How the server behaves
+        """
+        self.script = script or StandInScript()
+        self.stats: Dict[str, int] = {"connections": 0, "commands": 0, "transactions": 0, "rcpts": 0, "drops": 0}
+        
+        # RCPT TO attempts seen per recipient, for greylisting
+        self.attempts: Dict[str, int] = {}
+        
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server = None
+        self.address: Optional[str] = None
+    
+    def rcpt_reply(self, address: str) -> Tuple[int, str]:
+        """
+        Get the reply for a recipient, greylisting its first attempts.
+        
+        Args:
+            address: The recipient address
+        
+        Returns:
+            Tuple[int, str]: Reply code and text
+        """
+        key = address.lower()
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        if self.attempts[key] <= self.script.greylist:
+            return 451, "4.7.1 Greylisted, please try again later"
+        return self.script.rcpt_reply(address)
+    
+    def reset_stats(self) -> None:
+        """Zero the counters and greylisting state."""
+        for key in self.stats:
+            self.stats[key] = 0
+        self.attempts = {}
+    
+    def start(self) -> str:
+        """
+        Start listening on a free local port in a background thread.
+        
+        Returns:
+            str: The server address as "host:port", usable as an MX host
+        """
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(
+                self.loop.create_server(lambda: StandInProtocol(self), "127.0.0.1", 0, backlog=1024)
+            )
+            self.address = f"127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+            started.set()
+            self.loop.run_forever()
+        
+        threading.Thread(target=run, name="smtp-standin", daemon=True).start()
+        started.wait()
+        return self.address
+    
+    def stop(self) -> None:
+        """Stop listening and end the event loop thread."""
+        loop, self.loop = self.loop, None
+        if loop is None:
+            return
+        
+        def shutdown():
+            self.server.close()
+            loop.stop()
+        
+        loop.call_soon_threadsafe(shutdown)
+
+def main():
+    """Run a stand-in server until interrupted."""
+    parser = argparse.ArgumentParser(description="Run a local stand-in SMTP server")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every reply is delayed")
+    parser.add_argument("--tarpit", type=float, default=0.0, help="Extra seconds per reply after the banner")
+    parser.add_argument("--greylist", type=int, default=0, help="RCPT attempts per recipient answered with 451")
+    parser.add_argument("--drop-after", type=int, default=0, help="Drop connections after this many commands")
+    parser.add_argument("--no-pipelining", action="store_true", help="Don't advertise PIPELINING")
+    args = parser.parse_args()
+    
+    server = StandInServer(StandInScript(
+        latency=args.latency, tarpit=args.tarpit, greylist=args.greylist,
+        drop_after=args.drop_after, pipelining=not args.no_pipelining
+    ))
+    print(f"Stand-in SMTP server listening on {server.start()}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"Stopped: {server.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ from models.results_model import ResultsModel
 from models.statistics_model import StatisticsModel
 from models.bounce_model import BounceModel
 from models.controller import VerificationController
+from models.domain_index_model import build_domain_index
 
 # Configure logging
 logging.basicConfig(
@@ -75,11 +76,66 @@ def main_menu():
     parser.add_argument('--job-id', type=str, help='Job ID for batch verification')
     parser.add_argument('--terminal', type=int, help='Terminal ID for multi-terminal mode')
     parser.add_argument('--emails', type=str, help='Path to file containing emails to verify')
+    parser.add_argument('--build-domain-index', type=str, metavar='INDEX',
+                        help='Build a domain index file (e.g. ./data/disposable.idx) from --source lists and exit')
+    parser.add_argument('--source', type=str, action='append', default=[],
+                        help='Domain list file for --build-domain-index (can be repeated)')
+    parser.add_argument('--explain', type=str, metavar='FILE',
+                        help='Dry-run a batch: print the planned workload for the emails in FILE and exit')
+    parser.add_argument('--dns-cache-stats', action='store_true',
+                        help='Purge expired DNS cache entries, print cache hit rates and latencies and exit')
+    parser.add_argument('--smtp-transcripts', type=str, metavar='FILE',
+                        help='Probe the emails in FILE over SMTP with every exchange transcribed, '
+                             'without saving results, print the transcripts and health per MX host and exit')
+    parser.add_argument('--mx-host', type=str,
+                        help='Only print transcripts and health of this MX host (with --smtp-transcripts)')
     args = parser.parse_args()
     
+    # Build a suppression/disposable domain index and exit
+    if args.build_domain_index:
+        if not args.source:
+            parser.error('--build-domain-index requires at least one --source')
+        start_time = time.time()
+        count = build_domain_index(args.source, args.build_domain_index)
+        print(f"Indexed {count} domains into {args.build_domain_index} in {time.time() - start_time:.1f}s")
+        sys.exit(0)
+    
     # Initialize the controller
     controller = VerificationController()
     
+    # Dry-run a batch and exit
+    if args.explain:
+        with open(args.explain, 'r', encoding='utf-8', errors='replace') as f:
+            emails = [value for value, _ in controller.initial_validation_model.prefilter_emails(f) if value]
+        print(json.dumps(controller.explain_batch(emails), indent=4))
+        sys.exit(0)
+    
+    # Report on the shared DNS cache and exit
+    if args.dns_cache_stats:
+        remaining = controller.initial_validation_model.dns_cache.purge_expired()
+        print(f"Purged expired entries; {remaining} entries remain")
+        print(json.dumps(controller.get_dns_cache_statistics(), indent=4))
+        sys.exit(0)
+    
+    # Verify a batch while transcribing every SMTP exchange, then print them
+    if args.smtp_transcripts:
+        with open(args.smtp_transcripts, 'r', encoding='utf-8', errors='replace') as f:
+            emails = [value for value, reason in controller.initial_validation_model.prefilter_emails(f)
+                      if reason is None]
+        controller.smtp_model.session_pool.transcripts.enable(sample_rate=1.0)
+        # Only the SMTP probes run; nothing is saved
+        mx_records = {}
+        for email in emails:
+            domain = email.split('@')[-1].lower()
+            if domain not in mx_records:
+                mx_records[domain] = controller.initial_validation_model.get_mx_records(domain)
+            controller.smtp_model.verify_smtp(email, mx_records[domain])
+        controller.smtp_model.close_sessions()
+        report = controller.get_smtp_transcripts(args.mx_host)
+        report["mx_health"] = controller.get_mx_health(args.mx_host)
+        print(json.dumps(report, indent=4))
+        sys.exit(0)
+    
     # Initialize the bounce model
     bounce_model = BounceModel(controller.settings_model)
     
@@ -88,10 +144,9 @@ def main_menu():
         # Read emails from file
         emails = []
         try:
-            with open(args.emails, 'r', encoding='utf-8') as f:
-                for line in f:
-                    email = line.strip()
-                    if '@' in email:  # Basic validation
+            with open(args.emails, 'r', encoding='utf-8', errors='replace') as f:
+                for email, reason in controller.initial_validation_model.prefilter_emails(f):
+                    if reason is None:
                         emails.append(email)
         except Exception as e:
             logger.error(f"Error reading emails file: {e}")
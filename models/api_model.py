@@ -4,6 +4,7 @@ import time
 import random
 from typing import Dict, List, Any, Optional
 from models.common import EmailVerificationResult, VALID, INVALID, RISKY, CUSTOM
+from models.domain_verdict_model import DomainVerdictModel
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,9 @@ class APIModel:
         """
         self.settings_model = settings_model
         
+        # Catch-all verdicts per domain, shared with the SMTP model
+        self.domain_verdicts = DomainVerdictModel(settings_model)
+        
         # Rate limiter will be initialized by the controller
         self.rate_limiter = None
     
@@ -49,18 +53,20 @@ class APIModel:
         # Extract domain for rate limiting
         _, domain = email.split('@')
         
-        # Check rate limiting if rate limiter is set
-        if self.rate_limiter and self.rate_limiter.is_rate_limited(domain):
-            wait_time = self.rate_limiter.get_backoff_time(domain)
-            logger.info(f"Microsoft API verification rate limited for {domain}, waiting {wait_time}s")
-            time.sleep(wait_time)
-            
-            # Record this request
-            if self.rate_limiter:
-                self.rate_limiter.add_request(domain)
+        # Wait for the domain's budget if rate limiter is set
+        if self.rate_limiter:
+            wait_time = self.rate_limiter.acquire(domain)
+            if wait_time > 0:
+                logger.info(f"Microsoft API verification rate limited for {domain}, waited {wait_time:.1f}s")
         
-        # Check for catch-all domain using API
-        is_catch_all = self._check_microsoft_catch_all(domain)
+        # Check for catch-all domain, probing the API once per domain per TTL
+        verdict = self.domain_verdicts.get_catch_all(domain)
+        if verdict:
+            is_catch_all = verdict["is_catch_all"]
+        else:
+            is_catch_all = self._check_microsoft_catch_all(domain)
+            if is_catch_all is not None:
+                self.domain_verdicts.set_catch_all(domain, is_catch_all, "microsoft_api")
         if is_catch_all:
             logger.info(f"Microsoft API verification detected catch-all domain: {domain}")
             return EmailVerificationResult(
@@ -180,7 +186,7 @@ class APIModel:
             logger.info(f"Microsoft API verification error for {email}: {str(e)}")
             return None
     
-    def _check_microsoft_catch_all(self, domain: str) -> bool:
+    def _check_microsoft_catch_all(self, domain: str) -> Optional[bool]:
         """
         Check if a domain has a catch-all email configuration using Microsoft API.
         
@@ -188,7 +194,8 @@ class APIModel:
             domain: The domain to check
             
         Returns:
-            bool: True if it's a catch-all domain, False otherwise
+            Optional[bool]: True if it's a catch-all domain, False if not, or
+            None if the API gave no usable answer
         """
         # Generate a random email that almost certainly doesn't exist
         random_str = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=16))
@@ -288,12 +295,14 @@ class APIModel:
                 if random_valid and real_valid:
                     logger.info(f"Microsoft API detected catch-all domain: {domain}")
                     return True
+                
+                return False
             
-            return False
+            return None
         
         except Exception as e:
             logger.error(f"Error checking Microsoft catch-all for domain {domain}: {e}")
-            return False
+            return None
     
     def verify_google_api(self, email: str) -> Optional[EmailVerificationResult]:
         """
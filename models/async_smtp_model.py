@@ -0,0 +1,694 @@
+import ssl
+import time
+import socket
+import asyncio
+import smtplib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+from models.rate_limiter_model import RateLimiterModel
+from models.smtp_reply_model import apply_rcpt_reply, catch_all_verdict, SenderRefusedReply
+from models.smtp_deadline_model import SMTPDeadlineModel, ProbeDeadline
+from models.mx_capability_model import (MXCapabilityModel, TLS_OK, TLS_FAILED,
+                                        TLS_NOT_OFFERED, TLS_SKIPPED)
+from models.smtp_transcript_model import SMTPTranscript
+from models.connection_racer_model import is_address_family_error
+
+logger = logging.getLogger(__name__)
+
+SMTP_PORT = 25
+
+class SMTPClientProtocol(asyncio.Protocol):
+    """Protocol that buffers server replies for an AsyncSMTPClient."""
+    
+    def __init__(self):
+        self.buffer = bytearray()
+        self.data_event = asyncio.Event()
+        self.closed = False
+    
+    def data_received(self, data: bytes) -> None:
+        self.buffer.extend(data)
+        self.data_event.set()
+    
+    def eof_received(self) -> bool:
+        self.closed = True
+        self.data_event.set()
+        return False
+    
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed = True
+        self.data_event.set()
+
+class AsyncSMTPClient:
+    """
+    Minimal non-blocking SMTP client for RCPT TO probes.
+    
+    Built on a plain asyncio.Protocol rather than streams, so STARTTLS can
+    use loop.start_tls() on every supported Python version.
+    """
+    
+    def __init__(self, host: str, timeout: float, local_hostname: str,
+                 tls_context: ssl.SSLContext, connect_stagger: Optional[float] = None,
+                 deadline: Optional[ProbeDeadline] = None,
+                 capabilities: Optional[MXCapabilityModel] = None,
+                 transcript: Optional[SMTPTranscript] = None):
+        """
+        Initialize the client. The connection is opened by connect().
+        
+        Args:
+            host: The MX host, optionally as "host:port"
+            timeout: Timeout in seconds for each network operation
+            local_hostname: Name sent in EHLO
+            tls_context: Context used for STARTTLS
+            connect_stagger: If set, the host's addresses are raced with
+                this delay between attempts (Happy Eyeballs)
+            deadline: Time budget of the check; each phase is limited by it
+            capabilities: Capability cache that applies the TLS policy, if any
+            transcript: Transcript to record commands and replies into, if
+                this exchange is sampled
+        """
+        self.mx = host
+        self.host, self.port = self._split_host(host)
+        self.timeout = timeout
+        self.local_hostname = local_hostname
+        self.tls_context = tls_context
+        self.connect_stagger = connect_stagger
+        self.deadline = deadline or ProbeDeadline.uniform(timeout)
+        self.capabilities = capabilities
+        self.transcript = transcript
+        
+        self.transport: Optional[asyncio.Transport] = None
+        self.protocol: Optional[SMTPClientProtocol] = None
+        self.extensions: Dict[str, str] = {}
+        
+        # Kept across probes when the engine reuses the session
+        self.recipients = 0
+        self.in_transaction = False
+        self.last_used = 0.0
+    
+    @property
+    def is_idle_usable(self) -> bool:
+        """Whether the connection is open with nothing unread, so it can take another probe."""
+        return (self.transport is not None and not self.transport.is_closing()
+                and not self.protocol.closed and not self.protocol.buffer)
+    
+    @staticmethod
+    def _split_host(host: str) -> Tuple[str, int]:
+        """Split "host:port" the way smtplib does."""
+        name, _, port = host.rpartition(':')
+        if name and port.isdigit() and ']' not in port:
+            return name, int(port)
+        return host, SMTP_PORT
+    
+    async def connect(self) -> None:
+        """Open the connection, read the greeting and complete EHLO and STARTTLS."""
+        loop = asyncio.get_running_loop()
+        with self.deadline.phase("connect"):
+            self.transport, self.protocol = await asyncio.wait_for(
+                loop.create_connection(SMTPClientProtocol, self.host, self.port,
+                                       happy_eyeballs_delay=self.connect_stagger),
+                self.deadline.timeout()
+            )
+            
+            code, message = await self.read_reply()
+            if code != 220:
+                raise smtplib.SMTPConnectError(code, message)
+        
+        with self.deadline.phase("ehlo"):
+            await self.ehlo()
+        
+        # Try to use STARTTLS if available (and allowed by the TLS policy).
+        # asyncio cannot offer a TLS session to resume, so every handshake
+        # here is a full one.
+        offered = "starttls" in self.extensions
+        use_tls = offered
+        if self.capabilities:
+            use_tls = self.capabilities.should_starttls(self.mx, offered)
+        if use_tls:
+            with self.deadline.phase("starttls"):
+                code, message = await self.command("STARTTLS")
+                if code != 220:
+                    raise smtplib.SMTPResponseException(code, message)
+                try:
+                    self.transport = await asyncio.wait_for(
+                        loop.start_tls(self.transport, self.protocol, self.tls_context, server_hostname=self.host),
+                        self.deadline.timeout()
+                    )
+                except (ssl.SSLError, ConnectionResetError):
+                    if self.capabilities:
+                        self.capabilities.record_tls(self.mx, TLS_FAILED)
+                    raise
+                if self.transcript is not None:
+                    ssl_object = self.transport.get_extra_info("ssl_object")
+                    self.transcript.note(f"TLS established ({ssl_object.version() if ssl_object else 'unknown'})")
+            with self.deadline.phase("ehlo"):
+                await self.ehlo()
+        
+        if self.capabilities:
+            self.capabilities.record_ehlo(self.mx, self.extensions)
+            self.capabilities.record_tls(self.mx, TLS_OK if use_tls else
+                                         TLS_SKIPPED if offered else TLS_NOT_OFFERED)
+    
+    async def ehlo(self) -> None:
+        """Send EHLO and record the advertised extensions."""
+        code, message = await self.command(f"EHLO {self.local_hostname}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, message)
+        
+        self.extensions = {}
+        for line in message.decode('utf-8', errors='ignore').splitlines()[1:]:
+            keyword, _, params = line.partition(' ')
+            self.extensions[keyword.lower()] = params
+    
+    async def read_reply(self) -> Tuple[int, bytes]:
+        """
+        Read one (possibly multi-line) reply.
+        
+        Returns:
+            Tuple[int, bytes]: Reply code and text, lines joined by newlines
+        """
+        lines = []
+        while True:
+            line = await self._read_line()
+            code, separator, text = line[:3], line[3:4], line[4:]
+            if not code.isdigit():
+                raise smtplib.SMTPResponseException(-1, b"Malformed reply: " + line)
+            lines.append(text)
+            if separator != b"-":
+                if self.transcript is not None:
+                    self.transcript.reply(int(code), b"\n".join(lines))
+                return int(code), b"\n".join(lines)
+    
+    async def _read_line(self) -> bytes:
+        """Read one CRLF-terminated line from the server."""
+        protocol = self.protocol
+        while True:
+            end = protocol.buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(protocol.buffer[:end + 1])
+                del protocol.buffer[:end + 1]
+                return line.rstrip(b"\r\n")
+            if protocol.closed:
+                raise smtplib.SMTPServerDisconnected(f"Connection to {self.host} closed")
+            protocol.data_event.clear()
+            await asyncio.wait_for(protocol.data_event.wait(), self.deadline.timeout())
+    
+    def _write(self, data: str) -> None:
+        """Send CRLF-terminated commands, recording them in the transcript."""
+        if self.transcript is not None:
+            self.transcript.sent(data)
+        self.transport.write(data.encode('utf-8'))
+    
+    async def command(self, line: str) -> Tuple[int, bytes]:
+        """
+        Send a command and read its reply.
+        
+        Args:
+            line: The command without the trailing CRLF
+        
+        Returns:
+            Tuple[int, bytes]: Reply code and text
+        """
+        if self.transport is None or self.transport.is_closing():
+            raise smtplib.SMTPServerDisconnected(f"Not connected to {self.host}")
+        self._write(line + "\r\n")
+        return await self.read_reply()
+    
+    async def probe(self, sender_email: str, emails: List[str]) -> List[Tuple[int, bytes]]:
+        """
+        Check recipients with RCPT TO in one transaction.
+        
+        On a reused session the previous transaction is reset with RSET
+        first. If the server advertises PIPELINING, RSET, MAIL FROM and
+        every RCPT TO are sent at once and the replies read afterwards
+        (RFC 2920).
+        
+        Args:
+            sender_email: Address used in MAIL FROM
+            emails: The recipients to check
+        
+        Returns:
+            List[Tuple[int, bytes]]: The RCPT TO reply for each recipient
+        """
+        if "pipelining" in self.extensions:
+            commands = ["RSET"] if self.in_transaction else []
+            commands.append(f"MAIL FROM:<{sender_email}>")
+            commands.extend(f"RCPT TO:<{email}>" for email in emails)
+            
+            # Replies come back in command order: RSET and MAIL FROM first
+            with self.deadline.phase("mail"):
+                self._write("".join(f"{command}\r\n" for command in commands))
+                self.in_transaction = True
+                leading = [await self.read_reply() for _ in range(len(commands) - len(emails))]
+            # Each reply gets the RCPT limit, not the whole batch
+            replies = []
+            for _ in emails:
+                with self.deadline.phase("rcpt"):
+                    replies.append(await self.read_reply())
+            self.recipients += len(emails)
+            self.last_used = time.monotonic()
+            code, message = leading[-1]
+            if code != 250:
+                return [SenderRefusedReply((code, message))] * len(emails)
+            return replies
+        
+        with self.deadline.phase("mail"):
+            if self.in_transaction:
+                await self.command("RSET")
+                self.in_transaction = False
+            code, message = await self.command(f"MAIL FROM:<{sender_email}>")
+            self.in_transaction = True
+        if code != 250:
+            # The sender was refused; report it as every recipient's reply
+            return [SenderRefusedReply((code, message))] * len(emails)
+        
+        replies = []
+        for email in emails:
+            # Each recipient gets the RCPT limit, not the whole batch
+            with self.deadline.phase("rcpt"):
+                replies.append(await self.command(f"RCPT TO:<{email}>"))
+            self.recipients += 1
+        self.last_used = time.monotonic()
+        return replies
+    
+    async def close(self) -> None:
+        """Close the connection politely, ignoring errors."""
+        if self.transport is None:
+            return
+        try:
+            if not self.transport.is_closing():
+                self._write("QUIT\r\n")
+        except Exception:
+            pass
+        finally:
+            self.transport.close()
+            self.transport = None
+
+class AsyncSMTPEngine:
+    """
+    SMTP probe engine running many sessions concurrently on one event loop.
+    
+    The loop runs in a daemon thread, so blocking callers (threads, the
+    multi-terminal workers) can submit checks and thousands of them wait on
+    remote servers at once without a thread each.
+    """
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the engine.
+        
+        At most async_smtp_max_sessions connections are in use at once, and
+        at most async_smtp_per_host_limit to any one MX host, since servers
+        throttle or block clients that open many parallel connections.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.max_sessions = self.settings_model.get_int("async_smtp_max_sessions", 1000)
+        self.per_host_limit = self.settings_model.get_int("async_smtp_per_host_limit", 5)
+        
+        # Sessions are reused like the sync pool's
+        self.max_recipients = self.settings_model.get_int("smtp_session_max_recipients", 50)
+        self.idle_timeout = self.settings_model.get_float("smtp_session_idle_timeout", 30.0)
+        
+        # Resolved once; getfqdn() blocks and would stall the loop
+        self.local_hostname = socket.getfqdn()
+        
+        # Per-phase timeouts and the overall deadline of each check
+        self.deadlines = SMTPDeadlineModel(settings_model)
+        
+        # Race each host's AAAA and A addresses like the sync path does
+        self.connect_stagger = None
+        if self.settings_model.is_enabled("smtp_connection_racing"):
+            self.connect_stagger = self.settings_model.get_float("smtp_connect_stagger", 0.25)
+        
+        # Set by SMTPModel (set_rate_limiter, its MX health scoreboard and
+        # its transcript buffer)
+        self.rate_limiter = None
+        self.mx_health = None
+        self.transcripts = None
+        
+        # EHLO capabilities, TLS policy and the TLS context for STARTTLS;
+        # SMTPModel replaces it with its session pool's, so both engines
+        # share one cache and one context
+        self.capabilities = MXCapabilityModel(settings_model)
+        
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        
+        # Created on the loop thread
+        self.session_semaphore: Optional[asyncio.Semaphore] = None
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.idle_clients: Dict[str, List[AsyncSMTPClient]] = {}
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the event loop thread if it is not running."""
+        with self.lock:
+            if self.loop is None or not self.thread.is_alive():
+                self.loop = asyncio.new_event_loop()
+                self.host_semaphores = {}
+                self.idle_clients = {}
+                self.session_semaphore = None
+                self.thread = threading.Thread(
+                    target=self.loop.run_forever, name="async-smtp", daemon=True
+                )
+                self.thread.start()
+            return self.loop
+    
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        """Get the connection limit of an MX host (called on the loop thread)."""
+        key = host.lower()
+        semaphore = self.host_semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self.host_semaphores[key] = semaphore
+        return semaphore
+    
+    def _checkout(self, host: str) -> Optional[AsyncSMTPClient]:
+        """
+        Take an idle session to an MX host, if one is still usable (called on the loop thread).
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            Optional[AsyncSMTPClient]: The session, or None if a new one is needed
+        """
+        idle = self.idle_clients.get(host.lower())
+        now = time.monotonic()
+        while idle:
+            client = idle.pop()
+            if (client.is_idle_usable and client.recipients < self.max_recipients
+                    and now - client.last_used < self.idle_timeout):
+                return client
+            self.loop.create_task(client.close())
+        return None
+    
+    def _checkin(self, host: str, client: AsyncSMTPClient) -> None:
+        """
+        Keep a session open for the next probe of the same MX host (called on the loop thread).
+        
+        Args:
+            host: The MX host
+            client: The session, its last transaction complete
+        """
+        client.transcript = None
+        self.idle_clients.setdefault(host.lower(), []).append(client)
+    
+    async def probe(self, host: str, emails: List[str], sender_email: str,
+                    timeout: float, deadline: Optional[ProbeDeadline] = None) -> List[Tuple[int, bytes]]:
+        """
+        Check recipients in one transaction on a session to an MX host.
+        
+        Like the sync session pool, an idle session to the host is reused
+        (after RSET) until it has checked smtp_session_max_recipients
+        addresses or sat idle for smtp_session_idle_timeout seconds. A
+        reused session the server has dropped is replaced once.
+        
+        Args:
+            host: The MX host
+            emails: The recipients to check
+            sender_email: Address used in MAIL FROM
+            timeout: Timeout in seconds for each network operation
+            deadline: Time budget of the check
+        
+        Returns:
+            List[Tuple[int, bytes]]: The RCPT TO reply for each recipient
+        """
+        if self.session_semaphore is None:
+            self.session_semaphore = asyncio.Semaphore(self.max_sessions)
+        
+        # Wait for the host's budget, a token per recipient, before taking a
+        # connection slot
+        if self.rate_limiter:
+            wait_time = self.rate_limiter.reserve(RateLimiterModel.host_key(host), len(emails))
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+        
+        async with self.session_semaphore, self._host_semaphore(host):
+            transcript = self.transcripts.begin(host) if self.transcripts else None
+            client = self._checkout(host)
+            error = None
+            try:
+                if client is not None:
+                    client.deadline = deadline or ProbeDeadline.uniform(timeout)
+                    client.transcript = transcript
+                    if transcript is not None:
+                        transcript.note(f"reusing session ({client.recipients} recipients checked)")
+                    try:
+                        replies = await client.probe(sender_email, emails)
+                    except (smtplib.SMTPServerDisconnected, ConnectionError):
+                        # Dropped by the server while idle; start over once
+                        await client.close()
+                        client = None
+                if client is None:
+                    client = AsyncSMTPClient(host, timeout, self.local_hostname, self.capabilities.tls_context,
+                                             self.connect_stagger, deadline, self.capabilities, transcript)
+                    await client.connect()
+                    replies = await client.probe(sender_email, emails)
+                
+                self._checkin(host, client)
+                client = None
+                return replies
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                if client is not None:
+                    await client.close()
+                if transcript is not None:
+                    self.transcripts.finish(transcript, error)
+    
+    async def verify(self, email: str, mx_servers: List[str],
+                     sender_email: str = "verify@example.com",
+                     timeout: int = 10,
+                     catch_all_probe: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Verify email existence by connecting to the SMTP server.
+        
+        Behaves like SMTPModel.verify_smtp: MX servers are tried in order
+        within the same per-phase timeouts and overall deadline, temporary
+        failures set "temporary" in the result, and the result has the same
+        keys.
+        
+        Args:
+            email: The email address to verify
+            mx_servers: List of MX servers to try
+            sender_email: The sender email address to use
+            timeout: Connection timeout in seconds
+            catch_all_probe: Address that should not exist; if given it is
+                checked with an extra RCPT TO in the same transaction and
+                the result gets an "is_catch_all" entry
+        
+        Returns:
+            Dict[str, Any]: Result of the verification
+        """
+        results = await self.verify_batch([email], mx_servers, sender_email, timeout, catch_all_probe)
+        return results[email]
+    
+    async def verify_batch(self, emails: List[str], mx_servers: List[str],
+                           sender_email: str = "verify@example.com",
+                           timeout: int = 10,
+                           catch_all_probe: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Verify several addresses on one domain in a single SMTP transaction.
+        
+        Behaves like SMTPModel.verify_smtp_batch: all recipients go into one
+        transaction per MX host and addresses a host does not settle are
+        tried on the next one.
+        
+        Args:
+            emails: The email addresses to verify
+            mx_servers: List of MX servers to try
+            sender_email: The sender email address to use
+            timeout: Connection timeout in seconds
+            catch_all_probe: Address that should not exist; if given it is
+                checked with an extra RCPT TO in the same transaction and
+                the results get an "is_catch_all" entry
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Result of the verification per email
+        """
+        results = {
+            email: {
+                "is_deliverable": False,
+                "smtp_check": False,
+                "reason": None,
+                "mx_used": None
+            }
+            for email in emails
+        }
+        
+        if not mx_servers:
+            for result in results.values():
+                result["reason"] = "No MX records found"
+            return results
+        
+        ordered_servers = self.mx_health.order(mx_servers) if self.mx_health else mx_servers
+        if not ordered_servers:
+            # Every host failed repeatedly; don't spend a timeout on them
+            for result in results.values():
+                result["temporary"] = True
+                result["reason"] = "All MX servers are failing (circuit open)"
+            return results
+        
+        # Hosts known to fail a required TLS policy are not connected to
+        if self.capabilities:
+            refusals = [self.capabilities.policy_refusal(mx) for mx in ordered_servers]
+            if all(refusals):
+                for result in results.values():
+                    result["reason"] = refusals[0]
+                return results
+            ordered_servers = [mx for mx, refusal in zip(ordered_servers, refusals) if not refusal]
+        
+        # The domain's budget is charged per recipient as the batch goes
+        # out, outside its deadline
+        if self.rate_limiter:
+            domain = emails[0].rpartition('@')[2]
+            wait_time = self.rate_limiter.reserve(domain, len(emails) + (1 if catch_all_probe else 0))
+            if wait_time > 0:
+                logger.info(f"SMTP verification rate limited for {domain}, waiting {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+        
+        # The budget grows with the batch, so slow but answering hosts finish it
+        deadline = self.deadlines.start(timeout, len(emails) + (1 if catch_all_probe else 0))
+        pending = list(emails)
+        for mx in ordered_servers:
+            if deadline.expired:
+                # Slow hosts must not stall the check; retry it later
+                logger.warning(f"SMTP probe deadline of {deadline.total:.0f}s exceeded before trying {mx}")
+                for email in pending:
+                    results[email]["temporary"] = True
+                    results[email]["reason"] = f"SMTP probe deadline of {deadline.total:.0f}s exceeded"
+                break
+            
+            try:
+                recipients = pending + [catch_all_probe] if catch_all_probe else pending
+                start_time = time.monotonic()
+                try:
+                    replies = await self.probe(mx, recipients, sender_email, timeout, deadline)
+                except Exception as e:
+                    if self.mx_health and not is_address_family_error(e):
+                        self.mx_health.record_failure(mx, str(e) or type(e).__name__)
+                    raise
+                if self.mx_health:
+                    self.mx_health.record_success(mx, time.monotonic() - start_time)
+                
+                is_catch_all = None
+                if catch_all_probe:
+                    # A server accepting a random address accepts everything;
+                    # blocks and temporary failures leave the question open
+                    is_catch_all = catch_all_verdict(replies[-1])
+                
+                unsettled = []
+                for email, (code, message) in zip(pending, replies):
+                    result = results[email]
+                    result["mx_used"] = mx
+                    if is_catch_all is not None:
+                        result["is_catch_all"] = is_catch_all
+                    if not apply_rcpt_reply(result, code, message):
+                        unsettled.append(email)
+                
+                pending = unsettled
+                if not pending:
+                    break
+            
+            except (asyncio.TimeoutError, socket.timeout, ConnectionRefusedError) as e:
+                # Retried later from the deferred queue instead of waiting here
+                error = str(e) or "timed out"
+                logger.warning(f"Network error with {mx}: {error}")
+                for email in pending:
+                    results[email]["temporary"] = True
+                    if not results[email]["reason"]:
+                        results[email]["reason"] = f"Network error with {mx}: {error}"
+            
+            except (OSError, smtplib.SMTPException) as e:
+                logger.debug(f"SMTP error with {mx}: {str(e)}")
+                # Continue to next MX server
+        
+        for email in pending:
+            if not results[email]["reason"]:
+                results[email]["reason"] = "All MX servers rejected connection or verification"
+        
+        phases = deadline.elapsed()
+        for result in results.values():
+            result["phases"] = dict(phases)
+        return results
+    
+    def verify_smtp(self, email: str, mx_servers: List[str],
+                    sender_email: str = "verify@example.com",
+                    timeout: int = 10,
+                    catch_all_probe: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Blocking wrapper around verify() for threaded callers.
+        
+        Args:
+            email: The email address to verify
+            mx_servers: List of MX servers to try
+            sender_email: The sender email address to use
+            timeout: Connection timeout in seconds
+            catch_all_probe: Address that should not exist, checked alongside
+        
+        Returns:
+            Dict[str, Any]: Result of the verification
+        """
+        return self.verify_all([([email], mx_servers, catch_all_probe)], sender_email, timeout)[0][email]
+    
+    def verify_all(self, checks: List[Tuple[List[str], List[str], Optional[str]]],
+                   sender_email: str = "verify@example.com",
+                   timeout: int = 10) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Run many checks concurrently and wait for all of them.
+        
+        Args:
+            checks: (emails, mx_servers, catch_all_probe) per check, the
+                emails of a check going into one transaction
+            sender_email: The sender email address to use
+            timeout: Connection timeout in seconds
+        
+        Returns:
+            List[Dict[str, Dict[str, Any]]]: Result per email of each check, in order
+        """
+        if not checks:
+            return []
+        
+        async def run_all():
+            return await asyncio.gather(*[
+                self.verify_batch(emails, mx_servers, sender_email, timeout, catch_all_probe)
+                for emails, mx_servers, catch_all_probe in checks
+            ])
+        
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(run_all(), loop).result()
+    
+    def close_sessions(self) -> None:
+        """Close the idle sessions kept for reuse."""
+        with self.lock:
+            loop = self.loop
+        if loop is None or not loop.is_running():
+            return
+        
+        async def close_idle():
+            clients = [client for idle in self.idle_clients.values() for client in idle]
+            self.idle_clients.clear()
+            await asyncio.gather(*[client.close() for client in clients], return_exceptions=True)
+        
+        try:
+            asyncio.run_coroutine_threadsafe(close_idle(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing idle SMTP sessions: {str(e)}")
+    
+    def close(self) -> None:
+        """Close the idle sessions and stop the event loop thread."""
+        self.close_sessions()
+        with self.lock:
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+        
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
@@ -0,0 +1,267 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+from models.common import EmailVerificationResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class DomainPlan:
+    """Domain-level checks shared by every address on a domain in a batch."""
+    domain: str
+    emails: List[str] = field(default_factory=list)
+    mx_records: List[str] = field(default_factory=list)
+    verdict: Optional[Dict[str, Any]] = None  # category, reason, provider, details
+    provider: Optional[str] = None
+    login_url: Optional[str] = None
+    sequence: List[str] = field(default_factory=list)
+    catch_all: Optional[bool] = None
+    resolved: bool = True
+    # SMTP results checked ahead for the whole domain, taken by verify_email
+    smtp_results: Dict[str, EmailVerificationResult] = field(default_factory=dict, repr=False)
+    smtp_seconds: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    def take_smtp_result(self, email: str) -> Optional[EmailVerificationResult]:
+        """
+        Take the SMTP result checked ahead for a member address, if any.
+        
+        Args:
+            email: The email address
+        
+        Returns:
+            Optional[EmailVerificationResult]: The result, or None if the
+            address was not checked ahead
+        """
+        with self.lock:
+            return self.smtp_results.pop(email, None)
+    
+    def apply_verdict(self, email: str) -> EmailVerificationResult:
+        """
+        Build the result for a member address from the domain verdict.
+        
+        Args:
+            email: The email address
+        
+        Returns:
+            EmailVerificationResult: The verification result
+        """
+        return EmailVerificationResult(email=email, **self.verdict)
+
+class BatchPlannerModel:
+    """Model for grouping a batch by domain and running domain-level checks once."""
+    
+    def __init__(self, settings_model, initial_validation_model, sequence_model, smtp_model):
+        """
+        Initialize the batch planner.
+        
+        Args:
+            settings_model: The settings model instance
+            initial_validation_model: The initial validation model instance
+            sequence_model: The sequence model instance
+            smtp_model: The SMTP model instance
+        """
+        self.settings_model = settings_model
+        self.initial_validation_model = initial_validation_model
+        self.sequence_model = sequence_model
+        self.smtp_model = smtp_model
+    
+    def plan(self, emails: List[str], cached_only: bool = False) -> Dict[str, DomainPlan]:
+        """
+        Group emails by domain and run the domain-level checks for each domain.
+        
+        Blacklist, whitelist, MX lookup (concurrently for all domains),
+        provider identification and the verification sequence are determined
+        once per domain. Domains with a verdict need no per-mailbox work.
+        Unless cached_only, the SMTP egress probe runs alongside the MX
+        lookups and is waited for before sequencing, so a blocked port 25
+        takes SMTP out of the sequences.
+        
+        Args:
+            emails: Syntactically valid email addresses
+            cached_only: Use only cached MX records and never query DNS;
+                domains missing from the cache are marked as not resolved
+                and planned as custom domains
+        
+        Returns:
+            Dict[str, DomainPlan]: Plan for each (lowercase) domain
+        """
+        plans: Dict[str, DomainPlan] = {}
+        for email in emails:
+            domain = email.split('@')[-1].lower()
+            if domain not in plans:
+                plans[domain] = DomainPlan(domain=domain)
+            plans[domain].emails.append(email)
+        
+        if cached_only:
+            mx_map = {}
+            for domain, plan in plans.items():
+                mx_records = self.initial_validation_model.get_cached_mx_records(domain)
+                plan.resolved = mx_records is not None
+                if plan.resolved:
+                    mx_map[domain] = mx_records
+        else:
+            # The egress probe runs while the MX records are resolved
+            self.smtp_model.egress_probe.start()
+            # Resolve MX records for every distinct domain concurrently
+            mx_map = self.initial_validation_model.prefetch_mx_records(plans.keys())
+            # Sequences depend on whether port 25 is blocked (waits a bounded time)
+            self.smtp_model.egress_probe.is_available()
+        
+        for domain, plan in plans.items():
+            plan.mx_records = mx_map.get(domain, [])
+            plan.verdict = self.initial_validation_model.validate_domain(
+                domain, plan.mx_records if plan.resolved else None, resolve=not cached_only
+            )
+            if plan.verdict:
+                continue
+            
+            plan.provider, plan.login_url = self.initial_validation_model.identify_provider(
+                plan.emails[0], plan.mx_records
+            )
+            plan.sequence = self.sequence_model.get_verification_sequence(plan.provider)
+        
+        decided = sum(len(plan.emails) for plan in plans.values() if plan.verdict)
+        logger.info(f"Planned {len(emails)} emails across {len(plans)} domains; "
+                    f"{decided} decided by domain-level checks")
+        return plans
+    
+    def prefetch_smtp(self, plans: Dict[str, DomainPlan], emails: List[str]) -> int:
+        """
+        Check the addresses of SMTP-first domains over shared SMTP sessions.
+        
+        Each such domain's addresses go through SMTPModel.verify_many, so
+        they share a connection and are sent as multi-recipient (pipelined)
+        transactions instead of one session per address. Up to
+        smtp_prefetch_concurrency domains are checked at once. The results
+        are kept on the plans for verify_email to take in its SMTP step.
+        
+        Args:
+            plans: Plans from plan()
+            emails: The addresses about to be verified
+        
+        Returns:
+            int: Number of addresses checked
+        """
+        groups: Dict[str, List[str]] = {}
+        for email in emails:
+            domain = email.split('@')[-1].lower()
+            plan = plans[domain]
+            if plan.verdict or not plan.mx_records or plan.sequence[:1] != ["smtp"]:
+                continue
+            groups.setdefault(domain, []).append(email)
+        
+        if not groups:
+            return 0
+        
+        def check(domain: str) -> None:
+            plan, batch = plans[domain], groups[domain]
+            start_time = time.monotonic()
+            try:
+                results = self.smtp_model.verify_many(domain, batch, plan.mx_records, plan.catch_all)
+            except Exception as e:
+                # The addresses are checked one by one instead
+                logger.warning(f"Batched SMTP check of {domain} failed: {str(e)}")
+                return
+            for result in results.values():
+                self.record_catch_all(plan, result)
+            with plan.lock:
+                plan.smtp_results.update(results)
+                plan.smtp_seconds = (time.monotonic() - start_time) / len(batch)
+        
+        max_workers = max(1, min(self.settings_model.get_int("smtp_prefetch_concurrency", 8), len(groups)))
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smtp-prefetch") as executor:
+            list(executor.map(check, groups))
+        
+        checked = sum(len(batch) for batch in groups.values())
+        logger.info(f"Checked {checked} emails on {len(groups)} domains over shared SMTP sessions "
+                    f"in {time.monotonic() - start_time:.2f}s")
+        return checked
+    
+    def record_catch_all(self, plan: DomainPlan, result: Optional[EmailVerificationResult]) -> None:
+        """
+        Remember the catch-all status an SMTP check found for a planned domain.
+        
+        The check probes catch-all with an extra RCPT TO in its own
+        transaction; once a probe has answered, later addresses on the
+        domain are checked without one.
+        
+        Args:
+            plan: The domain plan
+            result: The SMTP verification result of an address on the domain
+        """
+        if result is None or not result.details or result.details.get("is_catch_all") is None:
+            return
+        with plan.lock:
+            if plan.catch_all is None:
+                plan.catch_all = result.details["is_catch_all"]
+    
+    def explain(self, plans: Dict[str, DomainPlan], method_stats: Dict[str, Dict[str, Any]],
+                workers: int = 1, delay_seconds: float = 0.0) -> Dict[str, Any]:
+        """
+        Summarize the work a set of domain plans would cause, without doing it.
+        
+        Each method in a sequence runs only if the methods before it gave no
+        definitive result, so expected method runs and time per address are
+        derived from each method's observed latency and definitive-result
+        rate.
+        
+        Args:
+            plans: Domain plans from plan()
+            method_stats: Per-method avg_seconds and definitive_rate
+            workers: Number of addresses verified in parallel
+            delay_seconds: Pause after each address verification
+        
+        Returns:
+            Dict[str, Any]: Domain verdict, provider, sequence and method
+            counts, and wall-clock and browser launch estimates
+        """
+        verdicts: Dict[str, int] = {}
+        providers: Dict[str, int] = {}
+        sequences: Dict[str, List[str]] = {}
+        method_runs: Dict[str, float] = {}
+        work_seconds = 0.0
+        pending = 0
+        
+        for plan in plans.values():
+            count = len(plan.emails)
+            if plan.verdict:
+                reason = plan.verdict["reason"]
+                verdicts[reason] = verdicts.get(reason, 0) + count
+                continue
+            
+            pending += count
+            providers[plan.provider] = providers.get(plan.provider, 0) + count
+            sequences[plan.provider] = plan.sequence
+            
+            reach = 1.0
+            for method in plan.sequence:
+                stats = method_stats.get(method, {"avg_seconds": 0.0, "definitive_rate": 1.0})
+                method_runs[method] = method_runs.get(method, 0.0) + reach * count
+                work_seconds += reach * count * stats["avg_seconds"]
+                reach *= 1 - stats["definitive_rate"]
+            
+            if "smtp" in plan.sequence:
+                # One catch-all probe per domain
+                work_seconds += method_stats.get("smtp", {}).get("avg_seconds", 0.0)
+        
+        workers = max(1, workers)
+        wall_clock = (work_seconds + pending * delay_seconds) / workers
+        
+        return {
+            "domains": len(plans),
+            "domains_not_in_dns_cache": sum(1 for plan in plans.values() if not plan.resolved),
+            "domain_verdicts": verdicts,
+            "emails_to_verify": pending,
+            "providers": dict(sorted(providers.items(), key=lambda item: -item[1])),
+            "sequences": sequences,
+            "expected_method_runs": {method: round(runs) for method, runs in method_runs.items()},
+            "method_stats": method_stats,
+            "workers": workers,
+            "estimated_browser_launches": round(method_runs.get("selenium", 0.0)),
+            "estimated_seconds": round(wall_clock, 1)
+        }
@@ -0,0 +1,148 @@
+import os
+import json
+import logging
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+# Rules written to the rules file when it does not exist yet. Addresses on
+# domains without a rule only get whitespace trimmed and the domain lowercased.
+DEFAULT_CANONICALIZATION_RULES = {
+    "default": {
+        "lowercase_local": False,
+        "remove_dots": False,
+        "subaddress_separator": None
+    },
+    "providers": {
+        "gmail.com": {
+            "domains": ["gmail.com", "googlemail.com"],
+            "canonical_domain": "gmail.com",
+            "lowercase_local": True,
+            "remove_dots": True,
+            "subaddress_separator": "+"
+        },
+        "outlook.com": {
+            "domains": ["outlook.com", "hotmail.com", "live.com", "msn.com"],
+            "lowercase_local": True,
+            "remove_dots": False,
+            "subaddress_separator": "+"
+        },
+        "yahoo.com": {
+            "domains": ["yahoo.com", "ymail.com", "rocketmail.com"],
+            "lowercase_local": True,
+            "remove_dots": False,
+            "subaddress_separator": None
+        },
+        "protonmail.com": {
+            "domains": ["protonmail.com", "proton.me", "pm.me"],
+            "lowercase_local": True,
+            "remove_dots": False,
+            "subaddress_separator": "+"
+        },
+        "fastmail.com": {
+            "domains": ["fastmail.com", "fastmail.fm"],
+            "lowercase_local": True,
+            "remove_dots": False,
+            "subaddress_separator": "+"
+        }
+    }
+}
+
+class CanonicalizationModel:
+    """Model for reducing equivalent email addresses to one canonical key."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the canonicalization model.
+        
+        Rules are loaded from a JSON file with a default rule and per-provider
+        rules listing the domains they apply to. A rule can lowercase the
+        local part, remove dots from it, strip a sub-address ("+tag") and map
+        alias domains to one canonical domain.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        self.rules_file = self.settings_model.get(
+            "canonicalization_rules_file", "./settings/canonicalization_rules.json"
+        )
+        
+        self.default_rule: Dict[str, Any] = dict(DEFAULT_CANONICALIZATION_RULES["default"])
+        
+        # Domain -> rule
+        self.domain_rules: Dict[str, Dict[str, Any]] = {}
+        
+        self.load_rules()
+    
+    def _ensure_rules_file(self) -> None:
+        """Create the rules file with the default rules if it doesn't exist."""
+        if os.path.exists(self.rules_file):
+            return
+        
+        directory = os.path.dirname(self.rules_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.rules_file, 'w', encoding='utf-8') as f:
+            json.dump(DEFAULT_CANONICALIZATION_RULES, f, indent=4)
+    
+    def load_rules(self) -> None:
+        """Load the rules file and rebuild the domain index."""
+        try:
+            self._ensure_rules_file()
+            with open(self.rules_file, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading canonicalization rules from {self.rules_file}: {e}")
+            rules = DEFAULT_CANONICALIZATION_RULES
+        
+        self.default_rule = rules.get("default", DEFAULT_CANONICALIZATION_RULES["default"])
+        
+        domain_rules = {}
+        for provider, rule in rules.get("providers", {}).items():
+            for domain in rule.get("domains", [provider]):
+                domain_rules[domain.lower()] = rule
+        self.domain_rules = domain_rules
+    
+    def canonicalize(self, email: str) -> str:
+        """
+        Get the canonical key of an email address.
+        
+        Args:
+            email: The email address as given
+        
+        Returns:
+            str: The canonical address, used as the key for caches and stores
+        """
+        email = email.strip()
+        local_part, at, domain = email.rpartition('@')
+        if not at:
+            return email
+        
+        domain = domain.lower().rstrip('.')
+        rule = self.domain_rules.get(domain, self.default_rule)
+        
+        separator = rule.get("subaddress_separator")
+        if separator and separator in local_part:
+            local_part = local_part.split(separator, 1)[0]
+        if rule.get("remove_dots"):
+            local_part = local_part.replace('.', '')
+        if rule.get("lowercase_local"):
+            local_part = local_part.lower()
+        
+        return f"{local_part}@{rule.get('canonical_domain') or domain}"
+    
+    def group_duplicates(self, emails: List[str]) -> Dict[str, List[str]]:
+        """
+        Group addresses by canonical key, keeping input order.
+        
+        Args:
+            emails: Email addresses as given
+        
+        Returns:
+            Dict[str, List[str]]: Canonical key -> addresses with that key
+        """
+        groups: Dict[str, List[str]] = {}
+        for email in emails:
+            groups.setdefault(self.canonicalize(email), []).append(email)
+        return groups
@@ -0,0 +1,311 @@
+import time
+import errno
+import queue
+import socket
+import logging
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SMTP_PORT = 25
+
+# Error recorded for hosts without any address
+UNRESOLVED_ERROR = "Could not resolve host"
+
+# Error recorded for hosts whose addresses are all in a family this machine
+# cannot reach (e.g. IPv6 without an IPv6 route); not the host's fault
+UNROUTABLE_ERROR = "No route to any address of host"
+
+# Errors from connecting to an address family without a route
+ADDRESS_FAMILY_ERRNOS = {errno.ENETUNREACH, errno.EAFNOSUPPORT, errno.EADDRNOTAVAIL}
+
+def is_address_family_error(error: BaseException) -> bool:
+    """Check if a connection error means the address family is unreachable from here."""
+    return isinstance(error, OSError) and error.errno in ADDRESS_FAMILY_ERRNOS
+
+def split_host(host: str) -> Tuple[str, int]:
+    """Split "host:port" the way smtplib does."""
+    name, _, port = host.rpartition(':')
+    if name and port.isdigit() and ']' not in port:
+        return name, int(port)
+    return host, SMTP_PORT
+
+class RacedConnection:
+    """A connection that won the race: connected and greeted with a 220 banner."""
+    
+    __slots__ = ("host", "address", "sock", "file", "code", "banner")
+    
+    def __init__(self, host: str, address: str, sock: socket.socket, file, code: int, banner: bytes):
+        self.host = host
+        self.address = address
+        self.sock = sock
+        self.file = file
+        self.code = code
+        self.banner = banner
+    
+    def close(self) -> None:
+        """Close the connection, ignoring errors."""
+        try:
+            self.file.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+class ConnectionRacerModel:
+    """Model for racing staggered connection attempts across MX hosts and addresses."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the connection racer.
+        
+        Connection attempts go out in MX preference order, covering every
+        AAAA and A address of each host (alternating families, IPv6 first,
+        as in Happy Eyeballs, RFC 8305). A new attempt starts every
+        smtp_connect_stagger seconds, or as soon as the previous one fails,
+        so a slow or dead primary no longer costs a whole timeout before the
+        next host is tried. The first attempt to receive a 220 banner wins
+        and the others are cancelled.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.stagger = self.settings_model.get_float("smtp_connect_stagger", 0.25)
+        
+        # Set by SMTPModel (set_address_resolver): host name -> IP addresses,
+        # answered from the persistent DNS cache
+        self.resolver: Optional[Callable[[str], List[str]]] = None
+    
+    def _resolve(self, host: str) -> List[Tuple[int, Any]]:
+        """
+        Resolve an MX host to (family, sockaddr) pairs, alternating families.
+        
+        Host names go through the address resolver (the DNS cache) when one
+        is set; getaddrinfo() is the fallback for names it cannot resolve.
+        
+        Args:
+            host: The MX host, optionally as "host:port"
+        
+        Returns:
+            List[Tuple[int, Any]]: Addresses to try, IPv6 first
+        """
+        name, port = split_host(host)
+        by_family: Dict[int, List[Any]] = {socket.AF_INET6: [], socket.AF_INET: []}
+        
+        addresses: List[str] = []
+        if self.resolver is not None and not self._is_ip_literal(name):
+            try:
+                addresses = self.resolver(name)
+            except Exception as e:
+                logger.warning(f"Error resolving {host} through the DNS cache: {e}")
+        
+        if addresses:
+            for address in addresses:
+                if ':' in address:
+                    by_family[socket.AF_INET6].append((address, port, 0, 0))
+                else:
+                    by_family[socket.AF_INET].append((address, port))
+        else:
+            try:
+                infos = socket.getaddrinfo(name, port, type=socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                logger.debug(f"Could not resolve {host}: {e}")
+                return []
+            for family, _, _, _, sockaddr in infos:
+                if family in by_family and sockaddr not in by_family[family]:
+                    by_family[family].append(sockaddr)
+        
+        ipv6, ipv4 = by_family[socket.AF_INET6], by_family[socket.AF_INET]
+        addresses = []
+        for i in range(max(len(ipv6), len(ipv4))):
+            if i < len(ipv6):
+                addresses.append((socket.AF_INET6, ipv6[i]))
+            if i < len(ipv4):
+                addresses.append((socket.AF_INET, ipv4[i]))
+        return addresses
+    
+    @staticmethod
+    def _is_ip_literal(name: str) -> bool:
+        """Check if a host name is an IP address, which needs no resolving."""
+        try:
+            ipaddress.ip_address(name.strip('[]'))
+            return True
+        except ValueError:
+            return False
+    
+    @staticmethod
+    def _read_banner(file) -> Tuple[int, bytes]:
+        """Read the server greeting, which may span several lines."""
+        lines = []
+        while True:
+            line = file.readline(8192)
+            if not line:
+                raise ConnectionResetError("Connection closed before the SMTP banner")
+            lines.append(line[4:].strip(b' \t\r\n'))
+            if line[3:4] != b'-':
+                break
+        try:
+            code = int(line[:3])
+        except ValueError:
+            raise ConnectionError(f"Malformed SMTP banner: {line[:80]!r}")
+        return code, b"\n".join(lines)
+    
+    @staticmethod
+    def _host_error(failures: List[Exception]) -> str:
+        """
+        Pick the error to record for a host all of whose addresses failed.
+        
+        Args:
+            failures: The error of each of the host's attempts
+        
+        Returns:
+            str: The last error not caused by the address family, or
+            UNROUTABLE_ERROR if there is none
+        """
+        for error in reversed(failures):
+            if not is_address_family_error(error):
+                return str(error) or type(error).__name__
+        return UNROUTABLE_ERROR
+    
+    def race(self, hosts: List[str], timeout: float) -> Tuple[Optional[RacedConnection], Dict[str, str]]:
+        """
+        Connect to whichever host and address greets first.
+        
+        Args:
+            hosts: MX hosts in the order they should be tried
+            timeout: Seconds the whole race may take
+        
+        Returns:
+            Tuple[Optional[RacedConnection], Dict[str, str]]: The winning
+            connection (None if every attempt failed) and the error of each
+            host all of whose attempts failed (UNROUTABLE_ERROR if each
+            failed only for its address family)
+        """
+        deadline = time.monotonic() + timeout
+        
+        # Resolve all hosts at once; a slow resolver for one must not delay the others
+        with ThreadPoolExecutor(max_workers=max(1, len(hosts))) as executor:
+            resolved = list(executor.map(self._resolve, hosts))
+        
+        targets = [(host, family, sockaddr)
+                   for host, addresses in zip(hosts, resolved)
+                   for family, sockaddr in addresses]
+        errors = {host: UNRESOLVED_ERROR for host, addresses in zip(hosts, resolved) if not addresses}
+        failures: Dict[str, List[Exception]] = {host: [] for host in hosts}
+        if not targets:
+            return None, errors
+        
+        outcomes: "queue.Queue[Tuple[str, str, Optional[RacedConnection], Optional[Exception]]]" = queue.Queue()
+        sockets: List[socket.socket] = []
+        state = {"done": False}
+        lock = threading.Lock()
+        
+        def attempt(host: str, family: int, sockaddr: Any) -> None:
+            address = sockaddr[0]
+            try:
+                sock = socket.socket(family, socket.SOCK_STREAM)
+            except OSError as e:
+                outcomes.put((host, address, None, e))
+                return
+            with lock:
+                if state["done"]:
+                    sock.close()
+                    return
+                sockets.append(sock)
+            
+            connection = None
+            error = None
+            try:
+                sock.settimeout(max(0.1, deadline - time.monotonic()))
+                sock.connect(sockaddr)
+                file = sock.makefile('rb')
+                code, banner = self._read_banner(file)
+                connection = RacedConnection(host, address, sock, file, code, banner)
+            except Exception as e:
+                error = e
+            
+            with lock:
+                sockets.remove(sock)
+                if state["done"]:
+                    # Lost the race; the winner is already in use
+                    if connection:
+                        connection.close()
+                    else:
+                        sock.close()
+                    return
+                if connection is None:
+                    sock.close()
+                outcomes.put((host, address, connection, error))
+        
+        winner = None
+        started = finished = 0
+        next_start = time.monotonic()
+        while finished < len(targets):
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if started < len(targets) and now >= next_start:
+                threading.Thread(target=attempt, args=targets[started], daemon=True).start()
+                started += 1
+                next_start = now + self.stagger
+            
+            wait = deadline - now
+            if started < len(targets):
+                wait = min(wait, max(0.0, next_start - now))
+            try:
+                host, address, connection, error = outcomes.get(timeout=wait)
+            except queue.Empty:
+                continue
+            finished += 1
+            
+            if connection is not None and connection.code == 220:
+                winner = connection
+                break
+            if connection is not None:
+                error = ConnectionRefusedError(f"SMTP banner {connection.code}: "
+                                               f"{connection.banner.decode('utf-8', errors='ignore')}")
+                connection.close()
+            logger.debug(f"Connection attempt to {host} ({address}) failed: {error}")
+            failures[host].append(error)
+            # Don't wait out the stagger once an attempt has failed
+            next_start = time.monotonic()
+        
+        with lock:
+            state["done"] = True
+            pending = list(sockets)
+        
+        # Wake up attempts still connecting; each closes its own socket
+        for sock in pending:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        while True:
+            try:
+                _, _, connection, _ = outcomes.get_nowait()
+            except queue.Empty:
+                break
+            if connection is not None:
+                connection.close()
+        
+        # A host has failed only once all of its started attempts have; an
+        # AAAA attempt failing at once must not write off a host whose A
+        # address is still connecting. Unstarted addresses were never tried.
+        attempts: Dict[str, int] = {}
+        for host, _, _ in targets[:started]:
+            attempts[host] = attempts.get(host, 0) + 1
+        for host, count in attempts.items():
+            if len(failures[host]) == count:
+                errors[host] = self._host_error(failures[host])
+            elif winner is None:
+                # Still connecting when time ran out
+                errors[host] = "timed out"
+        
+        if winner is not None:
+            errors.pop(winner.host, None)
+            logger.debug(f"Connected to {winner.host} ({winner.address}) after {started} attempt(s)")
+        return winner, errors
@@ -4,7 +4,8 @@ import time
 import random
 import logging
 import sys
-from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import replace
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Callable
 from datetime import datetime
 
 # Import all models
@@ -18,6 +19,12 @@ from models.judgment_model import JudgmentModel
 from models.multi_terminal_model import MultiTerminalModel
 from models.results_model import ResultsModel
 from models.statistics_model import StatisticsModel
+from models.batch_planner_model import BatchPlannerModel, DomainPlan
+from models.canonicalization_model import CanonicalizationModel
+from models.method_stats_model import MethodStatsModel
+from models.rate_limiter_model import RateLimiterModel
+from models.retry_queue_model import RetryQueueModel
+from models.dns_cache_model import MX
 from models.common import EmailVerificationResult, VALID, INVALID, RISKY, CUSTOM
 
 logger = logging.getLogger(__name__)
@@ -38,10 +45,29 @@ class VerificationController:
         self.sequence_model = SequenceModel(self.settings_model)
         self.judgment_model = JudgmentModel(self.settings_model)
         self.multi_terminal_model = MultiTerminalModel(self.settings_model)
-        self.results_model = ResultsModel(self.settings_model)
+        self.canonicalization_model = CanonicalizationModel(self.settings_model)
+        self.results_model = ResultsModel(self.settings_model, self.canonicalization_model)
         self.statistics_model = StatisticsModel(self.settings_model)
-        
-        # Cache for verification results
+        self.method_stats_model = MethodStatsModel(self.settings_model)
+        self.batch_planner_model = BatchPlannerModel(
+            self.settings_model, self.initial_validation_model, self.sequence_model, self.smtp_model
+        )
+        
+        # MX host addresses come from the persistent DNS cache
+        self.smtp_model.set_address_resolver(self.initial_validation_model.get_host_addresses)
+        
+        # Outbound port 25 is probed from the first SMTP check on; while it
+        # is blocked SMTP checks fail fast and SMTP is dropped from the sequences
+        self.sequence_model.set_egress_probe(self.smtp_model.egress_probe)
+        
+        # Token buckets per domain and per MX host replace fixed pauses
+        self.rate_limiter = None
+        if self.settings_model.is_enabled("rate_limit_enabled"):
+            self.rate_limiter = RateLimiterModel(self.settings_model)
+            for model in [self.smtp_model, self.selenium_model, self.api_model, self.multi_terminal_model]:
+                model.set_rate_limiter(self.rate_limiter)
+        
+        # Cache for verification results, keyed by canonical email
         self.result_cache: Dict[str, EmailVerificationResult] = {}
         
         # Verification history tracking
@@ -77,14 +103,23 @@ class VerificationController:
         
         return None
     
-    def verify_email(self, email: str, job_id: Optional[str] = None) -> EmailVerificationResult:
+    def verify_email(self, email: str, job_id: Optional[str] = None,
+                     mx_records: Optional[List[str]] = None,
+                     plan: Optional[DomainPlan] = None,
+                     defer_temporary: bool = False) -> EmailVerificationResult:
         """
         Verify an email address using the appropriate verification sequence.
         
         Args:
             email: The email address to verify
             job_id: Optional job ID for batch verification
-            
+            mx_records: Already resolved MX records for the domain, if any
+            plan: Domain plan from the batch planner; when given, the
+                domain-level checks it already ran are not repeated
+            defer_temporary: Return as soon as SMTP fails temporarily, with
+                "deferred" set in the details and nothing saved, so the
+                caller can retry the address later
+        
         Returns:
             EmailVerificationResult: The verification result
         """
@@ -113,29 +148,39 @@ class VerificationController:
         
         # Check cache next
         with self.lock:
-            if email in self.result_cache:
-                return self.result_cache[email]
-        
-        # Step 1: Initial validation
-        validation_result = self.initial_validation_model.validate_email(email)
-        if validation_result:
-            self.add_to_history(email, f"Initial validation: {validation_result.category} - {validation_result.reason}")
-            with self.lock:
-                self.result_cache[email] = validation_result
-            self.results_model.save_result(validation_result, job_id)
-            self.save_history(email, validation_result.category)
-            return validation_result
-        
-        # Extract domain and get MX records
-        _, domain = email.split('@')
-        mx_records = self.initial_validation_model.get_mx_records(domain)
-        
-        # Step 2: Identify provider and determine verification sequence
-        provider, login_url = self.initial_validation_model.identify_provider(email)
-        self.add_to_history(email, f"Provider identified: {provider}")
+            cached = self.result_cache.get(self.canonicalization_model.canonicalize(email))
+            if cached:
+                return cached if cached.email == email else replace(cached, email=email)
+        
+        if plan is not None:
+            # Steps 1-2 were run once for the whole domain by the batch planner
+            mx_records = plan.mx_records
+            provider, login_url = plan.provider, plan.login_url
+            self.add_to_history(email, f"Provider identified: {provider}")
+            verification_sequence = plan.sequence
+        else:
+            # Step 1: Initial validation
+            validation_result = self.initial_validation_model.validate_email(email, mx_records)
+            if validation_result:
+                self.add_to_history(email, f"Initial validation: {validation_result.category} - {validation_result.reason}")
+                with self.lock:
+                    self.result_cache[self.canonicalization_model.canonicalize(email)] = validation_result
+                self.results_model.save_result(validation_result, job_id)
+                self.save_history(email, validation_result.category)
+                return validation_result
+            
+            # Extract domain and get MX records
+            _, domain = email.split('@')
+            if mx_records is None:
+                mx_records = self.initial_validation_model.get_mx_records(domain)
+            
+            # Step 2: Identify provider and determine verification sequence
+            provider, login_url = self.initial_validation_model.identify_provider(email, mx_records)
+            self.add_to_history(email, f"Provider identified: {provider}")
+            
+            verification_sequence = self.sequence_model.get_verification_sequence(provider)
         
         # Step 3: Execute the appropriate verification sequence
-        verification_sequence = self.sequence_model.get_verification_sequence(provider)
         
         # Log the verification sequence
         if provider in ['outlook.com', 'hotmail.com', 'live.com', 'microsoft.com', 'office365.com']:
@@ -148,6 +193,7 @@ class VerificationController:
         # Execute each verification method in the sequence
         results = []
         for method_name in verification_sequence:
+            method_start = time.monotonic()
             if method_name == "api":
                 # API verification
                 if provider in ['outlook.com', 'hotmail.com', 'live.com', 'microsoft.com', 'office365.com']:
@@ -190,7 +236,16 @@ class VerificationController:
             elif method_name == "smtp":
                 # SMTP verification
                 self.add_to_history(email, "SMTP verification started")
-                result = self.smtp_model.verify_email_smtp(email, mx_records)
+                result = plan.take_smtp_result(email) if plan else None
+                if result:
+                    # Checked ahead with the rest of the domain's addresses
+                    method_start = time.monotonic() - plan.smtp_seconds
+                else:
+                    # Unknown catch-all status is probed within this check's transaction
+                    is_catch_all = plan.catch_all if plan else None
+                    result = self.smtp_model.verify_email_smtp(email, mx_records, is_catch_all)
+                    if plan:
+                        self.batch_planner_model.record_catch_all(plan, result)
                 if result:
                     self.add_to_history(email, f"SMTP verification result: {result.category} ({result.reason})")
             
@@ -198,10 +253,29 @@ class VerificationController:
                 self.add_to_history(email, f"Unknown verification method: {method_name}")
                 continue
             
+            # Valid/invalid, or a reply that settles the mailbox question
+            # (e.g. mailbox full), ends the sequence
+            definitive = bool(result and (
+                result.category in [VALID, INVALID] or (result.details and result.details.get("definitive"))
+            ))
+            
+            # Observed latencies feed the dry-run estimates
+            self.method_stats_model.record(method_name, time.monotonic() - method_start, definitive)
+            
+            if result and result.details and result.details.get("fallback_avoided"):
+                self.method_stats_model.increment("smtp_fallbacks_avoided")
+                self.add_to_history(email, "SMTP reply was conclusive - skipping remaining methods")
+            
+            # Greylisting and the like: the caller retries later for a verdict
+            if defer_temporary and result and result.details and result.details.get("temporary"):
+                result.details["deferred"] = True
+                self.add_to_history(email, "Temporary SMTP failure - deferred for retry")
+                return result
+            
             # If we got a result and it's definitive, return it
-            if result and result.category in [VALID, INVALID]:
+            if definitive:
                 with self.lock:
-                    self.result_cache[email] = result
+                    self.result_cache[self.canonicalization_model.canonicalize(email)] = result
                 self.results_model.save_result(result, job_id)
                 self.save_history(email, result.category)
                 return result
@@ -216,7 +290,7 @@ class VerificationController:
         self.add_to_history(email, f"Final judgment: {final_result.category} - \"{final_result.reason}\"")
         
         with self.lock:
-            self.result_cache[email] = final_result
+            self.result_cache[self.canonicalization_model.canonicalize(email)] = final_result
         self.results_model.save_result(final_result, job_id)
         self.save_history(email, final_result.category)
         
@@ -228,21 +302,325 @@ class VerificationController:
         
         Args:
             emails: List of emails to verify
+        
+        Returns:
+            Dict[str, EmailVerificationResult]: Dictionary of verification results
+        """
+        # Equivalent addresses (case, whitespace, provider aliases) are verified once
+        groups = self.canonicalization_model.group_duplicates(emails)
+        if len(groups) < len(emails):
+            logger.info(f"Canonicalization merged {len(emails)} emails into {len(groups)} unique addresses")
+        representatives = {key: members[0].strip() for key, members in groups.items()}
+        
+        verified = {}
+        
+        # Reject malformed addresses before any network work is scheduled
+        accepted = []
+        for email in representatives.values():
+            syntax_error = self.initial_validation_model.check_syntax(email)
+            if syntax_error is None:
+                accepted.append(email)
+            else:
+                verified[email] = self._reject_syntax(email, syntax_error)
+        
+        if verified:
+            logger.info(f"Syntax prefilter rejected {len(verified)} of {len(representatives)} emails")
+        
+        # Run blacklist, whitelist, MX and provider checks once per domain
+        plans = self.batch_planner_model.plan(accepted)
+        
+        # Temporary SMTP and DNS failures are retried after the rest of the batch
+        retry_queue = RetryQueueModel(self.settings_model)
+        pending = self._apply_domain_verdicts(accepted, plans, retry_queue, verified)
+        
+        def verify_func(email: str) -> EmailVerificationResult:
+            return self.verify_email(
+                email, plan=plans[email.split('@')[-1].lower()],
+                defer_temporary=retry_queue.can_defer(email)
+            )
+        
+        # Worker processes verify their own addresses from scratch
+        prefetch = not (self.settings_model.is_enabled("multi_terminal_enabled")
+                        and self.settings_model.is_enabled("real_multiple_terminals"))
+        
+        while True:
+            if prefetch:
+                # Each domain's SMTP checks share sessions and transactions;
+                # addresses already in the data files are not checked again
+                unknown = [email for email in pending if not self.results_model.check_email_in_data(email)[0]]
+                self.batch_planner_model.prefetch_smtp(plans, unknown)
+            
+            for email, result in self._verify_pending(pending, verify_func).items():
+                verified[email] = result
+                if result.details and result.details.get("deferred"):
+                    spent = (result.details.get("phases") or {}).get("total", 0.0)
+                    retry_queue.defer(email, result.reason, spent)
             
+            # Wait for the earliest domain retry time, then retry what is due
+            wait_time = retry_queue.next_due_in()
+            if wait_time is None:
+                break
+            if wait_time > 0:
+                logger.info(f"{len(retry_queue)} emails deferred, next retry in {wait_time:.0f}s")
+                time.sleep(wait_time)
+            pending = retry_queue.pop_due()
+            
+            # Domains whose MX lookup failed are looked up again
+            failed = {email.split('@')[-1].lower() for email in pending
+                      if plans[email.split('@')[-1].lower()].verdict}
+            if failed:
+                for domain in failed:
+                    self.initial_validation_model.dns_cache.invalidate(domain, MX)
+                plans.update(self.batch_planner_model.plan(
+                    [email for email in pending if email.split('@')[-1].lower() in failed]
+                ))
+                pending = self._apply_domain_verdicts(pending, plans, retry_queue, verified)
+        
+        # Pooled SMTP connections are not needed once the batch is done
+        self.smtp_model.close_sessions()
+        
+        # Keep the shared DNS cache from growing with dead entries
+        remaining = self.initial_validation_model.dns_cache.purge_expired()
+        logger.info(f"DNS cache holds {remaining} entries after purging expired ones")
+        
+        # Fan each result out to every input form of the address
+        results = {}
+        for key, members in groups.items():
+            result = verified.get(representatives[key])
+            if result is None:
+                continue
+            for email in members:
+                results[email] = result if result.email == email else replace(result, email=email)
+        return results
+    
+    def _apply_domain_verdicts(self, emails: List[str], plans: Dict[str, DomainPlan],
+                               retry_queue: RetryQueueModel,
+                               verified: Dict[str, EmailVerificationResult]) -> List[str]:
+        """
+        Record the domain-level verdicts of a batch's addresses.
+        
+        Addresses on the suppression list are recorded as invalid too.
+        Temporary verdicts (a failed MX lookup) are deferred to the retry
+        queue while the address has retries left.
+        
+        Args:
+            emails: The emails to check
+            plans: Domain plans from the batch planner
+            retry_queue: The batch's retry queue
+            verified: Results so far, updated with the recorded verdicts
+        
+        Returns:
+            List[str]: The emails that need per-mailbox verification
+        """
+        pending = []
+        for email in emails:
+            plan = plans[email.split('@')[-1].lower()]
+            if not plan.verdict:
+                suppressed = self.initial_validation_model.check_suppressed_address(email)
+                if suppressed:
+                    verified[email] = self._record_batch_result(
+                        email, suppressed, f"Suppression check: {suppressed.category} - {suppressed.reason}"
+                    )
+                else:
+                    pending.append(email)
+                continue
+            
+            # Domain-level verdicts apply to every address on the domain
+            result = plan.apply_verdict(email)
+            if (result.details and result.details.get("temporary")
+                    and retry_queue.can_defer(email) and retry_queue.defer(email, result.reason)):
+                continue
+            verified[email] = self._record_batch_result(
+                email, result, f"Domain check: {result.category} - {result.reason}"
+            )
+        return pending
+    
+    def _verify_pending(self, emails: List[str],
+                        verify_func: Callable[[str], EmailVerificationResult]) -> Dict[str, EmailVerificationResult]:
+        """
+        Verify addresses one by one or across terminals.
+        
+        Args:
+            emails: The emails to verify
+            verify_func: Function verifying one email
+        
         Returns:
             Dict[str, EmailVerificationResult]: Dictionary of verification results
         """
         # Check if multi-terminal support is enabled
         if self.settings_model.is_enabled("multi_terminal_enabled") and len(emails) > 1:
-            return self.multi_terminal_model.batch_verify(emails, self.verify_email)
-        else:
-            # Single-terminal verification
-            results = {}
-            for email in emails:
-                results[email] = self.verify_email(email)
-                # Add a delay between checks to avoid rate limiting
+            return self.multi_terminal_model.batch_verify(emails, verify_func)
+        
+        # Single-terminal verification
+        results = {}
+        for email in emails:
+            results[email] = verify_func(email)
+            # Without a rate limiter, add a delay between checks
+            if self.rate_limiter is None:
                 time.sleep(random.uniform(2, 4))
-            return results
+        return results
+    
+    def explain_batch(self, emails: List[str]) -> Dict[str, Any]:
+        """
+        Plan a batch without verifying it (dry run).
+        
+        Runs canonicalization, syntax checks, domain lists, cached DNS and
+        provider identification only. No DNS queries, SMTP, HTTP or browser
+        traffic is made and nothing is saved.
+        
+        Args:
+            emails: List of emails to plan
+        
+        Returns:
+            Dict[str, Any]: Counts per stage, provider and method, and
+            estimates of wall-clock time and browser launches
+        """
+        start_time = time.time()
+        
+        groups = self.canonicalization_model.group_duplicates(emails)
+        
+        accepted = []
+        syntax_errors: Dict[str, int] = {}
+        for members in groups.values():
+            email = members[0].strip()
+            syntax_error = self.initial_validation_model.check_syntax(email)
+            if syntax_error is None:
+                accepted.append(email)
+            else:
+                syntax_errors[syntax_error] = syntax_errors.get(syntax_error, 0) + 1
+        
+        plans = self.batch_planner_model.plan(accepted, cached_only=True)
+        
+        # Match the concurrency and pauses batch_verify would use
+        if self.settings_model.is_enabled("multi_terminal_enabled"):
+            workers = self.settings_model.get_terminal_count()
+        else:
+            workers = 1
+        
+        report = {
+            "total_emails": len(emails),
+            "unique_emails": len(groups),
+            "duplicates": len(emails) - len(groups),
+            "syntax_rejected": sum(syntax_errors.values()),
+            "syntax_errors": syntax_errors
+        }
+        report.update(self.batch_planner_model.explain(
+            plans, self.method_stats_model.get_method_stats(), workers,
+            delay_seconds=0.0 if self.rate_limiter else 3.0
+        ))
+        report["counters"] = self.method_stats_model.get_counters()
+        report["planning_seconds"] = round(time.time() - start_time, 2)
+        return report
+    
+    def get_dns_cache_statistics(self) -> Dict[str, Any]:
+        """
+        Get DNS cache hit rates and resolution latencies.
+        
+        Returns:
+            Dict[str, Any]: Counters for this process and entry counts and
+            latencies per record type from the persistent cache
+        """
+        return self.initial_validation_model.dns_cache.get_statistics()
+    
+    def get_smtp_transcripts(self, host: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the sampled SMTP transcripts kept in memory by this process.
+        
+        Args:
+            host: Only this MX host's transcripts, if given
+            limit: Maximum number of transcripts
+        
+        Returns:
+            Dict[str, Any]: Sampling settings, a per-host summary (slowest
+            host first) and recent transcripts (newest first)
+        """
+        return self.smtp_model.session_pool.transcripts.get_report(host, limit)
+    
+    def get_mx_capabilities(self, host: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the EHLO capabilities and TLS outcomes cached by this process.
+        
+        Args:
+            host: Only this MX host, if given
+        
+        Returns:
+            Dict[str, Any]: "tls_policy" and "hosts", the capabilities per
+            host ("pipelining", "starttls", "tls_outcome", ...)
+        """
+        capabilities = self.smtp_model.session_pool.capabilities
+        if host is not None:
+            entry = capabilities.get(host)
+            hosts = {host.lower(): entry} if entry is not None else {}
+        else:
+            hosts = capabilities.get_all()
+        return {"tls_policy": capabilities.policy, "hosts": hosts}
+    
+    def get_mx_health(self, host: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the MX health scoreboard of this process.
+        
+        Args:
+            host: Only this MX host, if given
+        
+        Returns:
+            List[Dict[str, Any]]: Per-host attempts, failures, error rate,
+            average latency, last error and circuit state
+        """
+        rows = self.smtp_model.mx_health.get_statistics()
+        if host is not None:
+            rows = [row for row in rows if row["host"] == host.lower()]
+        return rows
+    
+    def get_smtp_egress_status(self) -> Dict[str, Any]:
+        """
+        Get the outcome of the outbound port 25 probe of this process.
+        
+        Returns:
+            Dict[str, Any]: "available" (None until probed), "checked_at",
+            "last_error" and "targets"
+        """
+        return self.smtp_model.egress_probe.get_status()
+    
+    def _reject_syntax(self, email: str, syntax_error: str) -> EmailVerificationResult:
+        """
+        Record an email rejected by the syntax prefilter.
+        
+        Args:
+            email: The email address
+            syntax_error: Why the syntax check failed
+        
+        Returns:
+            EmailVerificationResult: The verification result
+        """
+        result = EmailVerificationResult(
+            email=email,
+            category=INVALID,
+            reason="Invalid email format",
+            provider="unknown",
+            details={"syntax_error": syntax_error}
+        )
+        return self._record_batch_result(email, result, f"Syntax prefilter: {result.category} - {syntax_error}")
+    
+    def _record_batch_result(self, email: str, result: EmailVerificationResult, event: str) -> EmailVerificationResult:
+        """
+        Record a result decided for an email without per-mailbox verification.
+        
+        Args:
+            email: The email address
+            result: The verification result
+            event: History event describing how the result was decided
+        
+        Returns:
+            EmailVerificationResult: The verification result
+        """
+        with self.lock:
+            self.verification_history[email] = []
+            self.result_cache[self.canonicalization_model.canonicalize(email)] = result
+        
+        self.add_to_history(email, event)
+        self.results_model.save_result(result, self.job_id)
+        self.save_history(email, result.category)
+        return result
     
     def add_to_history(self, email: str, event: str) -> None:
         """
@@ -301,11 +679,8 @@ class VerificationController:
             # Load from CSV
             file_path = input("\nEnter the path to the CSV file: ")
             try:
-                with open(file_path, 'r') as f:
-                    for line in f:
-                        email = line.strip()
-                        if '@' in email:  # Basic validation
-                            emails.append(email)
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    emails = self._prefilter_input(f)
                 
                 if not emails:
                     print("\nNo valid emails found in the file.")
@@ -317,7 +692,7 @@ class VerificationController:
         elif bulk_choice == "2":
             # Enter manually
             emails_input = input("\nEnter emails separated by commas: ")
-            emails = [email.strip() for email in emails_input.split(",") if '@' in email.strip()]
+            emails = self._prefilter_input(emails_input.split(","))
             
             if not emails:
                 print("\nNo valid emails provided.")
@@ -373,6 +748,32 @@ class VerificationController:
             self.settings_model.save_verification_statistics(verification_name, statistics)
             print(f"\nStatistics saved as '{verification_name}'")
     
+    def _prefilter_input(self, lines: Iterable[str]) -> List[str]:
+        """
+        Check the syntax of entered or uploaded lines and report the rejected ones.
+        
+        Args:
+            lines: Raw input lines (the first CSV column is the email)
+        
+        Returns:
+            List[str]: The accepted emails
+        """
+        emails = []
+        rejected = []
+        for value, reason in self.initial_validation_model.prefilter_emails(lines):
+            if reason is None:
+                emails.append(value)
+            elif value:
+                rejected.append((value, reason))
+        
+        if rejected:
+            print(f"\nSkipping {len(rejected)} entries with invalid syntax:")
+            for value, reason in rejected[:10]:
+                print(f"  {value}: {reason}")
+            if len(rejected) > 10:
+                print(f"  ... and {len(rejected) - 10} more")
+        return emails
+    
     def show_results_summary(self) -> None:
         """Display a summary of verification results."""
         summary = self.results_model.get_results_summary()
@@ -449,7 +850,7 @@ class VerificationController:
         elif settings_choice == "7":
             # Rate limiting settings
             self.settings_model.configure_rate_limiting_settings()
-            
+        
         elif settings_choice == "8":
             # Bounce verification settings
             self._configure_bounce_settings()
@@ -0,0 +1,265 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+from models.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Record types stored in the cache
+MX = "MX"
+ADDRESSES = "ADDR"
+
+# Lookup outcomes
+STATUS_OK = "ok"
+STATUS_NXDOMAIN = "nxdomain"
+STATUS_NOANSWER = "noanswer"
+STATUS_TIMEOUT = "timeout"
+
+class DNSCacheModel:
+    """Persistent, TTL-aware cache for MX records and MX host addresses."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the DNS cache.
+        
+        Entries are kept in a SQLite database so that every terminal
+        subprocess, worker and API service shares the same resolutions, and
+        in a small in-process layer in front of it.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.cache_file = self.settings_model.get("dns_cache_file", "./data/dns_cache.db")
+        self.min_ttl = self.settings_model.get_int("dns_cache_min_ttl", 60)
+        self.max_ttl = self.settings_model.get_int("dns_cache_max_ttl", 86400)
+        
+        # Failed lookups are cached for shorter, outcome-specific periods
+        self.negative_ttls = {
+            STATUS_NXDOMAIN: self.settings_model.get_int("dns_negative_ttl_nxdomain", 3600),
+            STATUS_NOANSWER: self.settings_model.get_int("dns_negative_ttl_noanswer", 1800),
+            STATUS_TIMEOUT: self.settings_model.get_int("dns_negative_ttl_timeout", 300)
+        }
+        
+        # In-process layer: (name, rtype) -> entry
+        self.memory: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.lock = threading.RLock()
+        
+        # Counters for this process
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        
+        try:
+            self.store = SQLiteStore(self.cache_file, [
+                """CREATE TABLE IF NOT EXISTS dns_cache (
+                    name TEXT NOT NULL,
+                    rtype TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    data TEXT,
+                    reason TEXT,
+                    ttl INTEGER NOT NULL,
+                    resolved_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    latency_ms REAL,
+                    PRIMARY KEY (name, rtype)
+                )""",
+                "CREATE INDEX IF NOT EXISTS idx_dns_cache_expires ON dns_cache (expires_at)"
+            ])
+        except sqlite3.Error as e:
+            logger.error(f"Error opening DNS cache {self.cache_file}: {e}")
+            self.store = None
+    
+    def clamp_ttl(self, ttl: int) -> int:
+        """
+        Clamp a record TTL to the configured bounds.
+        
+        Args:
+            ttl: The TTL reported by the resolver
+        
+        Returns:
+            int: The TTL to cache the entry for
+        """
+        return max(self.min_ttl, min(int(ttl), self.max_ttl))
+    
+    def negative_ttl(self, status: str) -> int:
+        """
+        Get the TTL for a failed lookup.
+        
+        Args:
+            status: The lookup outcome (nxdomain, noanswer or timeout)
+        
+        Returns:
+            int: The TTL to cache the failure for
+        """
+        return min(self.negative_ttls.get(status, self.min_ttl), self.max_ttl)
+    
+    def get(self, name: str, rtype: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached entry if it has not expired.
+        
+        Args:
+            name: The domain or host name
+            rtype: The record type (MX or ADDR)
+        
+        Returns:
+            Optional[Dict[str, Any]]: The entry (status, data, reason, ttl,
+            resolved_at, expires_at, latency_ms), or None on a miss
+        """
+        key = (name.lower(), rtype)
+        now = time.time()
+        
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry["expires_at"] > now:
+                self.stats["hits"] += 1
+                return entry
+        
+        entry = None
+        if self.store:
+            try:
+                row = self.store.query_one(
+                    "SELECT status, data, reason, ttl, resolved_at, expires_at, latency_ms "
+                    "FROM dns_cache WHERE name = ? AND rtype = ? AND expires_at > ?",
+                    (key[0], rtype, now)
+                )
+                if row:
+                    entry = {
+                        "status": row[0],
+                        "data": json.loads(row[1]) if row[1] else None,
+                        "reason": row[2],
+                        "ttl": row[3],
+                        "resolved_at": row[4],
+                        "expires_at": row[5],
+                        "latency_ms": row[6]
+                    }
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Error reading DNS cache for {name}/{rtype}: {e}")
+        
+        with self.lock:
+            if entry:
+                self.memory[key] = entry
+                self.stats["hits"] += 1
+            else:
+                self.memory.pop(key, None)
+                self.stats["misses"] += 1
+        
+        return entry
+    
+    def put(self, name: str, rtype: str, data: Any, ttl: int, latency_ms: float,
+            status: str = STATUS_OK, reason: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store an entry in the cache.
+        
+        Args:
+            name: The domain or host name
+            rtype: The record type (MX or ADDR)
+            data: JSON-serializable record data
+            ttl: Seconds the entry stays valid
+            latency_ms: How long the resolution took
+            status: Outcome of the lookup
+            reason: Optional description of the outcome
+        
+        Returns:
+            Dict[str, Any]: The stored entry
+        """
+        key = (name.lower(), rtype)
+        now = time.time()
+        entry = {
+            "status": status,
+            "data": data,
+            "reason": reason,
+            "ttl": int(ttl),
+            "resolved_at": now,
+            "expires_at": now + ttl,
+            "latency_ms": latency_ms
+        }
+        
+        with self.lock:
+            self.memory[key] = entry
+            self.stats["writes"] += 1
+        
+        if self.store:
+            try:
+                self.store.execute(
+                    "INSERT OR REPLACE INTO dns_cache "
+                    "(name, rtype, status, data, reason, ttl, resolved_at, expires_at, latency_ms) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key[0], rtype, status, json.dumps(data), reason, int(ttl), now, now + ttl, latency_ms)
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Error writing DNS cache for {name}/{rtype}: {e}")
+        
+        return entry
+    
+    def invalidate(self, name: str, rtype: str) -> None:
+        """
+        Drop a cached entry, so the next lookup resolves it again.
+        
+        Args:
+            name: The domain or host name
+            rtype: The record type (MX or ADDR)
+        """
+        key = (name.lower(), rtype)
+        with self.lock:
+            self.memory.pop(key, None)
+        
+        if self.store:
+            try:
+                self.store.execute("DELETE FROM dns_cache WHERE name = ? AND rtype = ?", (key[0], rtype))
+            except sqlite3.Error as e:
+                logger.warning(f"Error invalidating DNS cache for {name}/{rtype}: {e}")
+    
+    def purge_expired(self) -> int:
+        """
+        Delete expired entries from the persistent cache.
+        
+        Returns:
+            int: Number of entries left in the cache
+        """
+        now = time.time()
+        with self.lock:
+            self.memory = {k: v for k, v in self.memory.items() if v["expires_at"] > now}
+        
+        if not self.store:
+            return len(self.memory)
+        
+        try:
+            self.store.execute("DELETE FROM dns_cache WHERE expires_at <= ?", (now,))
+            row = self.store.query_one("SELECT COUNT(*) FROM dns_cache")
+            return row[0] if row else 0
+        except sqlite3.Error as e:
+            logger.warning(f"Error purging DNS cache: {e}")
+            return 0
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache statistics, including resolution latency per record type.
+        
+        Returns:
+            Dict[str, Any]: Hit/miss counters for this process and entry
+            counts and latencies from the persistent cache
+        """
+        statistics: Dict[str, Any] = {"process": dict(self.stats), "records": {}}
+        
+        if not self.store:
+            return statistics
+        
+        try:
+            rows = self.store.query(
+                "SELECT rtype, status, COUNT(*), AVG(latency_ms), MAX(latency_ms) "
+                "FROM dns_cache WHERE expires_at > ? GROUP BY rtype, status",
+                (time.time(),)
+            )
+            for rtype, status, count, avg_latency, max_latency in rows:
+                statistics["records"].setdefault(rtype, {})[status] = {
+                    "count": count,
+                    "avg_latency_ms": round(avg_latency or 0, 2),
+                    "max_latency_ms": round(max_latency or 0, 2)
+                }
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading DNS cache statistics: {e}")
+        
+        return statistics
@@ -0,0 +1,277 @@
+import os
+import csv
+import sys
+import mmap
+import heapq
+import shutil
+import struct
+import bisect
+import hashlib
+import logging
+import tempfile
+from array import array
+from typing import Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# File layout (little-endian): magic and entry count, a fan-out table with
+# the number of hashes whose top 16 bits are <= each bucket, then the sorted
+# unique uint64 hashes
+INDEX_MAGIC = b"EVDIDX01"
+HEADER = struct.Struct("<8sQ")
+FANOUT_BUCKETS = 1 << 16
+FANOUT_SIZE = FANOUT_BUCKETS * 4
+HASHES_OFFSET = HEADER.size + FANOUT_SIZE
+
+# Hashes held in memory per sorted run while building
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Hashes read or written per I/O call while merging
+IO_BLOCK = 65536
+
+def domain_hash(value: str) -> int:
+    """
+    Hash a domain (or address) for the index.
+    
+    Args:
+        value: The domain or address
+    
+    Returns:
+        int: 64-bit hash of the normalized value
+    """
+    key = value.strip().lower().rstrip('.').encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+class DomainIndex:
+    """Read-only, memory-mapped set of hashed domains."""
+    
+    def __init__(self, path: str):
+        """
+        Open an index file built by build_domain_index.
+        
+        The file is memory-mapped and searched in place, so opening an index
+        with tens of millions of entries takes no time and no Python heap;
+        the operating system pages in only the parts lookups touch.
+        
+        Args:
+            path: Path to the index file
+        
+        Raises:
+            ValueError: If the file is not a domain index
+        """
+        self.path = path
+        
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        if len(self._mmap) < HASHES_OFFSET:
+            self._mmap.close()
+            raise ValueError(f"{path} is too short to be a domain index")
+        
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or len(self._mmap) != HASHES_OFFSET + count * 8:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a valid domain index")
+        
+        self.count = count
+        if sys.byteorder == 'little':
+            view = memoryview(self._mmap)
+            self._fanout = view[HEADER.size:HASHES_OFFSET].cast('I')
+            self._hashes = view[HASHES_OFFSET:].cast('Q')
+            view.release()
+        else:
+            # The on-disk format is little-endian; unpack each probe instead
+            self._fanout = _LittleEndianView(self._mmap, HEADER.size, "<I", FANOUT_BUCKETS)
+            self._hashes = _LittleEndianView(self._mmap, HASHES_OFFSET, "<Q", count)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def contains(self, value: str) -> bool:
+        """
+        Check if a domain is in the index.
+        
+        Args:
+            value: The domain or address
+        
+        Returns:
+            bool: True if the value is in the index
+        """
+        key = domain_hash(value)
+        
+        # The fan-out table narrows the search to hashes sharing the top 16 bits
+        bucket = key >> 48
+        low = self._fanout[bucket - 1] if bucket else 0
+        high = self._fanout[bucket]
+        
+        position = bisect.bisect_left(self._hashes, key, low, high)
+        return position < high and self._hashes[position] == key
+    
+    __contains__ = contains
+    
+    def close(self) -> None:
+        """Unmap the index file."""
+        if isinstance(self._hashes, memoryview):
+            self._fanout.release()
+            self._hashes.release()
+        self._mmap.close()
+
+class _LittleEndianView:
+    """Sequence view of a little-endian array for big-endian hosts."""
+    
+    def __init__(self, buffer, offset: int, item_format: str, count: int):
+        self.buffer = buffer
+        self.offset = offset
+        self.item = struct.Struct(item_format)
+        self.count = count
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, position: int) -> int:
+        return self.item.unpack_from(self.buffer, self.offset + position * self.item.size)[0]
+
+def load_domain_index(path: Optional[str]) -> Optional[DomainIndex]:
+    """
+    Open a domain index if the file exists.
+    
+    Args:
+        path: Path to the index file
+    
+    Returns:
+        Optional[DomainIndex]: The index, or None if it is missing or invalid
+    """
+    if not path or not os.path.exists(path):
+        return None
+    
+    try:
+        index = DomainIndex(path)
+        logger.info(f"Loaded domain index {path} with {len(index)} entries")
+        return index
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading domain index {path}: {e}")
+        return None
+
+def read_source_values(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Read domains from plain text or CSV list files.
+    
+    Only the first column is used. Blank lines, comments (#) and a
+    "domain"/"email" header are skipped.
+    
+    Args:
+        paths: Paths of the list files
+    
+    Yields:
+        str: The listed values
+    """
+    for path in paths:
+        with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                value = row[0].strip()
+                if not value or value.startswith('#') or value.lower() in ("domain", "email"):
+                    continue
+                yield value
+
+def _write_hashes(f, hashes: array) -> None:
+    """Write an array to a file in the little-endian on-disk order."""
+    if sys.byteorder != 'little':
+        hashes.byteswap()
+    hashes.tofile(f)
+
+def _read_run(path: str) -> Iterator[int]:
+    """Stream the hashes of a sorted run file."""
+    with open(path, 'rb') as f:
+        while True:
+            block = array('Q')
+            try:
+                block.fromfile(f, IO_BLOCK)
+            except EOFError:
+                pass
+            if not block:
+                return
+            if sys.byteorder != 'little':
+                block.byteswap()
+            yield from block
+
+def _spill_run(chunk: array, work_dir: str, number: int) -> str:
+    """Sort a chunk of hashes and write it to a run file."""
+    path = os.path.join(work_dir, f"run_{number:05d}.bin")
+    with open(path, 'wb') as f:
+        _write_hashes(f, array('Q', sorted(chunk)))
+    return path
+
+def build_domain_index(sources: List[str], output_path: str,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Build a domain index from list files.
+    
+    Values are hashed and sorted in chunks of chunk_size (so memory stays
+    bounded regardless of the list size), the sorted runs are spilled to
+    temporary files, and the runs are merged and de-duplicated into the
+    index. The index replaces output_path atomically.
+    
+    Args:
+        sources: Paths of plain text or CSV list files
+        output_path: Path of the index file to write
+        chunk_size: Number of hashes sorted in memory at a time
+    
+    Returns:
+        int: Number of unique entries in the index
+    """
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    
+    run_paths = []
+    work_dir = tempfile.mkdtemp(prefix="domain_index_", dir=directory)
+    try:
+        # Phase 1: sorted runs
+        chunk = array('Q')
+        for value in read_source_values(sources):
+            chunk.append(domain_hash(value))
+            if len(chunk) >= chunk_size:
+                run_paths.append(_spill_run(chunk, work_dir, len(run_paths)))
+                chunk = array('Q')
+        if chunk or not run_paths:
+            run_paths.append(_spill_run(chunk, work_dir, len(run_paths)))
+        
+        # Phase 2: merge, de-duplicate and write the index
+        temp_output = os.path.join(work_dir, "index.tmp")
+        count = 0
+        buckets = array('I', [0]) * FANOUT_BUCKETS
+        with open(temp_output, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, 0))
+            f.write(bytes(FANOUT_SIZE))
+            block = array('Q')
+            previous = None
+            for value in heapq.merge(*[_read_run(path) for path in run_paths]):
+                if value == previous:
+                    continue
+                previous = value
+                buckets[value >> 48] += 1
+                block.append(value)
+                if len(block) >= IO_BLOCK:
+                    _write_hashes(f, block)
+                    count += len(block)
+                    block = array('Q')
+            _write_hashes(f, block)
+            count += len(block)
+            
+            # Turn the bucket counts into the cumulative fan-out table
+            total = 0
+            for bucket in range(FANOUT_BUCKETS):
+                total += buckets[bucket]
+                buckets[bucket] = total
+            
+            f.seek(0)
+            f.write(HEADER.pack(INDEX_MAGIC, count))
+            _write_hashes(f, buckets)
+        
+        os.replace(temp_output, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    logger.info(f"Built domain index {output_path} with {count} entries from {len(run_paths)} runs")
+    return count
@@ -0,0 +1,116 @@
+import os
+import csv
+import time
+import logging
+import threading
+from typing import List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class DomainListModel:
+    """In-memory, hash-indexed copy of a domain list CSV file."""
+    
+    def __init__(self, file_path: str, check_interval: float = 1.0):
+        """
+        Initialize the domain list.
+        
+        Plain entries match a domain exactly; entries written as
+        ``*.example.com`` match every subdomain of example.com. The file is
+        re-read when its modification time changes, checked at most once per
+        check_interval seconds.
+        
+        Args:
+            file_path: Path to the CSV file with a "domain" column
+            check_interval: Minimum seconds between modification time checks
+        """
+        self.file_path = file_path
+        self.check_interval = check_interval
+        
+        self.entries: List[str] = []
+        self.exact: Set[str] = set()
+        self.suffixes: Set[str] = set()
+        
+        self.mtime: Optional[float] = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+        
+        self.reload()
+    
+    def reload(self) -> None:
+        """Read the file and rebuild the indexes."""
+        try:
+            mtime = os.path.getmtime(self.file_path)
+            with open(self.file_path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                entries = [row["domain"].strip() for row in reader if row.get("domain")]
+        except Exception as e:
+            logger.error(f"Error loading domain list {self.file_path}: {e}")
+            mtime, entries = None, []
+        
+        exact = set()
+        suffixes = set()
+        for entry in entries:
+            entry = entry.lower().rstrip('.')
+            if entry.startswith('*.'):
+                suffixes.add(entry[2:])
+            elif entry:
+                exact.add(entry)
+        
+        with self.lock:
+            self.entries = entries
+            self.exact = exact
+            self.suffixes = suffixes
+            self.mtime = mtime
+            self.last_check = time.monotonic()
+    
+    def _check_for_changes(self) -> None:
+        """Reload the file if its modification time changed."""
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        
+        try:
+            mtime = os.path.getmtime(self.file_path)
+        except OSError:
+            mtime = None
+        
+        if mtime != self.mtime:
+            logger.info(f"Domain list changed, reloading {self.file_path}")
+            self.reload()
+    
+    def contains(self, domain: str) -> bool:
+        """
+        Check if a domain is on the list.
+        
+        Args:
+            domain: The domain to check
+        
+        Returns:
+            bool: True if the domain matches an exact or wildcard entry
+        """
+        self._check_for_changes()
+        
+        domain = domain.lower().rstrip('.')
+        if domain in self.exact:
+            return True
+        
+        if self.suffixes:
+            # Walk the parent domains: a.b.example.com -> b.example.com -> example.com
+            position = domain.find('.')
+            while position != -1:
+                if domain[position + 1:] in self.suffixes:
+                    return True
+                position = domain.find('.', position + 1)
+        
+        return False
+    
+    def get_entries(self) -> List[str]:
+        """
+        Get the entries of the list as written in the file.
+        
+        Returns:
+            List[str]: List of entries
+        """
+        self._check_for_changes()
+        return list(self.entries)
@@ -0,0 +1,127 @@
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional
+from models.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class DomainVerdictModel:
+    """Persistent, TTL-aware cache of catch-all verdicts per domain."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the domain verdict cache.
+        
+        Verdicts are stored in a SQLite database shared by every process and
+        by both the SMTP and the Microsoft API paths, so a domain is probed
+        for catch-all once per TTL whichever method gets to it first.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.cache_file = self.settings_model.get("domain_verdict_cache_file", "./data/domain_verdicts.db")
+        self.ttl = self.settings_model.get_int("catch_all_cache_ttl", 86400)
+        
+        # In-process layer: domain -> verdict
+        self.memory: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        
+        try:
+            self.store = SQLiteStore(self.cache_file, [
+                """CREATE TABLE IF NOT EXISTS catch_all_verdicts (
+                    domain TEXT PRIMARY KEY,
+                    is_catch_all INTEGER NOT NULL,
+                    method TEXT NOT NULL,
+                    observed_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            ])
+        except sqlite3.Error as e:
+            logger.error(f"Error opening domain verdict cache {self.cache_file}: {e}")
+            self.store = None
+    
+    def get_catch_all(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached catch-all verdict for a domain.
+        
+        Args:
+            domain: The domain
+        
+        Returns:
+            Optional[Dict[str, Any]]: The verdict (is_catch_all, method,
+            observed_at, expires_at), or None if unknown or expired
+        """
+        domain = domain.lower()
+        now = time.time()
+        
+        with self.lock:
+            verdict = self.memory.get(domain)
+            if verdict and verdict["expires_at"] > now:
+                return verdict
+        
+        verdict = None
+        if self.store:
+            try:
+                row = self.store.query_one(
+                    "SELECT is_catch_all, method, observed_at, expires_at FROM catch_all_verdicts "
+                    "WHERE domain = ? AND expires_at > ?",
+                    (domain, now)
+                )
+                if row:
+                    verdict = {
+                        "is_catch_all": bool(row[0]),
+                        "method": row[1],
+                        "observed_at": row[2],
+                        "expires_at": row[3]
+                    }
+            except sqlite3.Error as e:
+                logger.warning(f"Error reading catch-all verdict for {domain}: {e}")
+        
+        with self.lock:
+            if verdict:
+                self.memory[domain] = verdict
+            else:
+                self.memory.pop(domain, None)
+        
+        return verdict
+    
+    def set_catch_all(self, domain: str, is_catch_all: bool, method: str) -> Dict[str, Any]:
+        """
+        Store the catch-all verdict for a domain.
+        
+        Args:
+            domain: The domain
+            is_catch_all: Whether the domain accepts any address
+            method: How the verdict was obtained (e.g. smtp, microsoft_api)
+        
+        Returns:
+            Dict[str, Any]: The stored verdict
+        """
+        domain = domain.lower()
+        now = time.time()
+        verdict = {
+            "is_catch_all": is_catch_all,
+            "method": method,
+            "observed_at": now,
+            "expires_at": now + self.ttl
+        }
+        
+        with self.lock:
+            self.memory[domain] = verdict
+        
+        if self.store:
+            try:
+                self.store.execute(
+                    "INSERT OR REPLACE INTO catch_all_verdicts "
+                    "(domain, is_catch_all, method, observed_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    (domain, int(is_catch_all), method, now, now + self.ttl)
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Error writing catch-all verdict for {domain}: {e}")
+        
+        logger.info(f"Cached catch-all verdict for {domain}: {is_catch_all} ({method})")
+        return verdict
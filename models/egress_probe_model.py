@@ -0,0 +1,152 @@
+import time
+import socket
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+from models.connection_racer_model import split_host
+
+logger = logging.getLogger(__name__)
+
+class EgressProbeModel:
+    """Model for detecting whether outbound SMTP (port 25) connections are possible."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the egress probe.
+        
+        Cloud hosts and CI runners often block outbound port 25, and then
+        every SMTP check waits out its connect timeouts on every MX host.
+        The probe connects to smtp_egress_probe_targets (comma-separated
+        "host[:port]") when a batch is planned or the first SMTP check asks
+        for it, and then every smtp_egress_probe_interval seconds; egress is
+        available if any target accepts a connection.
+        Targets that cannot be resolved say nothing about port 25 and are
+        ignored.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.enabled = self.settings_model.is_enabled("smtp_egress_probe_enabled")
+        targets = self.settings_model.get("smtp_egress_probe_targets",
+                                          "gmail-smtp-in.l.google.com,alt1.gmail-smtp-in.l.google.com")
+        self.targets: List[str] = [target.strip() for target in str(targets).split(",") if target.strip()]
+        self.interval = self.settings_model.get_float("smtp_egress_probe_interval", 300.0)
+        self.timeout = self.settings_model.get_float("smtp_egress_probe_timeout", 5.0)
+        
+        # None until a probe has reached a conclusion
+        self.available: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        
+        self.lock = threading.Lock()
+        self.probe_done = threading.Event()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Probe in the background now and then every smtp_egress_probe_interval seconds."""
+        if not self.enabled or not self.targets:
+            return
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, name="smtp-egress-probe", daemon=True)
+            self.thread.start()
+    
+    def stop(self) -> None:
+        """Stop the periodic probe."""
+        self.stopped.set()
+    
+    def _run(self) -> None:
+        """Background loop of start()."""
+        while not self.stopped.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                logger.error(f"Error probing SMTP egress: {e}")
+                self.probe_done.set()
+            # Event.wait rather than sleep, so stop() takes effect at once
+            self.stopped.wait(self.interval)
+    
+    def probe(self) -> Optional[bool]:
+        """
+        Try to connect to the probe targets and cache the outcome.
+        
+        Returns:
+            Optional[bool]: True if a target accepted a connection, False if
+            every resolvable target failed, None if none could be resolved
+        """
+        available: Optional[bool] = None
+        error = None
+        for target in self.targets:
+            host, port = split_host(target)
+            try:
+                with socket.create_connection((host, port), timeout=self.timeout):
+                    available = True
+                    break
+            except socket.gaierror as e:
+                logger.debug(f"SMTP egress probe could not resolve {target}: {e}")
+            except OSError as e:
+                available = False
+                error = f"{target}: {str(e) or type(e).__name__}"
+        
+        with self.lock:
+            changed = available is not None and available != self.available
+            if available is not None:
+                self.available = available
+                self.last_error = error if not available else None
+            self.checked_at = time.time()
+        self.probe_done.set()
+        
+        if changed and available:
+            logger.info("SMTP egress probe: outbound port 25 is reachable")
+        elif changed:
+            logger.warning(f"SMTP egress probe: outbound port 25 appears blocked ({error}); "
+                           f"SMTP checks will fail fast")
+        return available
+    
+    def is_available(self) -> bool:
+        """
+        Check if SMTP checks can reach remote servers.
+        
+        Starts probing on first use and waits for the first probe if it
+        has not finished yet.
+        
+        Returns:
+            bool: False only if outbound port 25 is known to be blocked
+        """
+        if not self.enabled or not self.targets:
+            return True
+        if self.thread is None:
+            self.start()
+        if not self.probe_done.is_set():
+            self.probe_done.wait(self.timeout * len(self.targets) + 1)
+        return self.available is not False
+    
+    def is_blocked(self) -> bool:
+        """
+        Check if an earlier probe found outbound port 25 blocked, without probing.
+        
+        Returns:
+            bool: True only if outbound port 25 is known to be blocked
+        """
+        return self.available is False
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the cached probe outcome.
+        
+        Returns:
+            Dict[str, Any]: "available" (None if unknown), "checked_at",
+            "last_error" and "targets"
+        """
+        with self.lock:
+            return {
+                "available": self.available,
+                "checked_at": self.checked_at,
+                "last_error": self.last_error,
+                "targets": list(self.targets)
+            }
@@ -1,11 +1,26 @@
 import re
+import csv
+import time
+import dns.exception
 import dns.resolver
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
 from models.common import EmailVerificationResult, VALID, INVALID, RISKY, CUSTOM
+from models.dns_cache_model import (
+    DNSCacheModel, MX, ADDRESSES, STATUS_OK, STATUS_NXDOMAIN, STATUS_NOANSWER, STATUS_TIMEOUT
+)
+from models.provider_rules_model import ProviderRulesModel
+from models.domain_index_model import load_domain_index
 
 logger = logging.getLogger(__name__)
 
+# Precompiled email syntax validator
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Header values that may appear on the first line of an uploaded file
+HEADER_VALUES = {"email", "emails", "mail", "e-mail", "email address"}
+
 class InitialValidationModel:
     """Model for initial email validation and provider identification."""
     
@@ -18,8 +33,8 @@ class InitialValidationModel:
         """
         self.settings_model = settings_model
         
-        # Cache for MX records
-        self.mx_cache: Dict[str, List[str]] = {}
+        # Persistent cache for MX records and MX host addresses, shared by all processes
+        self.dns_cache = DNSCacheModel(settings_model)
         
         # Known email providers and their login URLs
         self.provider_login_urls = {
@@ -42,6 +57,17 @@ class InitialValidationModel:
             'microsoft.com': 'https://login.microsoftonline.com',
             'office365.com': 'https://login.microsoftonline.com',
         }
+        
+        # Indexed MX rules for identifying providers of other domains
+        self.provider_rules = ProviderRulesModel(settings_model, self.provider_login_urls)
+        
+        # Memory-mapped suppression and disposable-domain indexes, if built
+        self.suppression_index = load_domain_index(
+            self.settings_model.get("suppression_index_file", "./data/suppression.idx")
+        )
+        self.disposable_index = load_domain_index(
+            self.settings_model.get("disposable_index_file", "./data/disposable.idx")
+        )
     
     def validate_format(self, email: str) -> bool:
         """
@@ -53,8 +79,101 @@ class InitialValidationModel:
         Returns:
             bool: True if the email format is valid, False otherwise
         """
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return EMAIL_PATTERN.match(email) is not None
+    
+    def prefilter_emails(self, lines: Iterable[str]) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Check the syntax of raw input lines in a single streaming pass.
+        
+        Only the first CSV column of each line is considered. Nothing is
+        resolved or contacted, so this can run over millions of lines before
+        any network work is scheduled.
+        
+        Args:
+            lines: Raw input lines (e.g. an open file)
+            
+        Returns:
+            Iterator[Tuple[str, Optional[str]]]: (email, None) for accepted
+            lines and (raw value, reason) for rejected lines
+        """
+        match = EMAIL_PATTERN.match
+        for line_number, line in enumerate(lines):
+            value = line.split(',', 1)[0].strip().strip('"').strip()
+            
+            if match(value) is not None and len(value) <= 254:
+                yield value, None
+                continue
+            
+            # Skip a header row instead of reporting it
+            if line_number == 0 and value.lower() in HEADER_VALUES:
+                continue
+            
+            yield value, self.check_syntax(value)
+    
+    def check_syntax(self, value: str) -> Optional[str]:
+        """
+        Check the syntax of a single value and describe any problem.
+        
+        Args:
+            value: The value to check
+            
+        Returns:
+            Optional[str]: The rejection reason, or None if the syntax is valid
+        """
+        if EMAIL_PATTERN.match(value) is not None and len(value) <= 254:
+            return None
+        
+        if not value:
+            return "Empty line"
+        
+        at_count = value.count('@')
+        if at_count == 0:
+            return "Missing @ symbol"
+        if at_count > 1:
+            return "Multiple @ symbols"
+        if len(value) > 254:
+            return "Email too long"
+        
+        local_part, domain = value.split('@')
+        if not local_part:
+            return "Missing local part"
+        if len(local_part) > 64:
+            return "Local part too long"
+        if '.' not in domain:
+            return "Domain has no top-level domain"
+        
+        return "Invalid email format"
+    
+    def prefilter_file(self, input_path: str, accepted_path: str, rejected_path: str) -> Dict[str, int]:
+        """
+        Clean an uploaded file, writing accepted and rejected lines to separate files.
+        
+        Args:
+            input_path: Path to the raw input file
+            accepted_path: Path to write accepted emails to (one per line)
+            rejected_path: Path to write rejected values to (CSV: value, reason)
+            
+        Returns:
+            Dict[str, int]: Counts of accepted and rejected lines
+        """
+        counts = {"accepted": 0, "rejected": 0}
+        
+        with open(input_path, 'r', encoding='utf-8', errors='replace') as f_in, \
+             open(accepted_path, 'w', encoding='utf-8', newline='') as f_accepted, \
+             open(rejected_path, 'w', encoding='utf-8', newline='') as f_rejected:
+            rejected_writer = csv.writer(f_rejected)
+            rejected_writer.writerow(["value", "reason"])
+            
+            for value, reason in self.prefilter_emails(f_in):
+                if reason is None:
+                    f_accepted.write(value + "\n")
+                    counts["accepted"] += 1
+                else:
+                    rejected_writer.writerow([value, reason])
+                    counts["rejected"] += 1
+        
+        logger.info(f"Prefiltered {input_path}: {counts['accepted']} accepted, {counts['rejected']} rejected")
+        return counts
     
     def get_mx_records(self, domain: str) -> List[str]:
         """
@@ -66,28 +185,183 @@ class InitialValidationModel:
         Returns:
             List[str]: List of MX server hostnames
         """
+        entry = self.get_mx_entry(domain)
+        
+        if entry is None or entry["status"] != STATUS_OK:
+            return []
+        
+        # Most preferred (lowest value) first
+        return [host for _, host in sorted(entry["data"], key=lambda record: record[0])]
+    
+    def get_cached_mx_records(self, domain: str) -> Optional[List[str]]:
+        """
+        Get MX records for a domain from the cache only, without resolving.
+        
+        Args:
+            domain: The domain to get MX records for
+            
+        Returns:
+            Optional[List[str]]: List of MX server hostnames (empty if the
+            cached lookup failed), or None if the domain is not cached
+        """
+        entry = self.dns_cache.get(domain, MX)
+        
+        if entry is None:
+            return None
+        if entry["status"] != STATUS_OK:
+            return []
+        
+        return [host for _, host in sorted(entry["data"], key=lambda record: record[0])]
+    
+    def get_mx_entry(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the DNS cache entry for a domain's MX records, resolving it on a miss.
+        
+        Failed lookups (NXDOMAIN, no MX answer, timeouts) are cached too, with
+        their own shorter TTLs, so dead domains are not queried again.
+        
+        Args:
+            domain: The domain to get MX records for
+            
+        Returns:
+            Optional[Dict[str, Any]]: The cache entry, or None if the lookup
+            failed in a way that is not cached
+        """
+        domain = domain.lower()
+        
         # Check cache first
-        if domain in self.mx_cache:
-            return self.mx_cache[domain]
+        entry = self.dns_cache.get(domain, MX)
+        if entry is None:
+            entry = self._resolve_mx(domain)
+        
+        return entry
+    
+    def _resolve_mx(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve MX records for a domain and store the outcome in the DNS cache.
+        
+        Args:
+            domain: The domain to resolve
             
+        Returns:
+            Optional[Dict[str, Any]]: The cache entry, or None if the lookup
+            failed in a way that is not cached
+        """
+        start_time = time.perf_counter()
         try:
-            records = dns.resolver.resolve(domain, 'MX', lifetime=5)
-            mx_servers = [str(x.exchange).rstrip('.').lower() for x in records]
-            
-            # Cache the result
-            self.mx_cache[domain] = mx_servers
-                
-            return mx_servers
+            answer = dns.resolver.resolve(domain, 'MX', lifetime=5)
+        except dns.resolver.NXDOMAIN as e:
+            return self._cache_mx_failure(domain, STATUS_NXDOMAIN, "Domain does not exist", start_time, e)
+        except dns.resolver.NoAnswer as e:
+            return self._cache_mx_failure(domain, STATUS_NOANSWER, "Domain has no MX records", start_time, e)
+        except (dns.exception.Timeout, dns.resolver.NoNameservers) as e:
+            return self._cache_mx_failure(domain, STATUS_TIMEOUT, "DNS lookup timed out or failed", start_time, e)
         except Exception as e:
             logger.warning(f"Error getting MX records for {domain}: {e}")
+            return None
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        
+        records = [[x.preference, str(x.exchange).rstrip('.').lower()] for x in answer]
+        ttl = self.dns_cache.clamp_ttl(answer.rrset.ttl)
+        logger.debug(f"Resolved MX records for {domain} in {latency_ms:.1f} ms (TTL {ttl}s)")
+        
+        return self.dns_cache.put(domain, MX, records, ttl, latency_ms)
+    
+    def _cache_mx_failure(self, domain: str, status: str, reason: str,
+                          start_time: float, error: Exception) -> Dict[str, Any]:
+        """
+        Store a failed MX lookup in the DNS cache.
+        
+        Args:
+            domain: The domain that failed to resolve
+            status: The lookup outcome (nxdomain, noanswer or timeout)
+            reason: Description of the failure
+            start_time: perf_counter value when the lookup started
+            error: The resolver exception
+            
+        Returns:
+            Dict[str, Any]: The cache entry
+        """
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        ttl = self.dns_cache.negative_ttl(status)
+        logger.warning(f"Error getting MX records for {domain}: {error} (cached as {status} for {ttl}s)")
+        return self.dns_cache.put(domain, MX, [], ttl, latency_ms, status=status, reason=reason)
+    
+    def prefetch_mx_records(self, domains: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, List[str]]:
+        """
+        Resolve MX records for many domains concurrently.
+        
+        Each unique domain is resolved once, with at most max_workers
+        queries in flight, so DNS time for a batch grows with the number of
+        distinct domains rather than the number of emails.
+        
+        Args:
+            domains: Domains to resolve (duplicates are ignored)
+            max_workers: Maximum number of concurrent queries
+            
+        Returns:
+            Dict[str, List[str]]: MX server hostnames for each domain
+        """
+        unique_domains = list(dict.fromkeys(domain.lower() for domain in domains if domain))
+        if not unique_domains:
+            return {}
+        
+        if max_workers is None:
+            max_workers = self.settings_model.get_int("dns_prefetch_concurrency", 32)
+        max_workers = max(1, min(max_workers, len(unique_domains)))
+        
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mx-prefetch") as executor:
+            mx_map = dict(zip(unique_domains, executor.map(self.get_mx_records, unique_domains)))
+        
+        logger.info(f"Prefetched MX records for {len(unique_domains)} domains "
+                    f"in {time.perf_counter() - start_time:.2f}s ({max_workers} concurrent queries)")
+        return mx_map
+    
+    def get_host_addresses(self, host: str) -> List[str]:
+        """
+        Get the IPv4 and IPv6 addresses of an MX host.
+        
+        Args:
+            host: The MX hostname
+            
+        Returns:
+            List[str]: List of IP addresses (IPv6 first when available)
+        """
+        host = host.lower()
+        
+        # Check cache first
+        entry = self.dns_cache.get(host, ADDRESSES)
+        if entry is not None:
+            return entry["data"]
+        
+        addresses = []
+        ttls = []
+        start_time = time.perf_counter()
+        for rtype in ('AAAA', 'A'):
+            try:
+                answer = dns.resolver.resolve(host, rtype, lifetime=5)
+                addresses.extend(str(x) for x in answer)
+                ttls.append(answer.rrset.ttl)
+            except Exception as e:
+                logger.debug(f"No {rtype} records for {host}: {e}")
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        
+        if not addresses:
+            logger.warning(f"Error getting addresses for {host}")
             return []
+        
+        ttl = self.dns_cache.clamp_ttl(min(ttls))
+        self.dns_cache.put(host, ADDRESSES, addresses, ttl, latency_ms)
+        return addresses
     
-    def identify_provider(self, email: str) -> Tuple[str, str]:
+    def identify_provider(self, email: str, mx_records: Optional[List[str]] = None) -> Tuple[str, str]:
         """
         Identify the email provider based on the domain and MX records.
         
         Args:
             email: The email address to identify the provider for
+            mx_records: Already resolved MX records for the domain, if any
             
         Returns:
             Tuple[str, str]: (provider_name, login_url)
@@ -99,38 +373,19 @@ class InitialValidationModel:
             return domain, self.provider_login_urls[domain]
         
         # Check MX records to identify the provider
-        mx_records = self.get_mx_records(domain)
+        if mx_records is None and domain.lower() not in self.provider_rules.memo:
+            mx_records = self.get_mx_records(domain)
         
-        # Look for known providers in MX records
-        for mx in mx_records:
-            if 'google' in mx or 'gmail' in mx:
-                if domain == 'gmail.com':
-                    return 'gmail.com', self.provider_login_urls['gmail.com']
-                else:
-                    # Mark as customGoogle for other Google-hosted domains
-                    return 'customGoogle', self.provider_login_urls['gmail.com']
-            elif 'outlook' in mx or 'microsoft' in mx or 'office365' in mx:
-                return 'outlook.com', self.provider_login_urls['outlook.com']
-            elif 'yahoo' in mx:
-                return 'yahoo.com', self.provider_login_urls['yahoo.com']
-            elif 'protonmail' in mx or 'proton.me' in mx:
-                return 'protonmail.com', self.provider_login_urls['protonmail.com']
-            elif 'zoho' in mx:
-                return 'zoho.com', self.provider_login_urls['zoho.com']
-            elif 'mail.ru' in mx:
-                return 'mail.ru', self.provider_login_urls['mail.ru']
-            elif 'yandex' in mx:
-                return 'yandex.ru', self.provider_login_urls['yandex.ru']
-        
-        # If we can't identify the provider, it's a custom domain
-        return 'custom', None
-    
-    def validate_email(self, email: str) -> Optional[EmailVerificationResult]:
+        # Match MX hosts against the provider rules; custom domain if none match
+        return self.provider_rules.identify(domain, mx_records)
+    
+    def validate_email(self, email: str, mx_records: Optional[List[str]] = None) -> Optional[EmailVerificationResult]:
         """
         Perform initial validation of an email address.
         
         Args:
             email: The email address to validate
+            mx_records: Already resolved MX records for the domain, if any
             
         Returns:
             Optional[EmailVerificationResult]: Validation result or None if validation passed
@@ -148,38 +403,133 @@ class InitialValidationModel:
         # Extract domain
         _, domain = email.split('@')
         
+        # Steps 2-4: Domain-level checks
+        verdict = self.validate_domain(domain, mx_records)
+        if verdict:
+            return EmailVerificationResult(email=email, **verdict)
+        
+        suppressed = self.check_suppressed_address(email)
+        if suppressed:
+            return suppressed
+        
+        # If all validation checks pass, return None to continue with verification
+        return None
+    
+    def check_suppressed_address(self, email: str) -> Optional[EmailVerificationResult]:
+        """
+        Check if an address itself is on the suppression list.
+        
+        The suppression index holds both domains and full addresses; the
+        domain entries are checked by validate_domain.
+        
+        Args:
+            email: The email address
+            
+        Returns:
+            Optional[EmailVerificationResult]: An invalid result if the
+            address is suppressed, None otherwise
+        """
+        if self.suppression_index is None or email not in self.suppression_index:
+            return None
+        
+        logger.info(f"Address is on suppression list: {email}")
+        return EmailVerificationResult(
+            email=email,
+            category=INVALID,
+            reason="Address is on suppression list",
+            provider=email.split('@')[-1].lower()
+        )
+    
+    def validate_domain(self, domain: str, mx_records: Optional[List[str]] = None,
+                        resolve: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Run the checks that depend only on the domain of an email address.
+        
+        The result applies to every address on the domain, so batch callers
+        can run these checks once per domain.
+        
+        Args:
+            domain: The domain to validate
+            mx_records: Already resolved MX records for the domain, if any
+            resolve: Whether to resolve MX records that were not given; if
+                False and none were given, the MX check is skipped
+            
+        Returns:
+            Optional[Dict[str, Any]]: Verdict (category, reason, provider,
+            details) shared by all addresses on the domain, or None if
+            validation passed
+        """
         # Step 2: Check if domain is blacklisted
-        if domain in self.settings_model.get_blacklisted_domains():
+        if self.settings_model.is_domain_blacklisted(domain):
             logger.info(f"Domain is blacklisted: {domain}")
-            return EmailVerificationResult(
-                email=email,
-                category=INVALID,
-                reason="Domain is blacklisted",
-                provider=domain
-            )
+            return {
+                "category": INVALID,
+                "reason": "Domain is blacklisted",
+                "provider": domain,
+                "details": None
+            }
         
         # Step 3: Check if domain should be skipped (whitelisted)
-        if domain in self.settings_model.get_whitelisted_domains():
+        if self.settings_model.is_domain_whitelisted(domain):
             logger.info(f"Domain in whitelist: {domain}")
-            return EmailVerificationResult(
-                email=email,
-                category=VALID,
-                reason="Domain in whitelist",
-                provider=domain
-            )
+            return {
+                "category": VALID,
+                "reason": "Domain in whitelist",
+                "provider": domain,
+                "details": None
+            }
+        
+        # Step 4: Check third-party suppression and disposable-domain lists
+        if self.suppression_index is not None and domain in self.suppression_index:
+            logger.info(f"Domain is on suppression list: {domain}")
+            return {
+                "category": INVALID,
+                "reason": "Domain is on suppression list",
+                "provider": domain,
+                "details": None
+            }
+        
+        if self.disposable_index is not None and domain in self.disposable_index:
+            logger.info(f"Disposable email domain: {domain}")
+            return {
+                "category": RISKY,
+                "reason": "Disposable email domain",
+                "provider": domain,
+                "details": None
+            }
         
-        # Step 4: Check MX records
-        mx_records = self.get_mx_records(domain)
+        # Step 5: Check MX records
+        if mx_records is None:
+            if not resolve:
+                return None
+            mx_records = self.get_mx_records(domain)
         
         if not mx_records:
+            entry = self.dns_cache.get(domain, MX)
+            details = None
+            if entry and entry["status"] != STATUS_OK:
+                details = {"dns_status": entry["status"], "dns_reason": entry["reason"]}
+            
+            if entry is None or entry["status"] == STATUS_TIMEOUT:
+                # The lookup failed, which says nothing about the domain;
+                # batch callers retry it later
+                logger.warning(f"MX lookup failed temporarily: {domain}")
+                details = details or {"dns_status": None, "dns_reason": "DNS lookup failed"}
+                details["temporary"] = True
+                return {
+                    "category": RISKY,
+                    "reason": "MX lookup failed temporarily",
+                    "provider": "unknown",
+                    "details": details
+                }
+            
             logger.warning(f"Domain has no mail servers: {domain}")
-            return EmailVerificationResult(
-                email=email,
-                category=INVALID,
-                reason="Domain has no mail servers",
-                provider="unknown"
-            )
+            return {
+                "category": INVALID,
+                "reason": "Domain has no mail servers",
+                "provider": "unknown",
+                "details": details
+            }
         
-        # If all validation checks pass, return None to continue with verification
         return None
 
@@ -0,0 +1,142 @@
+import time
+import sqlite3
+import logging
+from typing import Dict, Any
+from models.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Assumed latency (seconds) and share of definitive results for methods
+# that have not been observed yet
+DEFAULT_METHOD_STATS = {
+    "smtp": {"avg_seconds": 5.0, "definitive_rate": 0.7},
+    "api": {"avg_seconds": 3.0, "definitive_rate": 0.6},
+    "selenium": {"avg_seconds": 30.0, "definitive_rate": 0.8}
+}
+
+class MethodStatsModel:
+    """Model for recording observed latency and outcomes of verification methods."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the method statistics store.
+        
+        Totals are kept in a SQLite database shared by all processes, so
+        estimates improve with every verification that runs.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        self.stats_file = self.settings_model.get("method_stats_file", "./data/method_stats.db")
+        
+        try:
+            self.store = SQLiteStore(self.stats_file, [
+                """CREATE TABLE IF NOT EXISTS method_stats (
+                    method TEXT PRIMARY KEY,
+                    samples INTEGER NOT NULL,
+                    total_seconds REAL NOT NULL,
+                    definitive INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )""",
+                """CREATE TABLE IF NOT EXISTS method_counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )"""
+            ])
+        except sqlite3.Error as e:
+            logger.error(f"Error opening method statistics {self.stats_file}: {e}")
+            self.store = None
+    
+    def record(self, method: str, seconds: float, definitive: bool) -> None:
+        """
+        Record one run of a verification method.
+        
+        Args:
+            method: The method name (smtp, api, selenium)
+            seconds: How long the method took
+            definitive: Whether it produced a valid/invalid result
+        """
+        if not self.store:
+            return
+        
+        try:
+            self.store.execute(
+                "INSERT INTO method_stats (method, samples, total_seconds, definitive, updated_at) "
+                "VALUES (?, 1, ?, ?, ?) "
+                "ON CONFLICT(method) DO UPDATE SET samples = samples + 1, "
+                "total_seconds = total_seconds + excluded.total_seconds, "
+                "definitive = definitive + excluded.definitive, updated_at = excluded.updated_at",
+                (method, seconds, int(definitive), time.time())
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Error recording statistics for {method}: {e}")
+    
+    def increment(self, name: str, amount: int = 1) -> None:
+        """
+        Increase a named counter (e.g. smtp_fallbacks_avoided).
+        
+        Args:
+            name: The counter name
+            amount: How much to add
+        """
+        if not self.store:
+            return
+        
+        try:
+            self.store.execute(
+                "INSERT INTO method_counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Error updating counter {name}: {e}")
+    
+    def get_counters(self) -> Dict[str, int]:
+        """
+        Get all named counters.
+        
+        Returns:
+            Dict[str, int]: Counter name -> value
+        """
+        if not self.store:
+            return {}
+        
+        try:
+            return dict(self.store.query("SELECT name, value FROM method_counters"))
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading counters: {e}")
+            return {}
+    
+    def get_method_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the average latency and definitive-result rate of each method.
+        
+        Methods without observations use the defaults.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Method -> avg_seconds, definitive_rate,
+            samples and source ("observed" or "default")
+        """
+        stats = {
+            method: dict(values, samples=0, source="default")
+            for method, values in DEFAULT_METHOD_STATS.items()
+        }
+        
+        if not self.store:
+            return stats
+        
+        try:
+            rows = self.store.query("SELECT method, samples, total_seconds, definitive FROM method_stats")
+            for method, samples, total_seconds, definitive in rows:
+                if samples:
+                    stats[method] = {
+                        "avg_seconds": round(total_seconds / samples, 3),
+                        "definitive_rate": round(definitive / samples, 3),
+                        "samples": samples,
+                        "source": "observed"
+                    }
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading method statistics: {e}")
+        
+        return stats
@@ -38,6 +38,9 @@ class MultiTerminalModel:
         
         # Lock for thread safety
         self.lock = threading.RLock()
+        
+        # Rate limiter will be initialized by the controller
+        self.rate_limiter = None
     
     def get_lock(self):
         """
@@ -48,6 +51,29 @@ class MultiTerminalModel:
         """
         return self.lock
     
+    def set_rate_limiter(self, rate_limiter):
+        """
+        Set the rate limiter.
+        
+        Once set, the verification methods pace themselves per domain and
+        per host, so the fixed pause between emails is skipped.
+        
+        Args:
+            rate_limiter: The rate limiter instance
+        """
+        self.rate_limiter = rate_limiter
+    
+    def _pause_between_emails(self, min_seconds: float, max_seconds: float) -> None:
+        """
+        Pause between two verifications unless a rate limiter paces them.
+        
+        Args:
+            min_seconds: Shortest pause
+            max_seconds: Longest pause
+        """
+        if self.rate_limiter is None:
+            time.sleep(random.uniform(min_seconds, max_seconds))
+    
     def enable_multi_terminal(self) -> None:
         """Enable multi-terminal support."""
         self.multi_terminal_enabled = True
@@ -199,7 +225,7 @@ class MultiTerminalModel:
                 self.email_queue.task_done()
                 
                 # Add a delay to avoid rate limiting
-                time.sleep(random.uniform(1, 2))
+                self._pause_between_emails(1, 2)
             
             except queue.Empty:
                 # No more emails to verify
@@ -261,13 +287,13 @@ class MultiTerminalModel:
                             # If process creation failed, verify emails in this chunk directly
                             for email in chunk:
                                 results[email] = verify_email_func(email)
-                                time.sleep(random.uniform(2, 4))
+                                self._pause_between_emails(2, 4)
                     except Exception as e:
                         logger.error(f"Error starting terminal process {i+1}: {e}")
                         # Verify emails in this chunk directly
                         for email in chunk:
                             results[email] = verify_email_func(email)
-                            time.sleep(random.uniform(2, 4))
+                            self._pause_between_emails(2, 4)
                 
                 # Wait for all processes to complete
                 for process in processes:
@@ -318,7 +344,7 @@ class MultiTerminalModel:
             for email in emails:
                 results[email] = verify_email_func(email)
                 # Add a delay between checks to avoid rate limiting
-                time.sleep(random.uniform(2, 4))
+                self._pause_between_emails(2, 4)
         
         return results
 
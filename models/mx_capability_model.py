@@ -0,0 +1,267 @@
+import ssl
+import time
+import smtplib
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# smtp_tls_policy values
+TLS_OPPORTUNISTIC = "opportunistic"  # STARTTLS when offered and known to work
+TLS_REQUIRED = "required"            # Refuse hosts without working STARTTLS
+TLS_NEVER = "never"                  # Stay in plaintext; saves two round trips
+TLS_POLICIES = (TLS_OPPORTUNISTIC, TLS_REQUIRED, TLS_NEVER)
+
+# TLS outcomes recorded per host
+TLS_OK = "ok"
+TLS_FAILED = "failed"
+TLS_NOT_OFFERED = "not_offered"
+TLS_SKIPPED = "skipped"
+
+class MXCapabilities:
+    """What one MX host advertised and how TLS went with it."""
+    
+    __slots__ = ("extensions", "size", "pipelining", "starttls", "tls_outcome",
+                 "tls_session", "tls_resumed", "tls_failed_at", "updated_at")
+    
+    def __init__(self):
+        self.extensions: Dict[str, str] = {}
+        self.size: Optional[int] = None
+        self.pipelining = False
+        self.starttls = False
+        self.tls_outcome: Optional[str] = None
+        self.tls_session: Optional[ssl.SSLSession] = None
+        self.tls_resumed = 0
+        self.tls_failed_at = 0.0
+        self.updated_at = 0.0
+
+class MXCapabilityModel:
+    """Model for caching EHLO capabilities and TLS outcomes per MX host."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the capability cache.
+        
+        Entries expire after mx_capability_ttl seconds. smtp_tls_policy
+        decides whether STARTTLS is used (see TLS_POLICIES); under the
+        opportunistic policy a host whose TLS handshake failed gets no
+        STARTTLS for the next mx_capability_ttl seconds, instead of failing
+        the same way on every connection. With smtp_tls_session_resumption
+        the TLS session of each host is kept and offered on the next
+        handshake, which then skips the key exchange.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.ttl = self.settings_model.get_float("mx_capability_ttl", 3600.0)
+        self.policy = str(self.settings_model.get("smtp_tls_policy", TLS_OPPORTUNISTIC)).lower()
+        if self.policy not in TLS_POLICIES:
+            logger.warning(f"Unknown smtp_tls_policy {self.policy!r}, using {TLS_OPPORTUNISTIC}")
+            self.policy = TLS_OPPORTUNISTIC
+        self.resumption = self.settings_model.is_enabled("smtp_tls_session_resumption")
+        
+        # One context for all handshakes; sessions only resume on the context
+        # that created them. Like smtplib's starttls(), certificates are not
+        # verified: probes only read RCPT replies and MX certificates rarely
+        # match their names.
+        self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        self.tls_context.check_hostname = False
+        self.tls_context.verify_mode = ssl.CERT_NONE
+        
+        self.hosts: Dict[str, MXCapabilities] = {}
+        self.lock = threading.Lock()
+    
+    def _get_fresh(self, host: str) -> Optional[MXCapabilities]:
+        """Get a host's entry unless it has expired (lock held)."""
+        capabilities = self.hosts.get(host.lower())
+        if capabilities is not None and time.monotonic() - capabilities.updated_at > self.ttl:
+            del self.hosts[host.lower()]
+            return None
+        return capabilities
+    
+    def _get_or_create(self, host: str) -> MXCapabilities:
+        """Get a host's entry, creating it if needed (lock held)."""
+        capabilities = self._get_fresh(host)
+        if capabilities is None:
+            capabilities = MXCapabilities()
+            capabilities.updated_at = time.monotonic()
+            self.hosts[host.lower()] = capabilities
+        return capabilities
+    
+    def get(self, host: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached capabilities of a host.
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            Optional[Dict[str, Any]]: "extensions", "size", "pipelining",
+            "starttls", "tls_outcome" and "tls_resumed", or None if unknown
+        """
+        with self.lock:
+            capabilities = self._get_fresh(host)
+            if capabilities is None:
+                return None
+            return {
+                "extensions": dict(capabilities.extensions),
+                "size": capabilities.size,
+                "pipelining": capabilities.pipelining,
+                "starttls": capabilities.starttls,
+                "tls_outcome": capabilities.tls_outcome,
+                "tls_resumed": capabilities.tls_resumed
+            }
+    
+    def get_all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the cached capabilities of every host seen recently.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Capabilities per host (see get())
+        """
+        with self.lock:
+            hosts = list(self.hosts)
+        capabilities = {host: self.get(host) for host in hosts}
+        return {host: entry for host, entry in capabilities.items() if entry is not None}
+    
+    def supports_pipelining(self, host: str) -> Optional[bool]:
+        """
+        Check whether a host advertised PIPELINING, without connecting.
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            Optional[bool]: The cached answer, or None if the host is unknown
+        """
+        with self.lock:
+            capabilities = self._get_fresh(host)
+            return capabilities.pipelining if capabilities is not None else None
+    
+    def policy_refusal(self, host: str) -> Optional[str]:
+        """
+        Check, without connecting, whether a host is known to fail a required TLS policy.
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            Optional[str]: Why the host cannot be used, or None if it may be tried
+        """
+        if self.policy != TLS_REQUIRED:
+            return None
+        with self.lock:
+            capabilities = self._get_fresh(host)
+            if capabilities is None:
+                return None
+            if capabilities.tls_outcome == TLS_NOT_OFFERED:
+                return f"{host} does not offer STARTTLS, which smtp_tls_policy requires"
+            if (capabilities.tls_outcome == TLS_FAILED
+                    and time.monotonic() - capabilities.tls_failed_at < self.ttl):
+                return f"TLS with {host} failed, and smtp_tls_policy requires it"
+        return None
+    
+    def should_starttls(self, host: str, offered: bool) -> bool:
+        """
+        Decide whether to upgrade a connection with STARTTLS.
+        
+        Args:
+            host: The MX host
+            offered: Whether the host advertised STARTTLS
+        
+        Returns:
+            bool: True to send STARTTLS
+        
+        Raises:
+            smtplib.SMTPNotSupportedError: If TLS is required but the host
+            does not offer it
+        """
+        if self.policy == TLS_NEVER:
+            return False
+        if not offered:
+            if self.policy == TLS_REQUIRED:
+                # Remembered so the host is not connected to again
+                self.record_tls(host, TLS_NOT_OFFERED)
+                raise smtplib.SMTPNotSupportedError(f"{host} does not offer STARTTLS, "
+                                                    f"which smtp_tls_policy requires")
+            return False
+        if self.policy == TLS_OPPORTUNISTIC:
+            with self.lock:
+                capabilities = self._get_fresh(host)
+                if (capabilities is not None and capabilities.tls_outcome == TLS_FAILED
+                        and time.monotonic() - capabilities.tls_failed_at < self.ttl):
+                    # Failed before; plaintext works and costs no handshake
+                    return False
+        return True
+    
+    def get_tls_session(self, host: str) -> Optional[ssl.SSLSession]:
+        """
+        Get the TLS session to resume with a host.
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            Optional[ssl.SSLSession]: The last session, if resumption is enabled
+        """
+        if not self.resumption:
+            return None
+        with self.lock:
+            capabilities = self._get_fresh(host)
+            return capabilities.tls_session if capabilities is not None else None
+    
+    def record_ehlo(self, host: str, extensions: Dict[str, str]) -> None:
+        """
+        Record what a host advertised in its last EHLO reply.
+        
+        Args:
+            host: The MX host
+            extensions: Extension keywords (lowercase) and their parameters
+        """
+        size = None
+        try:
+            size = int(extensions.get("size", "").split()[0])
+        except (IndexError, ValueError):
+            pass
+        
+        with self.lock:
+            capabilities = self._get_or_create(host)
+            capabilities.extensions = dict(extensions)
+            capabilities.size = size
+            capabilities.pipelining = "pipelining" in extensions
+            capabilities.starttls = capabilities.starttls or "starttls" in extensions
+            capabilities.updated_at = time.monotonic()
+    
+    def record_tls(self, host: str, outcome: str, session: Optional[ssl.SSLSession] = None,
+                   resumed: bool = False) -> None:
+        """
+        Record how TLS went with a host.
+        
+        Args:
+            host: The MX host
+            outcome: TLS_OK, TLS_FAILED, TLS_NOT_OFFERED or TLS_SKIPPED
+            session: The TLS session after a successful handshake
+            resumed: Whether the handshake resumed a cached session
+        """
+        with self.lock:
+            capabilities = self._get_or_create(host)
+            if not (outcome == TLS_SKIPPED and capabilities.tls_outcome == TLS_FAILED):
+                # Skipping TLS because it failed must not forget the failure
+                capabilities.tls_outcome = outcome
+            if outcome == TLS_OK:
+                capabilities.starttls = True
+                if session is not None and self.resumption:
+                    capabilities.tls_session = session
+                if resumed:
+                    capabilities.tls_resumed += 1
+            elif outcome == TLS_FAILED:
+                capabilities.tls_session = None
+                capabilities.tls_failed_at = time.monotonic()
+            capabilities.updated_at = time.monotonic()
+        
+        if outcome == TLS_FAILED:
+            logger.info(f"TLS with {host} failed; using plaintext for the next {self.ttl:.0f}s"
+                        if self.policy == TLS_OPPORTUNISTIC else f"TLS with {host} failed")
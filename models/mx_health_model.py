@@ -0,0 +1,186 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the latency moving average
+LATENCY_SMOOTHING = 0.3
+
+# Health tiers used to order attempts
+TIER_HEALTHY = 0
+TIER_DEGRADED = 1
+TIER_OPEN = 2
+
+class MXHostHealth:
+    """Observed health of one MX host."""
+    
+    __slots__ = ("attempts", "failures", "consecutive_failures", "avg_latency",
+                 "last_failure", "last_error", "open_until")
+    
+    def __init__(self):
+        self.attempts = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.avg_latency: Optional[float] = None
+        self.last_failure = 0.0
+        self.last_error: Optional[str] = None
+        self.open_until = 0.0
+
+class MXHealthModel:
+    """Model for tracking MX host health and circuit breaking dead hosts."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the MX health scoreboard.
+        
+        A host whose connections fail mx_circuit_failure_threshold times in
+        a row has its circuit opened: it is skipped for mx_circuit_open_seconds,
+        then tried again once. A host is degraded while it failed within the
+        last mx_degraded_seconds, or while at least half of its recent
+        attempts failed; degraded hosts are tried after healthy ones.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.failure_threshold = self.settings_model.get_int("mx_circuit_failure_threshold", 3)
+        self.open_seconds = self.settings_model.get_float("mx_circuit_open_seconds", 300.0)
+        self.degraded_seconds = self.settings_model.get_float("mx_degraded_seconds", 60.0)
+        
+        self.hosts: Dict[str, MXHostHealth] = {}
+        self.lock = threading.Lock()
+    
+    def _get_host(self, host: str) -> MXHostHealth:
+        """Get the health record of a host, creating it if needed (lock held)."""
+        key = host.lower()
+        health = self.hosts.get(key)
+        if health is None:
+            health = MXHostHealth()
+            self.hosts[key] = health
+        return health
+    
+    def _tier(self, health: Optional[MXHostHealth], now: float) -> int:
+        """Get the health tier of a host (lock held)."""
+        if health is None:
+            return TIER_HEALTHY
+        if health.open_until > now:
+            return TIER_OPEN
+        if now - health.last_failure < self.degraded_seconds:
+            return TIER_DEGRADED
+        if health.attempts >= 4 and health.failures * 2 >= health.attempts:
+            return TIER_DEGRADED
+        return TIER_HEALTHY
+    
+    def order(self, mx_servers: List[str]) -> List[str]:
+        """
+        Order MX hosts for an attempt.
+        
+        Healthy hosts keep their MX preference order, followed by degraded
+        hosts (fastest first). Hosts with an open circuit are left out, so
+        the result is empty when every host's circuit is open.
+        
+        Args:
+            mx_servers: MX hosts in preference order
+        
+        Returns:
+            List[str]: The hosts to try, in order
+        """
+        now = time.monotonic()
+        with self.lock:
+            ranked = []
+            for position, host in enumerate(mx_servers):
+                health = self.hosts.get(host.lower())
+                tier = self._tier(health, now)
+                if tier == TIER_OPEN:
+                    continue
+                # Latency only breaks ties among degraded hosts
+                latency = 0.0
+                if tier == TIER_DEGRADED and health.avg_latency is not None:
+                    latency = health.avg_latency
+                ranked.append((tier, latency, position, host))
+        
+        ranked.sort()
+        return [host for _, _, _, host in ranked]
+    
+    def is_open(self, host: str) -> bool:
+        """
+        Check if a host's circuit is open.
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            bool: True if the host is being skipped
+        """
+        with self.lock:
+            health = self.hosts.get(host.lower())
+            return health is not None and health.open_until > time.monotonic()
+    
+    def record_success(self, host: str, latency: float) -> None:
+        """
+        Record an attempt that got an SMTP reply.
+        
+        Args:
+            host: The MX host
+            latency: Seconds the attempt took
+        """
+        with self.lock:
+            health = self._get_host(host)
+            health.attempts += 1
+            health.consecutive_failures = 0
+            health.open_until = 0.0
+            if health.avg_latency is None:
+                health.avg_latency = latency
+            else:
+                health.avg_latency += LATENCY_SMOOTHING * (latency - health.avg_latency)
+    
+    def record_failure(self, host: str, error: str) -> None:
+        """
+        Record an attempt that failed to reach the host.
+        
+        Args:
+            host: The MX host
+            error: Description of the failure
+        """
+        now = time.monotonic()
+        with self.lock:
+            health = self._get_host(host)
+            health.attempts += 1
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_failure = now
+            health.last_error = error
+            opened = health.consecutive_failures >= self.failure_threshold and health.open_until <= now
+            if opened:
+                health.open_until = now + self.open_seconds
+        
+        if opened:
+            logger.warning(f"MX host {host} failed {self.failure_threshold}+ times in a row, "
+                           f"skipping it for {self.open_seconds:.0f}s: {error}")
+    
+    def get_statistics(self) -> List[Dict[str, Any]]:
+        """
+        Get the scoreboard.
+        
+        Returns:
+            List[Dict[str, Any]]: Per-host attempts, failures, error rate,
+            average latency, last error and circuit state
+        """
+        now = time.monotonic()
+        with self.lock:
+            rows = []
+            for host, health in self.hosts.items():
+                rows.append({
+                    "host": host,
+                    "attempts": health.attempts,
+                    "failures": health.failures,
+                    "error_rate": round(health.failures / health.attempts, 3) if health.attempts else 0.0,
+                    "avg_latency": round(health.avg_latency, 3) if health.avg_latency is not None else None,
+                    "seconds_since_failure": round(now - health.last_failure, 1) if health.last_failure else None,
+                    "last_error": health.last_error,
+                    "circuit_open": health.open_until > now
+                })
+        return sorted(rows, key=lambda row: row["host"])
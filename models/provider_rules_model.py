@@ -0,0 +1,182 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rules written to the rules file when it does not exist yet
+DEFAULT_PROVIDER_RULES = [
+    {
+        "provider": "customGoogle",
+        "login_provider": "gmail.com",
+        "mx_suffixes": ["google.com", "googlemail.com", "gmail.com"],
+        "mx_keywords": ["google", "gmail"]
+    },
+    {
+        "provider": "outlook.com",
+        "login_provider": "outlook.com",
+        "mx_suffixes": ["protection.outlook.com", "outlook.com", "hotmail.com", "office365.com", "microsoft.com"],
+        "mx_keywords": ["outlook", "microsoft", "office365"]
+    },
+    {
+        "provider": "yahoo.com",
+        "login_provider": "yahoo.com",
+        "mx_suffixes": ["yahoodns.net", "yahoo.com"],
+        "mx_keywords": ["yahoo"]
+    },
+    {
+        "provider": "protonmail.com",
+        "login_provider": "protonmail.com",
+        "mx_suffixes": ["protonmail.ch", "proton.me", "protonmail.com"],
+        "mx_keywords": ["protonmail", "proton.me"]
+    },
+    {
+        "provider": "zoho.com",
+        "login_provider": "zoho.com",
+        "mx_suffixes": ["zoho.com", "zoho.eu", "zoho.in", "zohomail.com"],
+        "mx_keywords": ["zoho"]
+    },
+    {
+        "provider": "mail.ru",
+        "login_provider": "mail.ru",
+        "mx_suffixes": ["mail.ru"],
+        "mx_keywords": ["mail.ru"]
+    },
+    {
+        "provider": "yandex.ru",
+        "login_provider": "yandex.ru",
+        "mx_suffixes": ["yandex.net", "yandex.ru"],
+        "mx_keywords": ["yandex"]
+    }
+]
+
+class ProviderRulesModel:
+    """Model for identifying the provider behind a set of MX hosts."""
+    
+    def __init__(self, settings_model, login_urls: Dict[str, str]):
+        """
+        Initialize the provider rules engine.
+        
+        Rules are loaded from a JSON file so that providers can be added
+        without code changes. Each rule names a provider, the known provider
+        whose login URL it uses, the MX host suffixes that identify it and
+        keywords used as a fallback for hosts no suffix matches.
+        
+        Args:
+            settings_model: The settings model instance
+            login_urls: Login URL of each known provider
+        """
+        self.settings_model = settings_model
+        self.login_urls = login_urls
+        self.rules_file = self.settings_model.get("provider_rules_file", "./settings/provider_rules.json")
+        
+        # MX host suffix -> rule, and (keyword, rule) pairs in rule order
+        self.suffix_index: Dict[str, Dict[str, Any]] = {}
+        self.keywords: List[Tuple[str, Dict[str, Any]]] = []
+        
+        # Domain -> (provider, login_url), filled on first identification
+        self.memo: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.lock = threading.Lock()
+        
+        self.load_rules()
+    
+    def _ensure_rules_file(self) -> None:
+        """Create the rules file with the default rules if it doesn't exist."""
+        if os.path.exists(self.rules_file):
+            return
+        
+        directory = os.path.dirname(self.rules_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.rules_file, 'w', encoding='utf-8') as f:
+            json.dump(DEFAULT_PROVIDER_RULES, f, indent=4)
+    
+    def load_rules(self) -> None:
+        """Load the rules file and rebuild the index."""
+        try:
+            self._ensure_rules_file()
+            with open(self.rules_file, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading provider rules from {self.rules_file}: {e}")
+            rules = DEFAULT_PROVIDER_RULES
+        
+        suffix_index = {}
+        keywords = []
+        for rule in rules:
+            if not rule.get("provider"):
+                logger.warning(f"Skipping provider rule without a provider: {rule}")
+                continue
+            for suffix in rule.get("mx_suffixes", []):
+                # The first rule claiming a suffix wins
+                suffix_index.setdefault(suffix.lower().strip('.'), rule)
+            for keyword in rule.get("mx_keywords", []):
+                keywords.append((keyword.lower(), rule))
+        
+        with self.lock:
+            self.suffix_index = suffix_index
+            self.keywords = keywords
+            self.memo = {}
+        
+        logger.info(f"Loaded {len(rules)} provider rules with {len(suffix_index)} MX suffixes")
+    
+    def match_host(self, host: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the rule for a single MX host.
+        
+        The host's suffixes are looked up from longest to shortest, so the
+        cost depends on the number of labels rather than the number of rules.
+        
+        Args:
+            host: The MX host name
+        
+        Returns:
+            Optional[Dict[str, Any]]: The matching rule, or None
+        """
+        host = host.lower().rstrip('.')
+        
+        labels = host.split('.')
+        for i in range(len(labels)):
+            rule = self.suffix_index.get('.'.join(labels[i:]))
+            if rule:
+                return rule
+        
+        for keyword, rule in self.keywords:
+            if keyword in host:
+                return rule
+        
+        return None
+    
+    def identify(self, domain: str, mx_records: List[str]) -> Tuple[str, Optional[str]]:
+        """
+        Identify the provider of a domain from its MX records.
+        
+        Results are memoized per domain. Domains without MX records are not
+        memoized, since a later lookup may still succeed.
+        
+        Args:
+            domain: The domain
+            mx_records: MX hosts of the domain, most preferred first
+        
+        Returns:
+            Tuple[str, Optional[str]]: (provider_name, login_url), or
+            ('custom', None) if no rule matches
+        """
+        domain = domain.lower()
+        cached = self.memo.get(domain)
+        if cached:
+            return cached
+        
+        result = ('custom', None)
+        for mx in mx_records or []:
+            rule = self.match_host(mx)
+            if rule:
+                result = (rule["provider"], self.login_urls.get(rule.get("login_provider")))
+                break
+        
+        if mx_records:
+            with self.lock:
+                self.memo[domain] = result
+        return result
@@ -0,0 +1,271 @@
+import time
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, TypeVar
+from models.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Buckets idle longer than their refill time are full again and can be
+# dropped; pruning starts once this many keys are tracked
+MAX_IDLE_BUCKETS = 100000
+
+# Shared buckets are pruned after this many updates in a process
+SHARED_PRUNE_INTERVAL = 1000
+
+T = TypeVar("T")
+
+class TokenBucket:
+    """Token bucket for one key. Not thread safe; guarded by RateLimiterModel."""
+    
+    __slots__ = ("tokens", "updated_at", "backoff_until")
+    
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated_at = now
+        self.backoff_until = 0.0
+    
+    def refill(self, capacity: float, rate: float, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        if now > self.updated_at:
+            self.tokens = min(capacity, self.tokens + (now - self.updated_at) * rate)
+            self.updated_at = now
+    
+    def wait_time(self, rate: float, now: float) -> float:
+        """Seconds until a token is available and any backoff has ended."""
+        token_wait = (1 - self.tokens) / rate if self.tokens < 1 else 0.0
+        return max(token_wait, self.backoff_until - now, 0.0)
+
+class RateLimiterModel:
+    """Model for pacing requests per domain and per remote host with token buckets."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the rate limiter.
+        
+        Each key (a domain, or an MX host via host_key()) gets a bucket of
+        rate_limit_max_requests tokens refilled evenly over
+        rate_limit_time_window seconds. Keys are independent, so one slow
+        domain does not hold back the others.
+        
+        With rate_limit_shared, or when terminals run as separate processes
+        (real_multiple_terminals), the buckets live in a SQLite database
+        (rate_limit_state_file) shared by every process, so the limits hold
+        for all of them together rather than for each one.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        max_requests, time_window = self.settings_model.get_rate_limit_settings()
+        self.capacity = float(max(1, max_requests))
+        self.rate = self.capacity / max(1, time_window)
+        
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+        
+        self.store = None
+        self.shared_updates = 0
+        shared = self.settings_model.is_enabled("rate_limit_shared") or (
+            self.settings_model.is_enabled("multi_terminal_enabled")
+            and self.settings_model.is_enabled("real_multiple_terminals")
+        )
+        if shared:
+            state_file = self.settings_model.get("rate_limit_state_file", "./data/rate_limits.db")
+            try:
+                self.store = SQLiteStore(state_file, [
+                    """CREATE TABLE IF NOT EXISTS rate_buckets (
+                        key TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        backoff_until REAL NOT NULL
+                    )"""
+                ])
+                self._prune_shared()
+            except sqlite3.Error as e:
+                logger.error(f"Error opening shared rate limit state {state_file}, "
+                             f"limiting this process only: {e}")
+                self.store = None
+    
+    @staticmethod
+    def host_key(host: str) -> str:
+        """
+        Get the key of a remote host, kept apart from domain keys.
+        
+        Args:
+            host: The host name (e.g. an MX host)
+        
+        Returns:
+            str: The rate limiter key
+        """
+        return f"host:{host.lower()}"
+    
+    def _get_bucket(self, key: str, now: float) -> TokenBucket:
+        """Get the refilled bucket of a key, creating it if needed (lock held)."""
+        key = key.lower()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_IDLE_BUCKETS:
+                self._prune(now)
+            bucket = TokenBucket(self.capacity, now)
+            self.buckets[key] = bucket
+        else:
+            bucket.refill(self.capacity, self.rate, now)
+        return bucket
+    
+    def _prune(self, now: float) -> None:
+        """Drop buckets that have refilled completely (lock held)."""
+        full_after = self.capacity / self.rate
+        idle: List[str] = [
+            key for key, bucket in self.buckets.items()
+            if now - bucket.updated_at > full_after and now >= bucket.backoff_until
+        ]
+        for key in idle:
+            del self.buckets[key]
+    
+    def _prune_shared(self) -> None:
+        """Delete shared buckets that have refilled completely."""
+        now = time.time()
+        self.store.execute(
+            "DELETE FROM rate_buckets WHERE updated_at < ? AND backoff_until <= ?",
+            (now - self.capacity / self.rate, now)
+        )
+    
+    def _update(self, key: str, update: Callable[[TokenBucket, float], T]) -> T:
+        """
+        Apply a change to the refilled bucket of a key.
+        
+        Shared buckets are read, changed and written back in one transaction
+        so concurrent processes see each other's requests. If the shared
+        state cannot be used, this process's own buckets are used instead.
+        
+        Args:
+            key: The domain or host key
+            update: Function of the bucket and the current time
+        
+        Returns:
+            T: What update returned
+        """
+        if self.store is not None:
+            # Wall-clock time, comparable between processes
+            now = time.time()
+            try:
+                with self.store.transaction() as conn:
+                    row = conn.execute(
+                        "SELECT tokens, updated_at, backoff_until FROM rate_buckets WHERE key = ?",
+                        (key.lower(),)
+                    ).fetchone()
+                    bucket = TokenBucket(self.capacity, now)
+                    if row:
+                        bucket.tokens, bucket.updated_at, bucket.backoff_until = row
+                        bucket.refill(self.capacity, self.rate, now)
+                    value = update(bucket, now)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at, backoff_until) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key.lower(), bucket.tokens, bucket.updated_at, bucket.backoff_until)
+                    )
+                
+                self.shared_updates += 1
+                if self.shared_updates % SHARED_PRUNE_INTERVAL == 0:
+                    self._prune_shared()
+                return value
+            except sqlite3.Error as e:
+                logger.warning(f"Shared rate limit state unavailable, limiting this process only: {e}")
+        
+        now = time.monotonic()
+        with self.lock:
+            return update(self._get_bucket(key, now), now)
+    
+    def is_rate_limited(self, key: str) -> bool:
+        """
+        Check if a request for a key would have to wait.
+        
+        Args:
+            key: The domain or host key
+        
+        Returns:
+            bool: True if no token is available or a backoff is active
+        """
+        return self.get_backoff_time(key) > 0
+    
+    def get_backoff_time(self, key: str) -> float:
+        """
+        Get how long a request for a key would have to wait.
+        
+        Args:
+            key: The domain or host key
+        
+        Returns:
+            float: Seconds until a request is allowed
+        """
+        return self._update(key, lambda bucket, now: bucket.wait_time(self.rate, now))
+    
+    def add_request(self, key: str) -> None:
+        """
+        Record a request for a key, using one token.
+        
+        Args:
+            key: The domain or host key
+        """
+        def use_token(bucket: TokenBucket, now: float) -> None:
+            bucket.tokens -= 1
+        
+        self._update(key, use_token)
+    
+    def set_backoff(self, key: str, seconds: float) -> None:
+        """
+        Hold back all requests for a key, e.g. after the remote side throttled us.
+        
+        Args:
+            key: The domain or host key
+            seconds: How long to hold back
+        """
+        def hold_back(bucket: TokenBucket, now: float) -> None:
+            bucket.backoff_until = max(bucket.backoff_until, now + seconds)
+        
+        self._update(key, hold_back)
+        logger.info(f"Rate limiter backing off {key} for {seconds}s")
+    
+    def reserve(self, key: str, tokens: int = 1) -> float:
+        """
+        Take the next request slot for a key without waiting.
+        
+        The tokens are used immediately, so concurrent callers get successive
+        slots instead of all waking up at once. A request using several
+        tokens (e.g. one per recipient of an SMTP transaction) waits for one
+        token like any other and leaves the bucket in debt, which the
+        requests after it wait out.
+        
+        Args:
+            key: The domain or host key
+            tokens: Tokens the request uses
+        
+        Returns:
+            float: Seconds the caller must wait before sending the request
+        """
+        def take_slot(bucket: TokenBucket, now: float) -> float:
+            wait_time = bucket.wait_time(self.rate, now)
+            bucket.tokens -= tokens
+            return wait_time
+        
+        return self._update(key, take_slot)
+    
+    def acquire(self, key: str, tokens: int = 1) -> float:
+        """
+        Wait until a request for a key is allowed and record it.
+        
+        Args:
+            key: The domain or host key
+            tokens: Tokens the request uses
+        
+        Returns:
+            float: Seconds waited
+        """
+        wait_time = self.reserve(key, tokens)
+        if wait_time > 0:
+            logger.debug(f"Rate limited {key}, waiting {wait_time:.1f}s")
+            time.sleep(wait_time)
+        return wait_time
@@ -2,23 +2,96 @@ import os
 import csv
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 from models.common import EmailVerificationResult, VALID, INVALID, RISKY, CUSTOM
+from models.canonicalization_model import CanonicalizationModel
 
 logger = logging.getLogger(__name__)
 
+class EmailFileIndex:
+    """In-memory set of the canonical emails in an append-only CSV file."""
+    
+    def __init__(self, file_path: str, key_func: Callable[[str], str], has_header: bool = False):
+        """
+        Initialize the index.
+        
+        The file is read once and afterwards only the bytes appended since
+        the last read are parsed, so other processes appending results are
+        picked up without rescanning the whole file.
+        
+        Args:
+            file_path: Path to the CSV file (email in the first column)
+            key_func: Function mapping an email to its canonical key
+            has_header: Whether the first line is a header
+        """
+        self.file_path = file_path
+        self.key_func = key_func
+        self.has_header = has_header
+        self.keys: Set[str] = set()
+        self.offset = 0
+        self.lock = threading.Lock()
+    
+    def refresh(self) -> None:
+        """Parse lines appended to the file since the last refresh."""
+        with self.lock:
+            try:
+                size = os.path.getsize(self.file_path)
+            except OSError:
+                return
+            
+            if size < self.offset:
+                # The file was truncated or replaced; start over
+                self.keys = set()
+                self.offset = 0
+            if size == self.offset:
+                return
+            
+            with open(self.file_path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            
+            # Leave a partially written last line for the next refresh
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                return
+            
+            lines = data[:end].decode('utf-8', errors='replace').splitlines()
+            if self.has_header and self.offset == 0:
+                lines = lines[1:]
+            for row in csv.reader(lines):
+                if row and row[0]:
+                    self.keys.add(self.key_func(row[0]))
+            self.offset += end
+    
+    def contains(self, key: str) -> bool:
+        """
+        Check if a canonical email is in the file.
+        
+        Args:
+            key: The canonical email
+            
+        Returns:
+            bool: True if the email is in the file
+        """
+        self.refresh()
+        return key in self.keys
+
 class ResultsModel:
     """Model for storing and retrieving verification results."""
     
-    def __init__(self, settings_model):
+    def __init__(self, settings_model, canonicalization_model: Optional[CanonicalizationModel] = None):
         """
         Initialize the results model.
         
         Args:
             settings_model: The settings model instance
+            canonicalization_model: Model providing the canonical key of an
+                email; a new one is created if not given
         """
         self.settings_model = settings_model
+        self.canonicalization_model = canonicalization_model or CanonicalizationModel(settings_model)
         
         # Initialize data directory for simple email lists (just email column)
         self.data_dir = "./data"
@@ -73,10 +146,21 @@ class ResultsModel:
         if not os.path.exists(temp_history_file):
             with open(temp_history_file, 'w', encoding='utf-8') as f:
                 json.dump({}, f, indent=4)
+        
+        # Indexes of the data and results files, keyed by canonical email
+        canonicalize = self.canonicalization_model.canonicalize
+        self.data_indexes = {
+            category: EmailFileIndex(file_path, canonicalize)
+            for category, file_path in self.data_files.items()
+        }
+        self.results_indexes = {
+            category: EmailFileIndex(file_path, canonicalize, has_header=True)
+            for category, file_path in self.results_files.items()
+        }
     
     def check_email_in_data(self, email: str) -> Tuple[bool, Optional[str]]:
         """
-        Check if an email exists in any of the data files.
+        Check if an email, or an equivalent form of it, exists in any of the data files.
         
         Args:
             email: The email address to check
@@ -85,14 +169,12 @@ class ResultsModel:
             Tuple[bool, Optional[str]]: (exists, category)
         """
         categories = [VALID, INVALID, RISKY, CUSTOM]
+        key = self.canonicalization_model.canonicalize(email)
         
         for category in categories:
             try:
-                if os.path.exists(self.data_files[category]):
-                    with open(self.data_files[category], 'r', newline='', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        if any(row and row[0] == email for row in reader):
-                            return True, category
+                if self.data_indexes[category].contains(key):
+                    return True, category
             except Exception as e:
                 logger.error(f"Error checking {category}.csv: {e}")
         
@@ -126,11 +208,8 @@ class ResultsModel:
         results_exists = False
         
         try:
-            if os.path.exists(results_file_path):
-                with open(results_file_path, 'r', newline='', encoding='utf-8') as f:
-                    reader = csv.reader(f)
-                    next(reader, None)  # Skip header
-                    results_exists = any(row and row[0] == result.email for row in reader)
+            key = self.canonicalization_model.canonicalize(result.email)
+            results_exists = self.results_indexes[result.category].contains(key)
         except Exception as e:
             logger.error(f"Error checking if email exists in {result.category} results: {e}")
         
@@ -166,10 +245,8 @@ class ResultsModel:
             # Check if email already exists in the file
             exists = False
             try:
-                if os.path.exists(data_file_path):
-                    with open(data_file_path, 'r', newline='', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        exists = any(row and row[0] == email for row in reader)
+                key = self.canonicalization_model.canonicalize(email)
+                exists = self.data_indexes[category].contains(key)
             except Exception as e:
                 logger.error(f"Error checking if email exists in {category} data: {e}")
             
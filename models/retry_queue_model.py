@@ -0,0 +1,125 @@
+import time
+import heapq
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RetryQueueModel:
+    """Model for scheduling addresses that hit temporary SMTP or DNS failures."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the retry queue.
+        
+        Greylisting and other temporary failures (4xx replies, timeouts,
+        failed MX lookups) usually clear after a few minutes. Instead of sleeping inline, the
+        address is deferred and retried once its domain's retry time has
+        passed. The delay starts at smtp_retry_delay seconds and doubles with
+        each retry of the address, and an address is retried at most
+        smtp_retry_max_attempts times, and only while the SMTP time spent
+        on it stays under smtp_probe_deadline. Addresses on a domain are
+        retried together, no earlier than the latest retry time scheduled
+        for it.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.max_attempts = self.settings_model.get_int("smtp_retry_max_attempts", 3)
+        self.base_delay = self.settings_model.get_float("smtp_retry_delay", 60.0)
+        self.deadline = self.settings_model.get_float("smtp_probe_deadline", 30.0)
+        
+        # (due time, sequence, email), ordered by due time
+        self.queue: List[Tuple[float, int, str]] = []
+        self.sequence = 0
+        
+        # Retries used and SMTP seconds spent per email, next retry time per domain
+        self.attempts: Dict[str, int] = {}
+        self.spent: Dict[str, float] = {}
+        self.domain_retry_at: Dict[str, float] = {}
+        
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.queue)
+    
+    def can_defer(self, email: str) -> bool:
+        """
+        Check if an email still has retries left.
+        
+        Args:
+            email: The email address
+        
+        Returns:
+            bool: True if a temporary failure may be deferred
+        """
+        with self.lock:
+            return (self.attempts.get(email, 0) < self.max_attempts
+                    and self.spent.get(email, 0.0) < self.deadline)
+    
+    def defer(self, email: str, reason: str = "", spent: float = 0.0) -> bool:
+        """
+        Schedule an email for a retry after its domain's retry time.
+        
+        Args:
+            email: The email address
+            reason: The temporary failure, for logging
+            spent: Seconds the failed check spent on SMTP
+        
+        Returns:
+            bool: True if scheduled, False if the retry budget is used up
+        """
+        domain = email.split('@')[-1].lower()
+        now = time.monotonic()
+        
+        with self.lock:
+            attempts = self.attempts.get(email, 0)
+            if attempts >= self.max_attempts:
+                return False
+            self.spent[email] = self.spent.get(email, 0.0) + spent
+            self.attempts[email] = attempts + 1
+            
+            # Repeated failures push the domain's retry time out further
+            retry_at = max(
+                self.domain_retry_at.get(domain, 0.0),
+                now + self.base_delay * (2 ** attempts)
+            )
+            self.domain_retry_at[domain] = retry_at
+            
+            heapq.heappush(self.queue, (retry_at, self.sequence, email))
+            self.sequence += 1
+        
+        logger.info(f"Deferred {email} for retry {attempts + 1}/{self.max_attempts} "
+                    f"in {retry_at - now:.0f}s: {reason}")
+        return True
+    
+    def next_due_in(self) -> Optional[float]:
+        """
+        Get the time until the next retry is due.
+        
+        Returns:
+            Optional[float]: Seconds until the earliest retry (0 if one is
+            due now), or None if the queue is empty
+        """
+        with self.lock:
+            if not self.queue:
+                return None
+            return max(0.0, self.queue[0][0] - time.monotonic())
+    
+    def pop_due(self) -> List[str]:
+        """
+        Remove and return every email whose retry time has passed.
+        
+        Returns:
+            List[str]: The emails to retry now
+        """
+        now = time.monotonic()
+        due = []
+        with self.lock:
+            while self.queue and self.queue[0][0] <= now:
+                due.append(heapq.heappop(self.queue)[2])
+        return due
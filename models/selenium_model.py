@@ -1090,15 +1090,11 @@ class SeleniumModel:
         # Extract domain for rate limiting
         _, domain = email.split('@')
         
-        # Check rate limiting if rate limiter is set
-        if self.rate_limiter and self.rate_limiter.is_rate_limited(domain):
-            wait_time = self.rate_limiter.get_backoff_time(domain)
-            logger.info(f"Login verification rate limited for {domain}, waiting {wait_time}s")
-            time.sleep(wait_time)
-            
-            # Record this request
-            if self.rate_limiter:
-                self.rate_limiter.add_request(domain)
+        # Wait for the domain's budget if rate limiter is set
+        if self.rate_limiter:
+            wait_time = self.rate_limiter.acquire(domain)
+            if wait_time > 0:
+                logger.info(f"Login verification rate limited for {domain}, waited {wait_time:.1f}s")
         
         # Get max attempts from settings
         max_attempts = int(self.settings_model.get("max_verification_attempts", "3"))
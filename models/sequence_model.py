@@ -36,6 +36,18 @@ class SequenceModel:
             # Default sequence for unknown providers: SMTP only
             'default': ['smtp']
         }
+        
+        # Set by the controller; tells whether outbound port 25 works
+        self.egress_probe = None
+    
+    def set_egress_probe(self, egress_probe):
+        """
+        Set the SMTP egress probe.
+        
+        Args:
+            egress_probe: The egress probe model instance
+        """
+        self.egress_probe = egress_probe
     
     def get_verification_sequence(self, provider: str) -> List[str]:
         """
@@ -63,6 +75,14 @@ class SequenceModel:
             
             filtered_sequence.append(method)
         
+        # Only a known block counts; the batch planner waits for the probe
+        # before sequencing, while dry runs never start it
+        if self.egress_probe and 'smtp' in filtered_sequence and self.egress_probe.is_blocked():
+            # Outbound port 25 is blocked; SMTP would only fail. If it is the
+            # only method, it stays so the result says why it is unknown.
+            if len(filtered_sequence) > 1:
+                filtered_sequence.remove('smtp')
+        
         logger.info(f"Using verification sequence for {provider}: {filtered_sequence}")
         return filtered_sequence
 
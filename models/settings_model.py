@@ -8,6 +8,7 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from typing import Dict, List, Any, Optional, Union, Tuple
 from datetime import datetime
+from models.domain_list_model import DomainListModel
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,11 @@ class SettingsModel:
         
         # Initialize encryption key
         self._init_encryption()
+        
+        # Domain lists are kept in memory and reloaded when their files change
+        reload_interval = self.get_float("domain_list_reload_interval", 1.0)
+        self.blacklist = DomainListModel("./data/D-blacklist.csv", reload_interval)
+        self.whitelist = DomainListModel("./data/D-WhiteList.csv", reload_interval)
     
     def _init_encryption(self) -> None:
         """Initialize encryption for sensitive data."""
@@ -132,6 +138,8 @@ class SettingsModel:
                 ["rate_limit_enabled", "True", "True"],
                 ["rate_limit_max_requests", "10", "True"],
                 ["rate_limit_time_window", "60", "True"],
+                # Share token buckets with other processes (always on with real terminals)
+                ["rate_limit_shared", "False", "False"],
                 # Security
                 ["secure_credentials", "True", "True"],
                 # Logging
@@ -149,7 +157,58 @@ class SettingsModel:
                 # Browser sequences for different providers
                 ["google_browser_sequence", "edge,chrome,chrome_normal", "True"],
                 ["microsoft_browser_sequence", "edge,chrome,edge_normal,firefox", "True"],
-                ["default_browser_sequence", "edge,chrome,firefox", "True"]
+                ["default_browser_sequence", "edge,chrome,firefox", "True"],
+                # DNS cache
+                ["dns_cache_min_ttl", "60", "True"],
+                ["dns_cache_max_ttl", "86400", "True"],
+                ["dns_prefetch_concurrency", "32", "True"],
+                ["dns_negative_ttl_nxdomain", "3600", "True"],
+                ["dns_negative_ttl_noanswer", "1800", "True"],
+                ["dns_negative_ttl_timeout", "300", "True"],
+                # Domain lists
+                ["domain_list_reload_interval", "1", "True"],
+                # SMTP session reuse
+                ["smtp_session_max_recipients", "50", "True"],
+                ["smtp_session_idle_timeout", "30", "True"],
+                ["smtp_sessions_per_host", "5", "True"],
+                # Catch-all verdict cache
+                ["catch_all_cache_ttl", "86400", "True"],
+                # SMTP probe engine: "sync" (smtplib) or "async" (event loop)
+                ["smtp_engine", "sync", "True"],
+                ["async_smtp_max_sessions", "1000", "True"],
+                ["async_smtp_per_host_limit", "5", "True"],
+                # Deferred retries of temporary SMTP failures
+                ["smtp_retry_max_attempts", "3", "True"],
+                ["smtp_retry_delay", "60", "True"],
+                # MX host health and circuit breaking
+                ["mx_circuit_failure_threshold", "3", "True"],
+                ["mx_circuit_open_seconds", "300", "True"],
+                ["mx_degraded_seconds", "60", "True"],
+                # Recipients per SMTP transaction when verifying a domain's addresses
+                ["smtp_rcpt_batch_size", "20", "True"],
+                # Domains whose batched SMTP checks run at once in a batch
+                ["smtp_prefetch_concurrency", "8", "True"],
+                ["smtp_connection_racing", "True", "True"],
+                ["smtp_connect_stagger", "0.25", "True"],
+                ["smtp_connect_timeout", "10", "True"],
+                ["smtp_ehlo_timeout", "10", "True"],
+                ["smtp_starttls_timeout", "10", "True"],
+                ["smtp_mail_timeout", "10", "True"],
+                ["smtp_rcpt_timeout", "10", "True"],
+                ["smtp_probe_deadline", "30", "True"],
+                # Extra deadline seconds per additional recipient of a batched check
+                ["smtp_probe_deadline_per_recipient", "2", "True"],
+                ["smtp_egress_probe_enabled", "True", "True"],
+                ["smtp_egress_probe_targets", "gmail-smtp-in.l.google.com,alt1.gmail-smtp-in.l.google.com", "True"],
+                ["smtp_egress_probe_interval", "300", "True"],
+                ["smtp_egress_probe_timeout", "5", "True"],
+                ["smtp_tls_policy", "opportunistic", "True"],
+                ["smtp_tls_session_resumption", "True", "True"],
+                ["mx_capability_ttl", "3600", "True"],
+                ["smtp_transcript_enabled", "False", "False"],
+                ["smtp_transcript_sample_rate", "0.01", "True"],
+                ["smtp_transcript_per_host", "20", "True"],
+                ["smtp_transcript_max_hosts", "200", "True"]
             ]
             
             with open(self.settings_file, 'w', newline='', encoding='utf-8') as f:
@@ -237,6 +296,7 @@ class SettingsModel:
                 "rate_limit_enabled": {"value": "True", "enabled": True},
                 "rate_limit_max_requests": {"value": "10", "enabled": True},
                 "rate_limit_time_window": {"value": "60", "enabled": True},
+                "rate_limit_shared": {"value": "False", "enabled": False},
                 "secure_credentials": {"value": "True", "enabled": True},
                 "log_level": {"value": "INFO", "enabled": True},
                 "log_to_file": {"value": "True", "enabled": True},
@@ -247,7 +307,48 @@ class SettingsModel:
                 "max_verification_attempts": {"value": "3", "enabled": True},
                 "google_browser_sequence": {"value": "edge,chrome,chrome_normal", "enabled": True},
                 "microsoft_browser_sequence": {"value": "edge,chrome,edge_normal,firefox", "enabled": True},
-                "default_browser_sequence": {"value": "edge,chrome,firefox", "enabled": True}
+                "default_browser_sequence": {"value": "edge,chrome,firefox", "enabled": True},
+                "dns_cache_min_ttl": {"value": "60", "enabled": True},
+                "dns_cache_max_ttl": {"value": "86400", "enabled": True},
+                "dns_prefetch_concurrency": {"value": "32", "enabled": True},
+                "dns_negative_ttl_nxdomain": {"value": "3600", "enabled": True},
+                "dns_negative_ttl_noanswer": {"value": "1800", "enabled": True},
+                "dns_negative_ttl_timeout": {"value": "300", "enabled": True},
+                "domain_list_reload_interval": {"value": "1", "enabled": True},
+                "smtp_session_max_recipients": {"value": "50", "enabled": True},
+                "smtp_session_idle_timeout": {"value": "30", "enabled": True},
+                "smtp_sessions_per_host": {"value": "5", "enabled": True},
+                "catch_all_cache_ttl": {"value": "86400", "enabled": True},
+                "smtp_engine": {"value": "sync", "enabled": True},
+                "async_smtp_max_sessions": {"value": "1000", "enabled": True},
+                "async_smtp_per_host_limit": {"value": "5", "enabled": True},
+                "smtp_retry_max_attempts": {"value": "3", "enabled": True},
+                "smtp_retry_delay": {"value": "60", "enabled": True},
+                "mx_circuit_failure_threshold": {"value": "3", "enabled": True},
+                "mx_circuit_open_seconds": {"value": "300", "enabled": True},
+                "mx_degraded_seconds": {"value": "60", "enabled": True},
+                "smtp_rcpt_batch_size": {"value": "20", "enabled": True},
+                "smtp_prefetch_concurrency": {"value": "8", "enabled": True},
+                "smtp_connection_racing": {"value": "True", "enabled": True},
+                "smtp_connect_stagger": {"value": "0.25", "enabled": True},
+                "smtp_connect_timeout": {"value": "10", "enabled": True},
+                "smtp_ehlo_timeout": {"value": "10", "enabled": True},
+                "smtp_starttls_timeout": {"value": "10", "enabled": True},
+                "smtp_mail_timeout": {"value": "10", "enabled": True},
+                "smtp_rcpt_timeout": {"value": "10", "enabled": True},
+                "smtp_probe_deadline": {"value": "30", "enabled": True},
+                "smtp_probe_deadline_per_recipient": {"value": "2", "enabled": True},
+                "smtp_egress_probe_enabled": {"value": "True", "enabled": True},
+                "smtp_egress_probe_targets": {"value": "gmail-smtp-in.l.google.com,alt1.gmail-smtp-in.l.google.com", "enabled": True},
+                "smtp_egress_probe_interval": {"value": "300", "enabled": True},
+                "smtp_egress_probe_timeout": {"value": "5", "enabled": True},
+                "smtp_tls_policy": {"value": "opportunistic", "enabled": True},
+                "smtp_tls_session_resumption": {"value": "True", "enabled": True},
+                "mx_capability_ttl": {"value": "3600", "enabled": True},
+                "smtp_transcript_enabled": {"value": "False", "enabled": False},
+                "smtp_transcript_sample_rate": {"value": "0.01", "enabled": True},
+                "smtp_transcript_per_host": {"value": "20", "enabled": True},
+                "smtp_transcript_max_hosts": {"value": "200", "enabled": True}
             }
     
     def save_settings(self) -> bool:
@@ -284,6 +385,38 @@ class SettingsModel:
             return self.settings[feature]["value"]
         return default
     
+    def get_int(self, feature: str, default: int) -> int:
+        """
+        Get a setting value as an integer.
+        
+        Args:
+            feature: The feature name
+            default: Default value if feature not found, disabled or not a number
+            
+        Returns:
+            int: The setting value or default
+        """
+        try:
+            return int(self.get(feature, default))
+        except (TypeError, ValueError):
+            return default
+    
+    def get_float(self, feature: str, default: float) -> float:
+        """
+        Get a setting value as a float.
+        
+        Args:
+            feature: The feature name
+            default: Default value if feature not found, disabled or not a number
+            
+        Returns:
+            float: The setting value or default
+        """
+        try:
+            return float(self.get(feature, default))
+        except (TypeError, ValueError):
+            return default
+    
     def is_enabled(self, feature: str) -> bool:
         """
         Check if a feature is enabled.
@@ -471,13 +604,7 @@ class SettingsModel:
         Returns:
             List[str]: List of blacklisted domains
         """
-        try:
-            with open("./data/D-blacklist.csv", 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return [row["domain"] for row in reader]
-        except Exception as e:
-            logger.error(f"Error loading blacklisted domains: {e}")
-            return []
+        return self.blacklist.get_entries()
     
     def get_whitelisted_domains(self) -> List[str]:
         """
@@ -486,13 +613,31 @@ class SettingsModel:
         Returns:
             List[str]: List of whitelisted domains
         """
-        try:
-            with open("./data/D-WhiteList.csv", 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return [row["domain"] for row in reader]
-        except Exception as e:
-            logger.error(f"Error loading whitelisted domains: {e}")
-            return []
+        return self.whitelist.get_entries()
+    
+    def is_domain_blacklisted(self, domain: str) -> bool:
+        """
+        Check if a domain is blacklisted.
+        
+        Args:
+            domain: The domain to check
+            
+        Returns:
+            bool: True if the domain or a wildcard parent entry is blacklisted
+        """
+        return self.blacklist.contains(domain)
+    
+    def is_domain_whitelisted(self, domain: str) -> bool:
+        """
+        Check if a domain is whitelisted.
+        
+        Args:
+            domain: The domain to check
+            
+        Returns:
+            bool: True if the domain or a wildcard parent entry is whitelisted
+        """
+        return self.whitelist.contains(domain)
     
     def save_verification_statistics(self, verification_name: str, statistics: Dict[str, Any]) -> bool:
         """
@@ -701,7 +846,7 @@ class SettingsModel:
         
         elif domain_choice == "2":
             # Add domain to blacklist
-            domain = input("\nEnter domain to blacklist: ")
+            domain = input("\nEnter domain to blacklist (use *.example.com for subdomains): ")
             if domain:
                 with open("./data/D-blacklist.csv", 'a', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
@@ -720,7 +865,7 @@ class SettingsModel:
         
         elif domain_choice == "4":
             # Add domain to whitelist
-            domain = input("\nEnter domain to whitelist: ")
+            domain = input("\nEnter domain to whitelist (use *.example.com for subdomains): ")
             if domain:
                 with open("./data/D-WhiteList.csv", 'a', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
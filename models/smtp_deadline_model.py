@@ -0,0 +1,160 @@
+import time
+import socket
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Phases of an SMTP probe, in the order they happen
+PHASES = ("connect", "ehlo", "starttls", "mail", "rcpt")
+
+class ProbeDeadline:
+    """
+    Time budget of one SMTP check.
+    
+    Each phase has its own limit, and all phases of the check (across MX
+    hosts and reconnects) share one overall deadline. The overall clock
+    starts with the first phase, so waiting for the rate limiter before
+    the first connection does not count against it.
+    """
+    
+    def __init__(self, phase_timeouts: Dict[str, float], total: float):
+        """
+        Initialize the budget.
+        
+        Args:
+            phase_timeouts: Seconds allowed for each phase
+            total: Seconds allowed for all phases together
+        """
+        self.phase_timeouts = phase_timeouts
+        self.total = total
+        self.expires_at: Optional[float] = None
+        
+        # Seconds spent per phase
+        self.phases: Dict[str, float] = {}
+        self.current: Optional[str] = None
+        self.phase_started = 0.0
+    
+    @classmethod
+    def uniform(cls, timeout: float) -> "ProbeDeadline":
+        """
+        Get a budget that only limits each phase, like a plain socket timeout.
+        
+        Args:
+            timeout: Seconds allowed for each phase
+        
+        Returns:
+            ProbeDeadline: The budget
+        """
+        return cls({phase: timeout for phase in PHASES}, float("inf"))
+    
+    def remaining(self) -> float:
+        """
+        Get the time left before the overall deadline.
+        
+        Returns:
+            float: Seconds left (the whole budget if no phase has started)
+        """
+        if self.expires_at is None:
+            return self.total
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator["ProbeDeadline"]:
+        """
+        Time a phase; timeout() is limited by the phase while it runs.
+        
+        Args:
+            name: One of PHASES
+        """
+        if self.expires_at is None:
+            self.expires_at = time.monotonic() + self.total
+        
+        previous = (self.current, self.phase_started)
+        self.current, self.phase_started = name, time.monotonic()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - self.phase_started
+            self.current, self.phase_started = previous
+    
+    def timeout(self) -> float:
+        """
+        Get the timeout for the next network operation.
+        
+        Returns:
+            float: Seconds left in the current phase and overall
+        
+        Raises:
+            socket.timeout: If the phase or the overall deadline has run out
+        """
+        now = time.monotonic()
+        limit = self.remaining()
+        if self.current is not None:
+            limit = min(limit, self.phase_timeouts[self.current] - (now - self.phase_started))
+        if limit <= 0:
+            if self.current is not None and self.remaining() > 0:
+                raise socket.timeout(f"SMTP {self.current} phase exceeded "
+                                     f"{self.phase_timeouts[self.current]:.0f}s")
+            raise socket.timeout(f"SMTP probe deadline of {self.total:.0f}s exceeded")
+        return limit
+    
+    def elapsed(self) -> Dict[str, float]:
+        """
+        Get the time spent per phase, for result details.
+        
+        Returns:
+            Dict[str, float]: Seconds per phase that ran, plus "total"
+        """
+        elapsed = {phase: round(self.phases[phase], 3) for phase in PHASES if phase in self.phases}
+        elapsed["total"] = round(sum(self.phases.values()), 3)
+        return elapsed
+
+class SMTPDeadlineModel:
+    """Model for the per-phase timeouts and overall deadline of SMTP checks."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the timeout settings.
+        
+        A single socket timeout lets a tarpitting server stretch one check
+        across banner, EHLO, STARTTLS, MAIL and RCPT. Instead, each phase
+        gets smtp_<phase>_timeout seconds (the RCPT limit applies to each
+        recipient) and the whole check, across all MX hosts, gets
+        smtp_probe_deadline seconds, plus
+        smtp_probe_deadline_per_recipient seconds for each further
+        recipient when several addresses are checked together.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.phase_timeouts = {
+            phase: self.settings_model.get_float(f"smtp_{phase}_timeout", 10.0)
+            for phase in PHASES
+        }
+        self.total = self.settings_model.get_float("smtp_probe_deadline", 30.0)
+        self.per_recipient = self.settings_model.get_float("smtp_probe_deadline_per_recipient", 2.0)
+    
+    def start(self, timeout: Optional[float] = None, recipients: int = 1) -> ProbeDeadline:
+        """
+        Get the budget for a new check.
+        
+        Args:
+            timeout: Upper bound for each phase in seconds, if any
+            recipients: Number of RCPT TO commands in each transaction
+        
+        Returns:
+            ProbeDeadline: The budget
+        """
+        phase_timeouts = dict(self.phase_timeouts)
+        if timeout is not None:
+            phase_timeouts = {phase: min(limit, timeout) for phase, limit in phase_timeouts.items()}
+        total = self.total + max(0, recipients - 1) * self.per_recipient
+        return ProbeDeadline(phase_timeouts, total)
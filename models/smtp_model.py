@@ -1,13 +1,27 @@
+import math
+import time
 import socket
 import smtplib
 import logging
-import time
 import random
 from typing import Dict, List, Any, Optional
 from models.common import EmailVerificationResult, VALID, INVALID, RISKY, CUSTOM
+from models.smtp_session_model import SMTPSessionPool
+from models.async_smtp_model import AsyncSMTPEngine
+from models.domain_verdict_model import DomainVerdictModel
+from models.rate_limiter_model import RateLimiterModel
+from models.smtp_reply_model import (apply_rcpt_reply, catch_all_verdict, REPLY_MAILBOX_FULL, REPLY_POLICY,
+                                      REPLY_UNKNOWN_USER, REPLY_BAD_ADDRESS)
+from models.mx_health_model import MXHealthModel
+from models.connection_racer_model import UNRESOLVED_ERROR, UNROUTABLE_ERROR, is_address_family_error
+from models.smtp_deadline_model import SMTPDeadlineModel
+from models.egress_probe_model import EgressProbeModel
 
 logger = logging.getLogger(__name__)
 
+# Reason given when outbound port 25 is known to be blocked
+SMTP_UNAVAILABLE_REASON = "SMTP unavailable: outbound port 25 is blocked"
+
 class SMTPModel:
     """Model for SMTP-based email verification."""
     
@@ -20,6 +34,34 @@ class SMTPModel:
         """
         self.settings_model = settings_model
         
+        # Open sessions per MX host, reused across RCPT TO probes
+        self.session_pool = SMTPSessionPool(settings_model)
+        
+        # Catch-all verdicts per domain, shared with the API model
+        self.domain_verdicts = DomainVerdictModel(settings_model)
+        
+        # Health of MX hosts, shared by every domain they serve
+        self.mx_health = MXHealthModel(settings_model)
+        
+        # Race staggered connections across MX hosts instead of waiting
+        # out each host's timeout in turn
+        self.connection_racing = self.settings_model.is_enabled("smtp_connection_racing")
+        
+        # Per-phase timeouts and the overall deadline of each check
+        self.deadlines = SMTPDeadlineModel(settings_model)
+        
+        # Whether outbound port 25 works at all; probed from the first SMTP check on
+        self.egress_probe = EgressProbeModel(settings_model)
+        
+        # smtp_engine "async" runs probes concurrently on an event loop
+        # instead of blocking the calling thread on smtplib
+        self.async_engine = None
+        if self.settings_model.get("smtp_engine", "sync").lower() == "async":
+            self.async_engine = AsyncSMTPEngine(settings_model)
+            self.async_engine.mx_health = self.mx_health
+            self.async_engine.capabilities = self.session_pool.capabilities
+            self.async_engine.transcripts = self.session_pool.transcripts
+        
         # Rate limiter will be initialized by the controller
         self.rate_limiter = None
     
@@ -31,98 +73,213 @@ class SMTPModel:
             rate_limiter: The rate limiter instance
         """
         self.rate_limiter = rate_limiter
+        if self.async_engine:
+            self.async_engine.rate_limiter = rate_limiter
+    
+    def set_address_resolver(self, resolver) -> None:
+        """
+        Set how MX host names are resolved when racing connections.
+        
+        Args:
+            resolver: Function returning the IP addresses of a host name
+                (e.g. InitialValidationModel.get_host_addresses, backed by
+                the persistent DNS cache)
+        """
+        self.session_pool.racer.resolver = resolver
     
     def verify_smtp(self, email: str, mx_servers: List[str], 
                    sender_email: str = "verify@example.com", 
-                   timeout: int = 10) -> Dict[str, Any]:
+                   timeout: int = 10,
+                   catch_all_probe: Optional[str] = None) -> Dict[str, Any]:
         """
         Verify email existence by connecting to the SMTP server.
         
         This uses the SMTP RCPT TO command to check if the email exists
-        without actually sending an email.
+        without actually sending an email. The probe runs over the pooled
+        session for the MX host, so consecutive checks against the same
+        server skip the connection handshake. Temporary failures (4xx
+        replies, timeouts) are not retried inline; they set "temporary" in
+        the result so the caller can retry the address later. MX hosts are
+        tried in the order given by the health scoreboard, which skips
+        hosts whose circuit is open.
         
         Args:
             email: The email address to verify
             mx_servers: List of MX servers to try
             sender_email: The sender email address to use
             timeout: Connection timeout in seconds
+            catch_all_probe: Address that should not exist; if given it is
+                checked with an extra RCPT TO in the same transaction and
+                the result gets an "is_catch_all" entry
             
         Returns:
             Dict[str, Any]: Result of the verification
         """
-        result = {
-            "is_deliverable": False,
-            "smtp_check": False,
-            "reason": None,
-            "mx_used": None
+        if not self.egress_probe.is_available():
+            return self._unavailable_result()
+        
+        if self.async_engine:
+            return self.async_engine.verify_smtp(email, mx_servers, sender_email, timeout, catch_all_probe)
+        
+        return self.verify_smtp_batch([email], mx_servers, sender_email, timeout, catch_all_probe)[email]
+    
+    def verify_smtp_batch(self, emails: List[str], mx_servers: List[str],
+                          sender_email: str = "verify@example.com",
+                          timeout: int = 10,
+                          catch_all_probe: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Verify several addresses on one domain in a single SMTP transaction.
+        
+        All recipients go into one MAIL FROM transaction per MX host, sent
+        as a single pipelined batch when the server advertises PIPELINING.
+        Addresses the host does not settle are tried on the next MX host.
+        With smtp_connection_racing, connections to all MX hosts are raced
+        first and the host that greets first is probed first. Each phase
+        (connect, EHLO, STARTTLS, MAIL, RCPT) has its own timeout and the
+        whole check has an overall deadline; the time spent per phase is
+        reported in "phases".
+        
+        Args:
+            emails: The email addresses to verify
+            mx_servers: List of MX servers to try
+            sender_email: The sender email address to use
+            timeout: Upper bound for each phase's timeout in seconds
+            catch_all_probe: Address that should not exist; if given it is
+                checked with an extra RCPT TO in the same transaction and
+                the results get an "is_catch_all" entry
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Result of the verification per email
+        """
+        if not self.egress_probe.is_available():
+            # Every connection would only wait out its timeout
+            return {email: self._unavailable_result() for email in emails}
+        
+        results = {
+            email: {
+                "is_deliverable": False,
+                "smtp_check": False,
+                "reason": None,
+                "mx_used": None
+            }
+            for email in emails
         }
         
         if not mx_servers:
-            result["reason"] = "No MX records found"
-            return result
+            for result in results.values():
+                result["reason"] = "No MX records found"
+            return results
+        
+        ordered_servers = self.mx_health.order(mx_servers)
+        if not ordered_servers:
+            # Every host failed repeatedly; don't spend a timeout on them
+            for result in results.values():
+                result["temporary"] = True
+                result["reason"] = "All MX servers are failing (circuit open)"
+            return results
+        
+        # Hosts known to fail a required TLS policy are not connected to
+        refusals = [self.session_pool.capabilities.policy_refusal(mx) for mx in ordered_servers]
+        if all(refusals):
+            for result in results.values():
+                result["reason"] = refusals[0]
+            return results
+        ordered_servers = [mx for mx, refusal in zip(ordered_servers, refusals) if not refusal]
+        
+        # The domain's budget is charged per recipient before the transaction
+        # goes out, outside its deadline
+        self._wait_for_rate_limit(emails[0].rpartition('@')[2], len(emails) + (1 if catch_all_probe else 0))
+        
+        # The budget grows with the batch, so slow but answering hosts finish it
+        deadline = self.deadlines.start(timeout, len(emails) + (1 if catch_all_probe else 0))
+        if self.connection_racing:
+            # The host that greets first is probed first; hosts that could
+            # not be reached are not tried again
+            winner, errors = self.session_pool.connect_first(ordered_servers, sender_email, timeout, deadline)
+            for mx, error in errors.items():
+                # A missing IPv6 route says nothing about the host
+                if error != UNROUTABLE_ERROR:
+                    self.mx_health.record_failure(mx, error)
+            if winner is None:
+                unresolved = all(error == UNRESOLVED_ERROR for error in errors.values())
+                logger.warning(f"Could not connect to any MX server: {errors}")
+                for result in results.values():
+                    if not unresolved:
+                        result["temporary"] = True
+                    result["reason"] = f"Could not connect to any MX server ({', '.join(ordered_servers)})"
+                    result["phases"] = deadline.elapsed()
+                return results
+            ordered_servers = [winner] + [mx for mx in ordered_servers if mx != winner and mx not in errors]
         
-        for mx in mx_servers:
-            retry_count = 0
-            max_retries = 3
+        pending = list(emails)
+        for mx in ordered_servers:
+            if deadline.expired:
+                # Slow hosts must not stall the worker; retry the rest later
+                logger.warning(f"SMTP probe deadline of {deadline.total:.0f}s exceeded before trying {mx}")
+                for email in pending:
+                    results[email]["temporary"] = True
+                    results[email]["reason"] = f"SMTP probe deadline of {deadline.total:.0f}s exceeded"
+                break
             
-            while retry_count < max_retries:
+            try:
+                # The key check - see if the recipients are accepted
+                recipients = pending + [catch_all_probe] if catch_all_probe else pending
+                
+                # Each MX host has its own budget, shared by all its domains
+                if self.rate_limiter:
+                    self.rate_limiter.acquire(RateLimiterModel.host_key(mx), len(recipients))
+                start_time = time.monotonic()
                 try:
-                    with smtplib.SMTP(mx, timeout=timeout) as smtp:
-                        smtp.ehlo()
-                        # Try to use STARTTLS if available
-                        if smtp.has_extn('STARTTLS'):
-                            smtp.starttls()
-                            smtp.ehlo()
-                        
-                        # Some servers require a sender address
-                        smtp.mail(sender_email)
-                        
-                        # The key check - see if the recipient is accepted
-                        code, message = smtp.rcpt(email)
-                        
-                        smtp.quit()
-                        
-                        result["mx_used"] = mx
-                        
-                        # SMTP status codes:
-                        # 250 = Success
-                        # 550 = Mailbox unavailable
-                        # 551, 552, 553, 450, 451, 452 = Various temporary issues
-                        # 503, 550, 551, 553 = Various permanent failures
-                        
-                        if code == 250:
-                            result["is_deliverable"] = True
-                            result["smtp_check"] = True
-                            return result
-                        elif code == 550:
-                            # Mark as risky instead of invalid for "Mailbox unavailable"
-                            result["reason"] = "Mailbox unavailable" 
-                            return result
-                        else:
-                            result["reason"] = f"SMTP Error: {code} - {message.decode('utf-8', errors='ignore')}"
-                            # Continue to next MX if this one gave a temporary error
-                            break
+                    replies = self.session_pool.probe(mx, recipients, sender_email, timeout, deadline)
+                except Exception as e:
+                    if not is_address_family_error(e):
+                        self.mx_health.record_failure(mx, str(e) or type(e).__name__)
+                    raise
+                self.mx_health.record_success(mx, time.monotonic() - start_time)
+                
+                is_catch_all = None
+                if catch_all_probe:
+                    # A server accepting a random address accepts everything;
+                    # blocks and temporary failures leave the question open
+                    is_catch_all = catch_all_verdict(replies[-1])
                 
-                except (socket.timeout, ConnectionRefusedError) as e:
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        wait_time = 2 ** retry_count  # Exponential backoff
-                        logger.warning(f"Network error with {mx}, retrying in {wait_time}s: {str(e)}")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"Max retries reached for {mx}: {str(e)}")
-                        break
+                unsettled = []
+                for email, (code, message) in zip(pending, replies):
+                    result = results[email]
+                    result["mx_used"] = mx
+                    if is_catch_all is not None:
+                        result["is_catch_all"] = is_catch_all
+                    
+                    # Classified by reply code, enhanced status code and text
+                    if not apply_rcpt_reply(result, code, message):
+                        unsettled.append(email)
                 
-                except (socket.error, smtplib.SMTPException) as e:
-                    logger.debug(f"SMTP error with {mx}: {str(e)}")
-                    # Continue to next MX server
+                pending = unsettled
+                if not pending:
                     break
+            
+            except (socket.timeout, ConnectionRefusedError) as e:
+                # Retried later from the deferred queue instead of sleeping here
+                logger.warning(f"Network error with {mx}: {str(e)}")
+                for email in pending:
+                    results[email]["temporary"] = True
+                    if not results[email]["reason"]:
+                        results[email]["reason"] = f"Network error with {mx}: {str(e)}"
+            
+            except (socket.error, smtplib.SMTPException) as e:
+                logger.debug(f"SMTP error with {mx}: {str(e)}")
+                # Continue to next MX server
+        
+        for email in pending:
+            if not results[email]["reason"]:
+                results[email]["reason"] = "All MX servers rejected connection or verification"
         
-        if not result["reason"]:
-            result["reason"] = "All MX servers rejected connection or verification"
-        return result
+        phases = deadline.elapsed()
+        for result in results.values():
+            result["phases"] = dict(phases)
+        return results
     
-    def check_catch_all(self, domain: str, mx_records: List[str]) -> bool:
+    def check_catch_all(self, domain: str, mx_records: List[str]) -> Optional[bool]:
         """
         Check if a domain has a catch-all email configuration.
         
@@ -131,28 +288,88 @@ class SMTPModel:
             mx_records: List of MX records for the domain
             
         Returns:
-            bool: True if it's a catch-all domain, False otherwise
+            Optional[bool]: True if it's a catch-all domain, False if not,
+            None if no server gave a definite answer (temporary failure,
+            block or no MX host reached), so the check can be repeated later
         """
         if not self.settings_model.is_enabled("catch_all_detection"):
             return False
+        
+        verdict = self.domain_verdicts.get_catch_all(domain)
+        if verdict:
+            return verdict["is_catch_all"]
+        
+        # Try to verify a random email that almost certainly doesn't exist
+        result = self.verify_smtp(self._random_address(domain), mx_records)
+        if not result.get("mx_used") or result.get("temporary"):
+            return None
+        
+        # Accepted means catch-all; only a rejection of the mailbox itself
+        # means it is not. Only answers a server actually gave are cached
+        reply_class = result.get("reply_class")
+        if result.get("is_deliverable"):
+            is_catch_all = True
+        elif reply_class in (REPLY_UNKNOWN_USER, REPLY_BAD_ADDRESS):
+            is_catch_all = False
+        else:
+            return None
+        self.domain_verdicts.set_catch_all(domain, is_catch_all, "smtp")
+        return is_catch_all
+    
+    def _unavailable_result(self) -> Dict[str, Any]:
+        """
+        Get the verify_smtp result used while outbound port 25 is blocked.
+        
+        Returns:
+            Dict[str, Any]: A failed check marked "smtp_unavailable"
+        """
+        return {
+            "is_deliverable": False,
+            "smtp_check": False,
+            "reason": SMTP_UNAVAILABLE_REASON,
+            "mx_used": None,
+            "smtp_unavailable": True
+        }
+    
+    def _get_cached_catch_all(self, domain: str) -> Optional[bool]:
+        """
+        Get the catch-all status of a domain without probing it.
+        
+        Args:
+            domain: The domain
             
-        # Generate a random email that almost certainly doesn't exist
-        random_str = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=16))
-        test_email = f"{random_str}@{domain}"
+        Returns:
+            Optional[bool]: False if detection is disabled, the cached
+            verdict if there is one, otherwise None
+        """
+        if not self.settings_model.is_enabled("catch_all_detection"):
+            return False
         
-        # Try to verify the random email
-        result = self.verify_smtp(test_email, mx_records)
+        verdict = self.domain_verdicts.get_catch_all(domain)
+        return verdict["is_catch_all"] if verdict else None
+    
+    def _random_address(self, domain: str) -> str:
+        """
+        Generate a random email that almost certainly doesn't exist.
         
-        # If the random email is deliverable, it's likely a catch-all domain
-        return result.get("is_deliverable", False)
+        Args:
+            domain: The domain of the address
+            
+        Returns:
+            str: The random email address
+        """
+        random_str = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=16))
+        return f"{random_str}@{domain}"
     
-    def verify_email_smtp(self, email: str, mx_records: List[str]) -> EmailVerificationResult:
+    def verify_email_smtp(self, email: str, mx_records: List[str],
+                          is_catch_all: Optional[bool] = None) -> EmailVerificationResult:
         """
         Verify email using SMTP method.
         
         Args:
             email: The email address to verify
             mx_records: List of MX records for the domain
+            is_catch_all: Catch-all status already determined for the domain, if any
             
         Returns:
             EmailVerificationResult: The verification result
@@ -162,23 +379,137 @@ class SMTPModel:
         # Extract domain
         _, domain = email.split('@')
         
-        # Check rate limiting if rate limiter is set
-        if self.rate_limiter and self.rate_limiter.is_rate_limited(domain):
-            wait_time = self.rate_limiter.get_backoff_time(domain)
-            logger.info(f"SMTP verification rate limited for {domain}, waiting {wait_time}s")
-            time.sleep(wait_time)
-            
-            # Record this request
-            self.rate_limiter.add_request(domain)
+        if not self.egress_probe.is_available():
+            return self._build_result(email, domain, self._unavailable_result(), False)
+        
+        if is_catch_all is None:
+            is_catch_all = self._get_cached_catch_all(domain)
+        
+        # Unless already known, the catch-all probe rides along in the same session
+        catch_all_probe = None
+        if is_catch_all is None:
+            catch_all_probe = self._random_address(domain)
+        
+        # Verify using SMTP
+        smtp_result = self.verify_smtp(email, mx_records, catch_all_probe=catch_all_probe)
         
-        # Check if it's a catch-all domain
-        is_catch_all = self.check_catch_all(domain, mx_records)
+        if is_catch_all is None:
+            is_catch_all = smtp_result.get("is_catch_all", False)
+            if "is_catch_all" in smtp_result:
+                self.domain_verdicts.set_catch_all(domain, is_catch_all, "smtp")
         if is_catch_all:
             logger.info(f"SMTP verification detected catch-all domain: {domain}")
         
-        # Verify using SMTP
-        smtp_result = self.verify_smtp(email, mx_records)
+        return self._build_result(email, domain, smtp_result, is_catch_all)
+    
+    def verify_many(self, domain: str, emails: List[str], mx_records: List[str],
+                    is_catch_all: Optional[bool] = None) -> Dict[str, EmailVerificationResult]:
+        """
+        Verify several addresses on one domain over a shared SMTP session.
+        
+        Addresses are checked smtp_rcpt_batch_size at a time, each batch as
+        one transaction (pipelined when the server supports it) on the
+        pooled connection to the domain's MX host. With the async engine the
+        batches are checked concurrently, within its per-host connection
+        limit, and smaller batches are used for a host known not to offer
+        PIPELINING. Unless already known, the catch-all probe is an
+        extra RCPT TO in the first transaction.
+        
+        Args:
+            domain: The domain of the addresses
+            emails: The email addresses to verify
+            mx_records: List of MX records for the domain
+            is_catch_all: Catch-all status already determined for the domain, if any
+            
+        Returns:
+            Dict[str, EmailVerificationResult]: Verification result per email
+        """
+        logger.info(f"SMTP verification started for {len(emails)} emails on {domain}")
+        
+        if not self.egress_probe.is_available():
+            return {email: self._build_result(email, domain, self._unavailable_result(), False)
+                    for email in emails}
+        
+        if is_catch_all is None:
+            is_catch_all = self._get_cached_catch_all(domain)
         
+        results = {}
+        batch_size = max(1, self.settings_model.get_int("smtp_rcpt_batch_size", 20))
+        if (self.async_engine and mx_records
+                and self.session_pool.capabilities.supports_pipelining(mx_records[0]) is False):
+            # Without PIPELINING each RCPT TO is a round trip; spread the
+            # addresses over the host's concurrent sessions instead
+            batch_size = min(batch_size, max(1, math.ceil(len(emails) / self.async_engine.per_host_limit)))
+        batches = [emails[start:start + batch_size] for start in range(0, len(emails), batch_size)]
+        if self.async_engine and batches:
+            # The batches run at once on the engine's reused sessions, each
+            # waiting for its share of the rate limit as it goes out; the
+            # first one carries the catch-all probe
+            checks = [(batch, mx_records, None) for batch in batches]
+            if is_catch_all is None:
+                checks[0] = (batches[0], mx_records, self._random_address(domain))
+            
+            batch_results = self.async_engine.verify_all(checks)
+            if is_catch_all is None:
+                is_catch_all = batch_results[0][batches[0][0]].get("is_catch_all")
+                if is_catch_all is not None:
+                    self.domain_verdicts.set_catch_all(domain, is_catch_all, "smtp")
+                    if is_catch_all:
+                        logger.info(f"SMTP verification detected catch-all domain: {domain}")
+            
+            for smtp_results in batch_results:
+                for email, smtp_result in smtp_results.items():
+                    results[email] = self._build_result(email, domain, smtp_result, bool(is_catch_all))
+            return results
+        
+        for batch in batches:
+            # The catch-all probe rides along with the first batch checked
+            catch_all_probe = self._random_address(domain) if is_catch_all is None else None
+            smtp_results = self.verify_smtp_batch(batch, mx_records, catch_all_probe=catch_all_probe)
+            if catch_all_probe and "is_catch_all" in smtp_results[batch[0]]:
+                is_catch_all = smtp_results[batch[0]]["is_catch_all"]
+                self.domain_verdicts.set_catch_all(domain, is_catch_all, "smtp")
+                if is_catch_all:
+                    logger.info(f"SMTP verification detected catch-all domain: {domain}")
+            
+            for email in batch:
+                results[email] = self._build_result(email, domain, smtp_results[email], bool(is_catch_all))
+        
+        return results
+    
+    def _wait_for_rate_limit(self, domain: str, recipients: int = 1) -> None:
+        """
+        Wait until the rate limiter allows a check on the domain and record it.
+        
+        Args:
+            domain: The domain about to be checked
+            recipients: Addresses checked, each using a token
+        """
+        if self.rate_limiter:
+            wait_time = self.rate_limiter.acquire(domain, recipients)
+            if wait_time > 0:
+                logger.info(f"SMTP verification rate limited for {domain}, waited {wait_time:.1f}s")
+    
+    def close_sessions(self) -> None:
+        """Close all pooled SMTP sessions."""
+        self.session_pool.close_all()
+        if self.async_engine:
+            self.async_engine.close_sessions()
+    
+    def _build_result(self, email: str, domain: str, smtp_result: Dict[str, Any],
+                      is_catch_all: bool) -> EmailVerificationResult:
+        """
+        Classify an SMTP check into a verification result.
+        
+        Args:
+            email: The email address
+            domain: The domain of the email address
+            smtp_result: Result of verify_smtp
+            is_catch_all: Whether the domain is catch-all
+            
+        Returns:
+            EmailVerificationResult: The verification result
+        """
         if smtp_result["is_deliverable"]:
             if is_catch_all:
                 logger.info(f"SMTP verification result for {email}: RISKY (Domain has catch-all configuration)")
@@ -198,6 +529,54 @@ class SMTPModel:
                     provider=domain,
                     details=smtp_result
                 )
+        elif smtp_result.get("smtp_unavailable"):
+            # Says nothing about the mailbox; other methods may still tell
+            logger.info(f"SMTP verification result for {email}: RISKY ({smtp_result['reason']})")
+            return EmailVerificationResult(
+                email=email,
+                category=RISKY,
+                reason=smtp_result["reason"],
+                provider=domain,
+                details=smtp_result
+            )
+        elif smtp_result.get("definitive"):
+            if smtp_result.get("reply_class") == REPLY_MAILBOX_FULL:
+                # The mailbox exists but cannot receive mail right now
+                logger.info(f"SMTP verification result for {email}: RISKY ({smtp_result['reason']})")
+                return EmailVerificationResult(
+                    email=email,
+                    category=RISKY,
+                    reason=smtp_result["reason"],
+                    provider=domain,
+                    details=smtp_result
+                )
+            logger.info(f"SMTP verification result for {email}: INVALID ({smtp_result['reason']})")
+            return EmailVerificationResult(
+                email=email,
+                category=INVALID,
+                reason=smtp_result["reason"],
+                provider=domain,
+                details=smtp_result
+            )
+        elif smtp_result.get("reply_class") == REPLY_POLICY:
+            # A block says nothing about the mailbox; other methods may tell
+            logger.info(f"SMTP verification result for {email}: RISKY ({smtp_result['reason']})")
+            return EmailVerificationResult(
+                email=email,
+                category=RISKY,
+                reason=smtp_result["reason"],
+                provider=domain,
+                details=smtp_result
+            )
+        elif smtp_result.get("temporary"):
+            logger.info(f"SMTP verification result for {email}: RISKY (Temporary failure: {smtp_result['reason']})")
+            return EmailVerificationResult(
+                email=email,
+                category=RISKY,
+                reason=f"Temporary SMTP failure: {smtp_result['reason']}",
+                provider=domain,
+                details=smtp_result
+            )
         elif smtp_result["reason"] == "Mailbox unavailable":
             # Changed from INVALID to RISKY as per requirements
             logger.info(f"SMTP verification result for {email}: RISKY (Mailbox unavailable)")
@@ -0,0 +1,203 @@
+import re
+from typing import Dict, Any, Optional, Tuple
+
+# Reply classes
+REPLY_DELIVERABLE = "deliverable"
+REPLY_UNKNOWN_USER = "unknown_user"
+REPLY_DISABLED = "disabled"
+REPLY_BAD_ADDRESS = "bad_address"
+REPLY_MAILBOX_FULL = "mailbox_full"
+REPLY_POLICY = "policy"
+REPLY_TEMPORARY = "temporary"
+REPLY_UNKNOWN = "unknown"
+
+# Classes that settle whether the mailbox exists, so no other method
+# needs to run
+DEFINITIVE_CLASSES = {REPLY_DELIVERABLE, REPLY_UNKNOWN_USER, REPLY_DISABLED,
+                      REPLY_BAD_ADDRESS, REPLY_MAILBOX_FULL}
+
+# Enhanced status code (RFC 3463), e.g. "5.1.1"
+ENHANCED_CODE_PATTERN = re.compile(r"\b([245])\.(\d{1,3})\.(\d{1,3})\b")
+
+# Enhanced codes, by subject.detail, that identify the reply class
+ENHANCED_CODE_CLASSES = {
+    "1.1": REPLY_UNKNOWN_USER,   # Bad destination mailbox address
+    "1.6": REPLY_UNKNOWN_USER,   # Destination mailbox has moved
+    "1.10": REPLY_UNKNOWN_USER,  # Recipient address has null MX
+    "1.2": REPLY_BAD_ADDRESS,    # Bad destination system address
+    "1.3": REPLY_BAD_ADDRESS,    # Bad destination mailbox address syntax
+    "2.1": REPLY_DISABLED,       # Mailbox disabled, not accepting messages
+    "2.2": REPLY_MAILBOX_FULL,   # Mailbox full
+}
+
+# Reply texts for servers that send no (or a generic) enhanced code,
+# checked in order; policy first, since blocks often mention the recipient
+REPLY_TEXT_PATTERNS = [
+    (REPLY_POLICY, re.compile(
+        r"spam|block|blacklist|denylist|policy|reputation|spamhaus|barracuda|"
+        r"not allowed|relay(ing)? (denied|not permitted)|access denied|client host|"
+        r"\bip\b|sender address rejected|authentication required", re.I)),
+    (REPLY_MAILBOX_FULL, re.compile(
+        r"mailbox (is )?full|over ?quota|quota exceeded|insufficient (system )?storage|"
+        r"exceeded storage", re.I)),
+    (REPLY_DISABLED, re.compile(
+        r"disabled|deactivated|inactive|suspended|account (has been )?(closed|locked)", re.I)),
+    (REPLY_UNKNOWN_USER, re.compile(
+        r"user unknown|unknown user|no such (user|mailbox|recipient)|does not exist|"
+        r"doesn't exist|unknown (recipient|mailbox)|recipient (address )?rejected|"
+        r"invalid (recipient|mailbox|address)|mailbox not found|user not found|"
+        r"address not found|no mailbox|not a valid mailbox|unrouteable", re.I)),
+]
+
+REPLY_DESCRIPTIONS = {
+    REPLY_UNKNOWN_USER: "Mailbox does not exist",
+    REPLY_DISABLED: "Mailbox is disabled",
+    REPLY_BAD_ADDRESS: "Address rejected by the server",
+    REPLY_MAILBOX_FULL: "Mailbox is full",
+    REPLY_POLICY: "Rejected by server policy",
+}
+
+def classify_reply(code: int, message: bytes) -> Dict[str, Any]:
+    """
+    Classify a RCPT TO reply using its code, enhanced status code and text.
+    
+    The enhanced status code decides when it is specific; the reply text
+    decides otherwise. A 4xx reply is temporary unless it says the mailbox
+    is full, which still proves the mailbox exists.
+    
+    Args:
+        code: The reply code
+        message: The reply text
+    
+    Returns:
+        Dict[str, Any]: "class" (one of the REPLY_* values), "enhanced_code"
+        (or None) and "definitive" (whether the mailbox question is settled)
+    """
+    text = message.decode('utf-8', errors='ignore') if isinstance(message, bytes) else str(message or "")
+    
+    enhanced_code: Optional[str] = None
+    reply_class = None
+    
+    match = ENHANCED_CODE_PATTERN.search(text)
+    if match and match.group(1) != str(code)[:1]:
+        # An enhanced code must agree with the reply code's class
+        match = None
+    if match:
+        enhanced_code = ".".join(match.groups())
+        if match.group(1) == "2":
+            reply_class = REPLY_DELIVERABLE
+        elif match.group(2) == "7":
+            # Security or policy status: says nothing about the mailbox
+            reply_class = REPLY_POLICY
+        else:
+            reply_class = ENHANCED_CODE_CLASSES.get(f"{match.group(2)}.{match.group(3)}")
+    
+    if reply_class is None:
+        if 200 <= code < 300:
+            reply_class = REPLY_DELIVERABLE
+        else:
+            for candidate, pattern in REPLY_TEXT_PATTERNS:
+                if pattern.search(text):
+                    reply_class = candidate
+                    break
+    
+    if reply_class is None:
+        if code == 553:
+            # Mailbox name not allowed
+            reply_class = REPLY_BAD_ADDRESS
+        elif code == 552:
+            # Exceeded storage allocation
+            reply_class = REPLY_MAILBOX_FULL
+        else:
+            reply_class = REPLY_UNKNOWN
+    
+    if 400 <= code < 500 and reply_class != REPLY_MAILBOX_FULL:
+        reply_class = REPLY_TEMPORARY
+    
+    return {
+        "class": reply_class,
+        "enhanced_code": enhanced_code,
+        "definitive": reply_class in DEFINITIVE_CLASSES
+    }
+
+class SenderRefusedReply(tuple):
+    """
+    A refused MAIL FROM reply, reported as the reply of every recipient in
+    its transaction. It says nothing about the recipients themselves.
+    """
+
+def catch_all_verdict(reply: Tuple[int, bytes]) -> Optional[bool]:
+    """
+    Read a domain's catch-all status from the RCPT TO reply for an address
+    that should not exist.
+    
+    Args:
+        reply: Reply code and text for the random address
+    
+    Returns:
+        Optional[bool]: True if the address was accepted, False if it was
+        rejected as unknown or bad, None if the reply does not tell (a
+        temporary failure, a policy block or a refused sender)
+    """
+    if isinstance(reply, SenderRefusedReply):
+        return None
+    reply_class = classify_reply(*reply)["class"]
+    if reply_class == REPLY_DELIVERABLE:
+        return True
+    if reply_class in (REPLY_UNKNOWN_USER, REPLY_BAD_ADDRESS):
+        return False
+    return None
+
+def apply_rcpt_reply(result: Dict[str, Any], code: int, message: bytes) -> bool:
+    """
+    Record a RCPT TO reply in a verify_smtp result.
+    
+    Shared by the smtplib and asyncio SMTP paths so both classify alike.
+    
+    Args:
+        result: The verify_smtp result being built
+        code: The reply code
+        message: The reply text
+    
+    Returns:
+        bool: True if the reply settles the check, False to try the next MX
+    """
+    reply = classify_reply(code, message)
+    result["reply_class"] = reply["class"]
+    result["enhanced_code"] = reply["enhanced_code"]
+    
+    if reply["class"] == REPLY_DELIVERABLE:
+        result.pop("temporary", None)
+        result["is_deliverable"] = True
+        result["smtp_check"] = True
+        result["reason"] = None
+        return True
+    
+    text = message.decode('utf-8', errors='ignore') if isinstance(message, bytes) else str(message or "")
+    if reply["definitive"]:
+        result.pop("temporary", None)
+        result["definitive"] = True
+        result["reason"] = f"{REPLY_DESCRIPTIONS[reply['class']]} ({reply['enhanced_code'] or code})"
+        # A bare 550 used to end up RISKY and go on to other methods
+        result["fallback_avoided"] = code == 550 or reply["class"] == REPLY_MAILBOX_FULL
+        return True
+    
+    if code == 550 and reply["class"] == REPLY_UNKNOWN:
+        # Mark as risky instead of invalid for "Mailbox unavailable"
+        result.pop("temporary", None)
+        result["reason"] = "Mailbox unavailable"
+        return True
+    
+    result["reason"] = f"SMTP Error: {code} - {text}"
+    if reply["class"] == REPLY_TEMPORARY:
+        # Worth retrying later rather than reporting now
+        result["temporary"] = True
+        return False
+    if reply["class"] == REPLY_POLICY:
+        # Blocks apply to us, not the mailbox; other MX hosts block alike
+        result.pop("temporary", None)
+        result["reason"] = f"{REPLY_DESCRIPTIONS[REPLY_POLICY]}: {code} {text}"
+        return True
+    
+    # Continue to next MX
+    return False
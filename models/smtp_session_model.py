@@ -0,0 +1,512 @@
+import ssl
+import time
+import socket
+import smtplib
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from models.connection_racer_model import ConnectionRacerModel, RacedConnection, split_host
+from models.smtp_deadline_model import ProbeDeadline
+from models.mx_capability_model import (MXCapabilityModel, TLS_OK, TLS_FAILED,
+                                        TLS_NOT_OFFERED, TLS_SKIPPED)
+from models.smtp_transcript_model import SMTPTranscriptModel, SMTPTranscript
+from models.smtp_reply_model import SenderRefusedReply
+
+logger = logging.getLogger(__name__)
+
+class _TranscribedSMTP(smtplib.SMTP):
+    """smtplib.SMTP that records what is sent and received into a transcript, if one is set."""
+    
+    transcript: Optional[SMTPTranscript] = None
+    
+    def send(self, s):
+        if self.transcript is not None:
+            self.transcript.sent(s)
+        super().send(s)
+    
+    def getreply(self):
+        code, message = super().getreply()
+        if self.transcript is not None:
+            self.transcript.reply(code, message)
+        return code, message
+
+class SMTPSession:
+    """An open SMTP connection to one MX host, reused for many RCPT TO probes."""
+    
+    def __init__(self, host: str, sender_email: str, timeout: float,
+                 capabilities: Optional[MXCapabilityModel] = None):
+        """
+        Initialize the session. The connection is opened by connect().
+        
+        Args:
+            host: The MX host
+            sender_email: Address used in MAIL FROM
+            timeout: Socket timeout in seconds
+            capabilities: Capability cache that applies the TLS policy and
+                keeps TLS sessions for resumption, if any
+        """
+        self.host = host
+        self.sender_email = sender_email
+        self.timeout = timeout
+        self.capabilities = capabilities
+        
+        self.smtp: Optional[_TranscribedSMTP] = None
+        self.recipients = 0
+        self.in_transaction = False
+        self.connected_at = 0.0
+        self.last_used = 0.0
+        
+        # Only one probe at a time may use the connection
+        self.lock = threading.Lock()
+        
+        # Set by the pool while a sampled exchange is transcribed
+        self._transcript: Optional[SMTPTranscript] = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self.smtp is not None
+    
+    @property
+    def transcript(self) -> Optional[SMTPTranscript]:
+        return self._transcript
+    
+    @transcript.setter
+    def transcript(self, transcript: Optional[SMTPTranscript]) -> None:
+        self._transcript = transcript
+        if self.smtp is not None:
+            self.smtp.transcript = transcript
+    
+    def connect(self, connection: Optional[RacedConnection] = None,
+                deadline: Optional[ProbeDeadline] = None) -> None:
+        """
+        Open the connection and complete EHLO and STARTTLS.
+        
+        Args:
+            connection: An already greeted connection to this host (won by
+                ConnectionRacerModel) to use instead of connecting
+            deadline: Time budget of the check; each phase is limited by it
+        """
+        deadline = deadline or ProbeDeadline.uniform(self.timeout)
+        if connection is None:
+            with deadline.phase("connect"):
+                smtp = _TranscribedSMTP(timeout=deadline.timeout())
+                smtp._host = split_host(self.host)[0]
+                smtp.transcript = self._transcript
+                code, message = smtp.connect(self.host)
+                if code != 220:
+                    smtp.close()
+                    raise smtplib.SMTPConnectError(code, message)
+        else:
+            # Hand the greeted socket to smtplib as if it had connected itself
+            smtp = _TranscribedSMTP(timeout=self.timeout)
+            smtp._host = split_host(connection.host)[0]
+            smtp.sock = connection.sock
+            smtp.file = connection.file
+            smtp.transcript = self._transcript
+            if self._transcript is not None:
+                self._transcript.note(f"raced connection to {connection.address}")
+                self._transcript.reply(connection.code, connection.banner)
+        try:
+            with deadline.phase("ehlo"):
+                smtp.sock.settimeout(deadline.timeout())
+                smtp.ehlo()
+            
+            # Try to use STARTTLS if available (and allowed by the TLS policy)
+            offered = smtp.has_extn('STARTTLS')
+            use_tls = offered
+            if self.capabilities:
+                use_tls = self.capabilities.should_starttls(self.host, offered)
+            if use_tls:
+                with deadline.phase("starttls"):
+                    smtp.sock.settimeout(deadline.timeout())
+                    self._starttls(smtp)
+                with deadline.phase("ehlo"):
+                    smtp.sock.settimeout(deadline.timeout())
+                    smtp.ehlo()
+            
+            if self.capabilities:
+                self.capabilities.record_ehlo(self.host, smtp.esmtp_features)
+                if use_tls and isinstance(smtp.sock, ssl.SSLSocket):
+                    self.capabilities.record_tls(self.host, TLS_OK, smtp.sock.session,
+                                                 smtp.sock.session_reused)
+                elif not use_tls:
+                    self.capabilities.record_tls(self.host, TLS_SKIPPED if offered else TLS_NOT_OFFERED)
+        except Exception:
+            smtp.close()
+            raise
+        
+        self.smtp = smtp
+        self.recipients = 0
+        self.in_transaction = False
+        self.connected_at = self.last_used = time.monotonic()
+        logger.debug(f"Opened SMTP session to {self.host}")
+    
+    def _starttls(self, smtp: smtplib.SMTP) -> None:
+        """
+        Upgrade the connection with STARTTLS.
+        
+        smtplib's starttls() cannot offer a session to resume, so with a
+        capability cache the upgrade is done here the same way, resuming
+        the host's last TLS session when there is one.
+        
+        Args:
+            smtp: The connection, after EHLO
+        """
+        if self.capabilities is None:
+            smtp.starttls()
+            return
+        
+        code, reply = smtp.docmd("STARTTLS")
+        if code != 220:
+            raise smtplib.SMTPResponseException(code, reply)
+        
+        try:
+            smtp.sock = self.capabilities.tls_context.wrap_socket(
+                smtp.sock, server_hostname=split_host(self.host)[0],
+                session=self.capabilities.get_tls_session(self.host)
+            )
+        except (ssl.SSLError, ConnectionResetError):
+            self.capabilities.record_tls(self.host, TLS_FAILED)
+            raise
+        if self._transcript is not None:
+            self._transcript.note(f"TLS {'resumed' if smtp.sock.session_reused else 'established'} "
+                                  f"({smtp.sock.version()})")
+        
+        # As after smtplib's starttls(), what the server said before no longer holds
+        smtp.file = None
+        smtp.helo_resp = None
+        smtp.ehlo_resp = None
+        smtp.esmtp_features = {}
+        smtp.does_esmtp = False
+    
+    def probe(self, emails: List[str], deadline: Optional[ProbeDeadline] = None) -> List[Tuple[int, bytes]]:
+        """
+        Check recipients with RCPT TO in one transaction.
+        
+        The previous transaction is reset with RSET, so the handshake is paid
+        once per connection instead of once per address. If the server
+        advertises PIPELINING, all commands are sent at once and the replies
+        read afterwards, so the transaction costs one round trip.
+        
+        Args:
+            emails: The recipients to check
+            deadline: Time budget of the check; each phase is limited by it
+        
+        Returns:
+            List[Tuple[int, bytes]]: The RCPT TO reply for each recipient
+        """
+        deadline = deadline or ProbeDeadline.uniform(self.timeout)
+        if self.smtp.has_extn('pipelining'):
+            return self._probe_pipelined(emails, deadline)
+        
+        with deadline.phase("mail"):
+            if self.in_transaction:
+                self.smtp.sock.settimeout(deadline.timeout())
+                self.smtp.rset()
+                self.in_transaction = False
+            
+            # Some servers require a sender address
+            self.smtp.sock.settimeout(deadline.timeout())
+            code, message = self.smtp.mail(self.sender_email)
+            self.in_transaction = True
+            self.last_used = time.monotonic()
+        if code != 250:
+            # The sender was refused; report it as every recipient's reply
+            return [SenderRefusedReply((code, message))] * len(emails)
+        
+        replies = []
+        for email in emails:
+            # Each recipient gets the RCPT limit, not the whole batch
+            with deadline.phase("rcpt"):
+                self.smtp.sock.settimeout(deadline.timeout())
+                replies.append(self.smtp.rcpt(email))
+            self.recipients += 1
+        self.last_used = time.monotonic()
+        return replies
+    
+    def _probe_pipelined(self, emails: List[str], deadline: ProbeDeadline) -> List[Tuple[int, bytes]]:
+        """
+        Check recipients with RSET, MAIL FROM and RCPT TO sent as one batch (RFC 2920).
+        
+        Args:
+            emails: The recipients to check
+            deadline: Time budget of the check
+        
+        Returns:
+            List[Tuple[int, bytes]]: The RCPT TO reply for each recipient
+        """
+        commands = []
+        if self.in_transaction:
+            commands.append("RSET")
+        commands.append(f"MAIL FROM:{smtplib.quoteaddr(self.sender_email)}")
+        commands.extend(f"RCPT TO:{smtplib.quoteaddr(email)}" for email in emails)
+        
+        # Replies come back in command order: RSET and MAIL FROM first
+        replies = []
+        with deadline.phase("mail"):
+            self.smtp.sock.settimeout(deadline.timeout())
+            self.smtp.send("".join(f"{command}\r\n" for command in commands))
+            self.in_transaction = True
+            for _ in range(len(commands) - len(emails)):
+                self.smtp.sock.settimeout(deadline.timeout())
+                replies.append(self.smtp.getreply())
+        for _ in emails:
+            # Each reply gets the RCPT limit, not the whole batch
+            with deadline.phase("rcpt"):
+                self.smtp.sock.settimeout(deadline.timeout())
+                replies.append(self.smtp.getreply())
+        self.last_used = time.monotonic()
+        self.recipients += len(emails)
+        
+        code, message = replies[-len(emails) - 1]
+        if code != 250:
+            # The sender was refused; report it as every recipient's reply
+            return [SenderRefusedReply((code, message))] * len(emails)
+        return replies[-len(emails):]
+    
+    def close(self) -> None:
+        """Close the connection politely, ignoring errors."""
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (socket.error, smtplib.SMTPException):
+            self.smtp.close()
+        finally:
+            self.smtp = None
+            self.in_transaction = False
+            logger.debug(f"Closed SMTP session to {self.host} after {self.recipients} recipients")
+
+class SMTPSessionPool:
+    """Keeps up to smtp_sessions_per_host SMTP sessions per MX host and reuses them across probes."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the session pool.
+        
+        Each probe checks out an idle session to its host, so concurrent
+        workers probing the same MX host use separate connections, up to
+        smtp_sessions_per_host of them (servers throttle or block clients
+        that open many parallel connections); further probes wait for a
+        session to be checked in. A session is reconnected once it has
+        checked smtp_session_max_recipients addresses (servers often cap
+        recipients per connection) or has been idle for
+        smtp_session_idle_timeout seconds (servers drop idle clients).
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.max_recipients = self.settings_model.get_int("smtp_session_max_recipients", 50)
+        self.idle_timeout = self.settings_model.get_float("smtp_session_idle_timeout", 30.0)
+        self.per_host = max(1, self.settings_model.get_int("smtp_sessions_per_host", 5))
+        
+        # Host -> its sessions; checked out sessions are in use by a probe
+        self.sessions: Dict[str, List[SMTPSession]] = {}
+        self.checked_out: Set[SMTPSession] = set()
+        self.lock = threading.Lock()
+        self.checked_in = threading.Condition(self.lock)
+        
+        # Staggered parallel connection attempts across MX hosts
+        self.racer = ConnectionRacerModel(settings_model)
+        
+        # EHLO capabilities, TLS policy and TLS sessions per MX host
+        self.capabilities = MXCapabilityModel(settings_model)
+        
+        # Sampled transcripts of recent exchanges per MX host
+        self.transcripts = SMTPTranscriptModel(settings_model)
+    
+    def _checkout(self, host: str, sender_email: str, timeout: float) -> SMTPSession:
+        """
+        Take an idle session to a host, creating one if the host has room for it.
+        
+        Open sessions are preferred, so connections are reused. Waits for
+        a session to be checked in if all of the host's sessions are busy.
+        
+        Args:
+            host: The MX host
+            sender_email: Address used in MAIL FROM
+            timeout: Socket timeout in seconds
+        
+        Returns:
+            SMTPSession: The session (possibly not connected), to be passed to _checkin()
+        """
+        key = host.lower()
+        with self.checked_in:
+            while True:
+                sessions = self.sessions.setdefault(key, [])
+                idle = [session for session in sessions if session not in self.checked_out]
+                if idle:
+                    session = next((session for session in idle if session.is_open), idle[0])
+                    break
+                if len(sessions) < self.per_host:
+                    session = SMTPSession(host, sender_email, timeout, self.capabilities)
+                    sessions.append(session)
+                    break
+                self.checked_in.wait()
+            self.checked_out.add(session)
+            return session
+    
+    def _checkin(self, session: SMTPSession) -> None:
+        """
+        Return a session taken with _checkout() for the next probe.
+        
+        Args:
+            session: The session
+        """
+        with self.checked_in:
+            self.checked_out.discard(session)
+            self.checked_in.notify()
+    
+    def _is_expired(self, session: SMTPSession) -> bool:
+        """Check if a session must be reconnected before its next probe."""
+        if session.recipients >= self.max_recipients:
+            return True
+        return time.monotonic() - session.last_used > self.idle_timeout
+    
+    def connect_first(self, hosts: List[str], sender_email: str = "verify@example.com",
+                      timeout: float = 10,
+                      deadline: Optional[ProbeDeadline] = None) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Make sure one of the MX hosts has an open session, racing connections to them.
+        
+        A host that already has an idle usable session is returned straight
+        away (the first in order). Otherwise connection attempts are raced
+        across all hosts and their addresses, and the host whose banner
+        arrives first gets the new session.
+        
+        Args:
+            hosts: MX hosts in the order they should be tried
+            sender_email: Address used in MAIL FROM
+            timeout: Socket timeout in seconds
+            deadline: Time budget of the check; the race is its connect phase
+        
+        Returns:
+            Tuple[Optional[str], Dict[str, str]]: The connected host (None if
+            no host could be reached) and the error of each host that failed
+        """
+        with self.lock:
+            for host in hosts:
+                for session in self.sessions.get(host.lower(), []):
+                    if (session not in self.checked_out and session.is_open
+                            and not self._is_expired(session)):
+                        return host, {}
+        
+        deadline = deadline or ProbeDeadline.uniform(timeout)
+        with deadline.phase("connect"):
+            connection, errors = self.racer.race(hosts, deadline.timeout())
+        if connection is None:
+            return None, errors
+        
+        session = self._checkout(connection.host, sender_email, timeout)
+        try:
+            with session.lock:
+                if session.is_open:
+                    # Another probe's connection was checked in meanwhile; it will do
+                    connection.close()
+                    return connection.host, errors
+                transcript = self.transcripts.begin(connection.host)
+                session.transcript = transcript
+                try:
+                    session.connect(connection, deadline)
+                except Exception as e:
+                    self.transcripts.finish(transcript, e)
+                    errors[connection.host] = str(e) or type(e).__name__
+                    return None, errors
+                finally:
+                    session.transcript = None
+                self.transcripts.finish(transcript)
+            return connection.host, errors
+        finally:
+            self._checkin(session)
+    
+    def probe(self, host: str, emails: List[str], sender_email: str = "verify@example.com",
+              timeout: float = 10,
+              deadline: Optional[ProbeDeadline] = None) -> List[Tuple[int, bytes]]:
+        """
+        Check recipients on an MX host over one of the host's pooled sessions.
+        
+        All recipients are checked in one transaction. A session that was
+        dropped by the server is reconnected and the probe retried once.
+        Other errors close the session and are raised.
+        
+        Args:
+            host: The MX host
+            emails: The recipients to check
+            sender_email: Address used in MAIL FROM
+            timeout: Socket timeout in seconds
+            deadline: Time budget of the check, shared with the reconnect
+        
+        Returns:
+            List[Tuple[int, bytes]]: The RCPT TO reply for each recipient
+        """
+        session = self._checkout(host, sender_email, timeout)
+        try:
+            with session.lock:
+                # Sampled exchanges are transcribed, including reconnects
+                transcript = self.transcripts.begin(host)
+                session.transcript = transcript
+                try:
+                    replies = self._probe_session(session, emails, deadline)
+                except Exception as e:
+                    self.transcripts.finish(transcript, e)
+                    raise
+                finally:
+                    session.transcript = None
+                self.transcripts.finish(transcript)
+                return replies
+        finally:
+            self._checkin(session)
+    
+    def _probe_session(self, session: SMTPSession, emails: List[str],
+                       deadline: Optional[ProbeDeadline]) -> List[Tuple[int, bytes]]:
+        """
+        Check recipients over a session, reconnecting it if needed (lock held).
+        
+        Args:
+            session: The checked out session
+            emails: The recipients to check
+            deadline: Time budget of the check, shared with the reconnect
+        
+        Returns:
+            List[Tuple[int, bytes]]: The RCPT TO reply for each recipient
+        """
+        if session.is_open and self._is_expired(session):
+            session.close()
+        
+        reused = session.is_open
+        if reused and session.transcript is not None:
+            session.transcript.note(f"reusing session after {session.recipients} recipients")
+        if not reused:
+            session.connect(deadline=deadline)
+        
+        try:
+            return session.probe(emails, deadline)
+        except smtplib.SMTPServerDisconnected:
+            session.close()
+            if not reused:
+                raise
+            # The server closed the idle connection; retry on a new one
+            logger.debug(f"SMTP session to {session.host} was dropped, reconnecting")
+            if session.transcript is not None:
+                session.transcript.note("session was dropped, reconnecting")
+            session.connect(deadline=deadline)
+            try:
+                return session.probe(emails, deadline)
+            except Exception:
+                session.close()
+                raise
+        except Exception:
+            session.close()
+            raise
+    
+    def close_all(self) -> None:
+        """Close every pooled session."""
+        with self.lock:
+            sessions = [session for host_sessions in self.sessions.values() for session in host_sessions]
+            self.sessions = {}
+        
+        for session in sessions:
+            with session.lock:
+                session.close()
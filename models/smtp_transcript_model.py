@@ -0,0 +1,225 @@
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+class SMTPTranscript:
+    """Commands and replies of one SMTP exchange with an MX host, with timestamps."""
+    
+    __slots__ = ("host", "started_at", "started", "events", "duration", "error")
+    
+    def __init__(self, host: str):
+        """
+        Start the transcript.
+        
+        Args:
+            host: The MX host
+        """
+        self.host = host
+        self.started_at = time.time()
+        self.started = time.monotonic()
+        # (seconds since start, "sent" / "reply" / "note", text)
+        self.events: List[tuple] = []
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    def _add(self, kind: str, text: str) -> None:
+        self.events.append((time.monotonic() - self.started, kind, text))
+    
+    def sent(self, data: Union[str, bytes]) -> None:
+        """
+        Record commands written to the server (one or more CRLF-terminated lines).
+        
+        Args:
+            data: What was written
+        """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8', errors='replace')
+        for line in data.split("\r\n"):
+            if line:
+                self._add("sent", line)
+    
+    def reply(self, code: int, message: Union[str, bytes]) -> None:
+        """
+        Record a reply read from the server.
+        
+        Args:
+            code: Reply code
+            message: Reply text, lines joined by newlines
+        """
+        if isinstance(message, bytes):
+            message = message.decode('utf-8', errors='replace')
+        self._add("reply", f"{code} {message}")
+    
+    def note(self, text: str) -> None:
+        """
+        Record something that is not a command or reply, e.g. a TLS handshake.
+        
+        Args:
+            text: What happened
+        """
+        self._add("note", text)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the transcript for the CLI and API.
+        
+        Returns:
+            Dict[str, Any]: "host", "started_at", "duration", "error" and
+            "events", each event with its offset "at" in seconds
+        """
+        return {
+            "host": self.host,
+            "started_at": datetime.fromtimestamp(self.started_at).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "error": self.error,
+            "events": [{"at": round(at, 3), kind: text} for at, kind, text in self.events]
+        }
+
+class SMTPTranscriptModel:
+    """Model for keeping recent SMTP transcripts per MX host, for diagnosing slow hosts."""
+    
+    def __init__(self, settings_model):
+        """
+        Initialize the transcript buffer.
+        
+        With smtp_transcript_enabled, a smtp_transcript_sample_rate fraction
+        of SMTP exchanges is transcribed; the others skip recording
+        entirely. The last smtp_transcript_per_host transcripts are kept
+        for each of the smtp_transcript_max_hosts most recently seen hosts,
+        in memory only.
+        
+        Args:
+            settings_model: The settings model instance
+        """
+        self.settings_model = settings_model
+        
+        self.enabled = self.settings_model.is_enabled("smtp_transcript_enabled")
+        self.sample_rate = self.settings_model.get_float("smtp_transcript_sample_rate", 0.01)
+        self.per_host = max(1, self.settings_model.get_int("smtp_transcript_per_host", 20))
+        self.max_hosts = max(1, self.settings_model.get_int("smtp_transcript_max_hosts", 200))
+        
+        # Host -> recent transcripts, least recently updated host first
+        self.hosts: "OrderedDict[str, deque]" = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def enable(self, sample_rate: Optional[float] = None) -> None:
+        """
+        Turn transcription on regardless of the settings, e.g. for a diagnostic run.
+        
+        Args:
+            sample_rate: Fraction of exchanges to transcribe, if not the configured one
+        """
+        self.enabled = True
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+    
+    def begin(self, host: str) -> Optional[SMTPTranscript]:
+        """
+        Start transcribing an exchange with a host, if it is sampled.
+        
+        Args:
+            host: The MX host
+        
+        Returns:
+            Optional[SMTPTranscript]: The transcript to record into, or None
+            if this exchange is not transcribed
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        return SMTPTranscript(host)
+    
+    def finish(self, transcript: Optional[SMTPTranscript], error: Optional[BaseException] = None) -> None:
+        """
+        End a transcript and add it to its host's buffer.
+        
+        Args:
+            transcript: The transcript from begin() (None is ignored)
+            error: The exception that ended the exchange, if any
+        """
+        if transcript is None:
+            return
+        transcript.duration = time.monotonic() - transcript.started
+        if error is not None:
+            transcript.error = str(error) or type(error).__name__
+        
+        key = transcript.host.lower()
+        with self.lock:
+            buffer = self.hosts.get(key)
+            if buffer is None:
+                buffer = deque(maxlen=self.per_host)
+                self.hosts[key] = buffer
+                if len(self.hosts) > self.max_hosts:
+                    self.hosts.popitem(last=False)
+            else:
+                self.hosts.move_to_end(key)
+            buffer.append(transcript)
+    
+    def get_transcripts(self, host: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent transcripts, newest first.
+        
+        Args:
+            host: Only this MX host's transcripts, if given
+            limit: Maximum number of transcripts
+        
+        Returns:
+            List[Dict[str, Any]]: The transcripts (see SMTPTranscript.to_dict)
+        """
+        with self.lock:
+            if host is not None:
+                transcripts = list(self.hosts.get(host.lower(), ()))
+            else:
+                transcripts = [transcript for buffer in self.hosts.values() for transcript in buffer]
+        
+        transcripts.sort(key=lambda transcript: transcript.started_at, reverse=True)
+        if limit is not None:
+            transcripts = transcripts[:limit]
+        return [transcript.to_dict() for transcript in transcripts]
+    
+    def get_host_summary(self) -> List[Dict[str, Any]]:
+        """
+        Summarize the buffered transcripts per host, slowest host first.
+        
+        Returns:
+            List[Dict[str, Any]]: "host", "transcripts", "errors",
+            "avg_duration" and "max_duration" per host
+        """
+        with self.lock:
+            buffers = [(host, list(buffer)) for host, buffer in self.hosts.items()]
+        
+        summary = []
+        for host, transcripts in buffers:
+            durations = [transcript.duration for transcript in transcripts]
+            summary.append({
+                "host": host,
+                "transcripts": len(transcripts),
+                "errors": sum(1 for transcript in transcripts if transcript.error),
+                "avg_duration": round(sum(durations) / len(durations), 3),
+                "max_duration": round(max(durations), 3)
+            })
+        summary.sort(key=lambda entry: entry["avg_duration"], reverse=True)
+        return summary
+    
+    def get_report(self, host: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the sampling settings, the per-host summary and recent transcripts.
+        
+        Args:
+            host: Only this MX host's transcripts, if given
+            limit: Maximum number of transcripts
+        
+        Returns:
+            Dict[str, Any]: "enabled", "sample_rate", "hosts" and "transcripts"
+        """
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "hosts": self.get_host_summary(),
+            "transcripts": self.get_transcripts(host, limit)
+        }
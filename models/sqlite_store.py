@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+class SQLiteStore:
+    """Small wrapper around a SQLite database shared by several processes."""
+    
+    def __init__(self, db_path: str, schema: List[str], timeout: float = 30.0):
+        """
+        Initialize the store and create its tables.
+        
+        The database runs in WAL mode so that many readers (terminal
+        subprocesses, worker threads, the API) can read while one writer
+        commits, and every connection waits on locks instead of failing.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            schema: List of CREATE statements to run on startup
+            timeout: Seconds to wait for a database lock
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._pid = os.getpid()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        for statement in schema:
+            self.execute(statement)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get the connection for the current thread and process.
+        
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        # Connections must not be shared with a forked child process
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+        
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+    
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> None:
+        """
+        Execute a statement.
+        
+        Args:
+            sql: The SQL statement
+            params: Statement parameters
+        """
+        self._connection().execute(sql, params)
+    
+    def executemany(self, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+        """
+        Execute a statement for several rows inside one transaction.
+        
+        Args:
+            sql: The SQL statement
+            rows: Parameters for each row
+        """
+        with self.transaction() as conn:
+            conn.executemany(sql, rows)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in one write transaction, e.g. a read-modify-write.
+        
+        The write lock is taken up front (BEGIN IMMEDIATE), so other
+        processes cannot change the rows read inside the transaction.
+        
+        Yields:
+            sqlite3.Connection: The connection to run the statements on
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        """
+        Run a query and return all rows.
+        
+        Args:
+            sql: The SQL query
+            params: Query parameters
+        
+        Returns:
+            List[Tuple]: The rows
+        """
+        return self._connection().execute(sql, params).fetchall()
+    
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[Tuple]:
+        """
+        Run a query and return the first row.
+        
+        Args:
+            sql: The SQL query
+            params: Query parameters
+        
+        Returns:
+            Optional[Tuple]: The first row, or None if there are no rows
+        """
+        return self._connection().execute(sql, params).fetchone()